@@ -0,0 +1,403 @@
+"""
+Benchmarks dos caminhos quentes: modelo, trajetórias em fluxo, previsão,
+gráficos, relatório, o quadro da simulação ao vivo e o do modo turma.
+
+Roda sem janela (driver de vídeo "dummy" do SDL) e grava os resultados em
+JSON. Com --base, compara cada caso com um resultado anterior e termina com
+código 1 se algum ficou mais lento que a tolerância, para que regressões
+apareçam antes de chegar às salas de aula.
+
+Exemplos:
+    python benchmark.py --saida base.json
+    python benchmark.py --base base.json --saida atual.json
+    python benchmark.py --filtro modelo --rapido
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+
+from modelo import (RECIPE_PARAMS, DEFAULT_PARAMS, model_hash, update_simulation, update_simulation_batch,
+                    get_prediction_feedback, cached_prediction_feedback, prediction_jacobian, run_trajectory)
+
+DEFAULT_TOLERANCE = 0.25  # Caso 25% mais lento que a base conta como regressão
+SIMULATION_SPEEDS = (1, 10, 100, 1000)
+RUN_LENGTHS = (240, 1440)
+SERIES_LENGTHS = (60, 240, 1440, 10080)
+FRAME_SAMPLES = 200  # Quadros medidos por caso graficos.*.quadro
+
+
+def measure(func, min_time=0.2, repeat=5):
+    """
+    Mede func() como o timeit: calibra quantas chamadas cabem em ~min_time / repeat
+    e repete repeat vezes. Retorna estatísticas por chamada, em segundos.
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / repeat or number >= 1_000_000:
+            break
+        number *= 10 if elapsed < min_time / repeat / 10 else 2
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return summarize(samples, number)
+
+
+def summarize(samples, number=1):
+    """Estatísticas (s) de uma lista de tempos por chamada."""
+    samples = np.asarray(samples)
+    return {
+        "median_s": float(np.median(samples)),
+        "min_s": float(samples.min()),
+        "p95_s": float(np.percentile(samples, 95)),
+        "max_s": float(samples.max()),
+        "samples": len(samples),
+        "number": number,
+    }
+
+
+def _random_params(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.column_stack([rng.uniform(p_min, p_max, n) for _, p_min, p_max, _, _ in RECIPE_PARAMS])
+
+
+# --------- Casos ----------
+# Cada benchmark é um gerador de (nome do caso, estatísticas).
+
+def bench_model(quick):
+    farina_g, water, temp, sugar_added, salt_g, time_limit = DEFAULT_PARAMS
+    stats = measure(lambda: update_simulation(time_limit, temp, sugar_added, water, farina_g, salt_g))
+    stats["throughput_per_s"] = 1.0 / stats["median_s"]
+    yield "modelo.update_simulation", stats
+
+    for n in (1_000, 100_000) if quick else (1_000, 100_000, 1_000_000):
+        p = _random_params(n)
+        farina_g, water, temp, sugar_added, salt_g, time_limit = p.T
+        stats = measure(lambda: update_simulation_batch(time_limit, temp, sugar_added, water, farina_g, salt_g))
+        stats["throughput_per_s"] = n / stats["median_s"]
+        yield f"modelo.update_simulation_batch[n={n}]", stats
+
+
+def bench_stream(quick):
+    """Trajetória de uma semana em blocos (fluxo.py), sem materializar: regular fina e adaptativa."""
+    from fluxo import iter_chunks, iter_adaptive_chunks
+    params = list(DEFAULT_PARAMS[:5]) + [10080]
+
+    def consume(chunks):
+        return sum(len(times) for times, _ in chunks)
+
+    step = 0.1 if quick else 0.01
+    n = consume(iter_chunks(params, step=step))
+    stats = measure(lambda: consume(iter_chunks(params, step=step)), repeat=3)
+    stats["throughput_per_s"] = n / stats["median_s"]
+    yield f"fluxo.iter_chunks[n={n}]", stats
+    yield "fluxo.iter_adaptive_chunks[tempo=10080]", measure(lambda: consume(iter_adaptive_chunks(params)))
+
+
+def bench_prediction(quick):
+    params = DEFAULT_PARAMS
+    yield "previsao.get_prediction_feedback", measure(lambda: get_prediction_feedback(params))
+    cached_prediction_feedback(params)
+    yield "previsao.cached_prediction_feedback[acerto]", measure(lambda: cached_prediction_feedback(params))
+    yield "previsao.prediction_jacobian", measure(lambda: prediction_jacobian(params))
+
+
+def bench_service(quick):
+    """Previsões concorrentes pelo serviço local (sem rede), sem cache: só o agrupamento em lotes."""
+    import asyncio
+    from servico import SimulationService
+    for n in (100, 1_000) if quick else (100, 1_000, 10_000):
+        rows = _random_params(n).tolist()
+
+        async def burst():
+            service = SimulationService(cache_size=0)
+            try:
+                await asyncio.gather(*(service.predict(row) for row in rows))
+            finally:
+                service.close()
+
+        stats = measure(lambda: asyncio.run(burst()))
+        stats["throughput_per_s"] = n / stats["median_s"]
+        yield f"servico.predict[concorrentes={n}]", stats
+
+
+def _load_run(sim, time_limit):
+    """Coloca no simulador uma simulação completa de time_limit minutos (sliders incluídos)."""
+    params = DEFAULT_PARAMS[:-1] + [float(time_limit)]
+    for slider, value in zip(sim.sliders, params):
+        slider.value = value
+        slider.update_handle()
+    times, series = run_trajectory(params, sim.SIMULATION_STEP)
+    sim.run_data = sim.RunBuffer.for_run(time_limit, sim.SIMULATION_STEP)
+    sim.run_data.extend(times, series)
+    return params
+
+
+def _pinned_runs(sim, time_limit, count):
+    """RunStore com count simulações de time_limit minutos (sal variando)."""
+    runs = sim.RunStore()
+    for salt in np.linspace(0, 30, count):
+        params = DEFAULT_PARAMS[:4] + [float(salt), float(time_limit)]
+        times, series = run_trajectory(params, sim.SIMULATION_STEP)
+        run = sim.RunBuffer(len(times))
+        run.extend(times, series)
+        runs.pin(run, params)
+    return runs
+
+
+def bench_graphs(quick):
+    sim = _simulator()
+    original = sim.live_graphs
+    renderers = {"nativo": sim.NativeGraphs(), "matplotlib": sim.LiveGraphs()}
+    try:
+        for renderer, graphs in renderers.items():
+            sim.live_graphs = graphs
+            for length in SERIES_LENGTHS[:3] if quick else SERIES_LENGTHS:
+                _load_run(sim, length)
+
+                def full():
+                    graphs.reset(length)
+                    sim.create_improved_graphs()
+
+                yield f"graficos.{renderer}.completo[n={length}]", measure(full, min_time=0.5 if not quick else 0.2)
+                # Quadro sem dados novos (caso comum em velocidades baixas)
+                yield f"graficos.{renderer}.sem_mudanca[n={length}]", measure(sim.create_improved_graphs)
+
+                # Quadros da simulação em andamento: uma amostra nova por quadro
+                times, series = sim.run_data["time"], sim.run_data.as_dict()
+                graphs.reset(length)
+                graphs.update(times[:len(times) // 2], series)
+                samples = []
+                for n in range(len(times) // 2 + 1, len(times) + 1)[:FRAME_SAMPLES]:
+                    start = time.perf_counter()
+                    graphs.update(times[:n], series)
+                    samples.append(time.perf_counter() - start)
+                yield f"graficos.{renderer}.quadro[n={length}]", summarize(samples)
+
+            # Modo de comparação: simulação atual sobre 20 simulações fixadas
+            runs = _pinned_runs(sim, RUN_LENGTHS[-1], 20)
+            _load_run(sim, RUN_LENGTHS[-1])
+
+            def compare():
+                graphs.reset(RUN_LENGTHS[-1], runs=runs)
+                sim.create_improved_graphs()
+
+            yield f"graficos.{renderer}.completo[n={RUN_LENGTHS[-1]},fixadas={len(runs)}]", measure(compare)
+    finally:
+        sim.live_graphs = original
+
+
+def bench_report(quick):
+    """
+    Desenho do relatório (ReportRenderer.draw), o relatório da interface sem
+    cache (desenho, thread e cópia para a Surface) e o mesmo com acerto no
+    cache. O cache é só em memória: nada é gravado em relatorios_cache/.
+    """
+    from relatorios import ReportCache, ReportPrerenderer, ReportRenderer
+    sim = _simulator()
+    renderer = ReportRenderer()
+    original = sim.report_prerenderer
+    sim.report_prerenderer = prerenderer = ReportPrerenderer(ReportCache(None))
+    try:
+        for length in RUN_LENGTHS:
+            params = _load_run(sim, length)
+            times, series = sim.run_data["time"], sim.run_data.as_dict()
+            yield f"relatorio.draw[n={length}]", measure(lambda: renderer.draw(params, times, series),
+                                                         min_time=1.0, repeat=3)
+
+            def uncached():
+                prerenderer.cache.memory.clear()
+                sim.create_educational_report()
+
+            yield f"relatorio.create_educational_report[n={length}]", measure(uncached, min_time=1.0, repeat=3)
+            yield f"relatorio.cache[n={length}]", measure(sim.create_educational_report)
+    finally:
+        prerenderer.close()
+        sim.report_prerenderer = original
+
+
+def bench_classroom(quick):
+    """Quadro do modo turma (passo vetorizado + miniaturas) com todas as sessões rodando a 1x."""
+    import pygame
+    from sessoes import SessionEngine
+    from turma import WIDTH, HEIGHT, TeacherDashboard, random_recipes
+    pygame.init()
+    surface = pygame.Surface((WIDTH, HEIGHT))
+    for n in (36,) if quick else (36, 100):
+        engine = SessionEngine()
+        for row in random_recipes(n):
+            engine.add(row)
+        dashboard = TeacherDashboard(engine, surface)
+
+        def frame():
+            engine.start([s for s in engine if not s.running])  # As que terminaram recomeçam
+            dashboard.update(1 / 30)
+            dashboard.draw()
+
+        yield f"turma.quadro[sessoes={n}]", measure(frame)
+
+
+def bench_frames(quick):
+    """Tempo de cada quadro de handle_simulation com a simulação correndo."""
+    sim = _simulator()
+    frames = 60 if quick else 150
+    saved_limit = sim.sliders[-1].value
+    try:
+        for length in RUN_LENGTHS:
+            for speed in SIMULATION_SPEEDS:
+                sim.sliders[-1].value = float(length)
+                sim.reset_simulation()
+                sim.sim_clock.set_speed(speed)
+                sim.running_simulation = True
+                sim.frame_seconds = 1.0 / 30
+                sim.handle_simulation([], (0, 0), True)  # Primeiro quadro: tela inteira
+                samples = []
+                for _ in range(frames):
+                    if sim.simulation_finished:
+                        sim.reset_simulation()
+                        sim.running_simulation = True
+                    start = time.perf_counter()
+                    sim.handle_simulation([], (0, 0), not sim.DIRTY_RECT_RENDERING)
+                    samples.append(time.perf_counter() - start)
+                yield f"quadro.handle_simulation[tempo={length},velocidade={speed}x]", summarize(samples)
+    finally:
+        sim.sliders[-1].value = saved_limit
+        sim.reset_simulation()
+
+
+BENCHMARKS = {
+    "modelo": bench_model,
+    "fluxo": bench_stream,
+    "previsao": bench_prediction,
+    "servico": bench_service,
+    "graficos": bench_graphs,
+    "relatorio": bench_report,
+    "quadro": bench_frames,
+    "turma": bench_classroom,
+}
+
+_sim = None
+
+
+def _simulator():
+    """Importa a interface só quando um benchmark precisa dela (cria a janela dummy)."""
+    global _sim
+    if _sim is None:
+        import simulador
+        simulador.AUTO_SAVE_RUNS = False  # As simulações dos benchmarks não são gravadas
+        _sim = simulador
+    return _sim
+
+
+def run_benchmarks(names=None, quick=False, progress=None):
+    """Roda os benchmarks escolhidos (padrão: todos) e retorna {caso: estatísticas}."""
+    results = {}
+    for name in names or BENCHMARKS:
+        for case, stats in BENCHMARKS[name](quick):
+            results[case] = stats
+            if progress:
+                progress(case, stats)
+    return results
+
+
+def environment_info():
+    import pygame
+    import matplotlib
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pygame": pygame.version.ver,
+        "matplotlib": matplotlib.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "model_hash": model_hash(),
+    }
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compara as medianas com as da base. Retorna {caso: razão atual/base} e a
+    lista de casos mais lentos que 1 + tolerance.
+    """
+    ratios = {}
+    for case, stats in results.items():
+        base = baseline.get(case)
+        if base and base["median_s"] > 0:
+            ratios[case] = stats["median_s"] / base["median_s"]
+    regressions = [case for case, ratio in ratios.items() if ratio > 1 + tolerance]
+    return ratios, regressions
+
+
+def format_time(seconds):
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:8.1f} µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:8.2f} ms"
+    return f"{seconds:8.2f} s "
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do simulador (sem janela)")
+    parser.add_argument("--saida", help="Grava os resultados neste arquivo JSON")
+    parser.add_argument("--base", help="JSON de uma execução anterior para comparação")
+    parser.add_argument("--tolerancia", type=float, default=DEFAULT_TOLERANCE,
+                        help="Aumento relativo da mediana tolerado (padrão: 0.25)")
+    parser.add_argument("--filtro", action="append", choices=list(BENCHMARKS),
+                        help="Roda só estes grupos (pode repetir)")
+    parser.add_argument("--rapido", action="store_true", help="Menos tamanhos e repetições")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.base:
+        try:
+            with open(args.base, encoding="utf-8") as f:
+                baseline = json.load(f)["results"]
+        except (OSError, ValueError, KeyError) as e:
+            sys.exit(f"Erro ao ler a base {args.base}: {e}")
+
+    def show(case, stats):
+        line = f"{case:60s} {format_time(stats['median_s'])}"
+        if "throughput_per_s" in stats:
+            line += f"  ({stats['throughput_per_s']:.3g}/s)"
+        base = baseline.get(case)
+        if base and base["median_s"] > 0:
+            line += f"  {stats['median_s'] / base['median_s']:5.2f}x base"
+        print(line, flush=True)
+
+    results = run_benchmarks(args.filtro, args.rapido, show)
+    report = {"meta": environment_info(), "results": results}
+
+    regressions = []
+    if baseline:
+        ratios, regressions = compare(results, baseline, args.tolerancia)
+        report["comparison"] = {"base": args.base, "tolerance": args.tolerancia,
+                                "ratios": ratios, "regressions": regressions}
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if regressions:
+        print(f"\n{len(regressions)} regressão(ões) acima de {args.tolerancia:.0%}:")
+        for case in regressions:
+            print(f"  {case}: {report['comparison']['ratios'][case]:.2f}x")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
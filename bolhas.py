@@ -0,0 +1,123 @@
+"""
+Bolhas de CO₂ da visualização da massa.
+
+Sistema de partículas em "struct of arrays": posição, tamanho e velocidade de
+cada bolha ficam em arrays NumPy, atualizados e filtrados de uma vez por
+quadro. A quantidade de bolhas novas acompanha a taxa instantânea de produção
+de CO₂ do modelo (gramas por minuto simulado), e o desenho usa sprites
+pré-renderizados (um por raio) enviados num único Surface.blits.
+"""
+import numpy as np
+import pygame
+
+BUBBLES_PER_GRAM = 8.0   # Bolhas emitidas por grama de CO₂ produzido
+MAX_BUBBLES = 5000       # Limite de partículas vivas (velocidades muito altas)
+BUBBLE_COLOR = (255, 255, 255, 150)
+
+_sprites = {}
+
+
+def bubble_sprite(radius):
+    """Sprite (SRCALPHA) de uma bolha de raio radius, desenhado uma vez."""
+    sprite = _sprites.get(radius)
+    if sprite is None:
+        size = 2 * radius + 1
+        sprite = pygame.Surface((size, size), pygame.SRCALPHA)
+        if radius > 0:
+            pygame.draw.circle(sprite, BUBBLE_COLOR, (radius, radius), radius)
+        else:
+            sprite.set_at((0, 0), BUBBLE_COLOR)
+        _sprites[radius] = sprite
+    return sprite
+
+
+class BubbleSystem:
+    """
+    Bolhas que nascem no fundo da bacia, sobem e crescem até estourar.
+
+    x, y, size e speed são arrays com as bolhas vivas nas primeiras len()
+    posições. As coordenadas são de tela, em pixels; a animação anda em
+    quadros (não em minutos simulados).
+    """
+
+    __slots__ = ("x", "y", "size", "speed", "_n", "_pending", "rng",
+                 "spawn_x", "spawn_y", "top", "max_size")
+
+    def __init__(self, capacity=256, spawn_x=(95, 385), spawn_y=370, top=220, max_size=8.0, seed=None):
+        self.x = np.empty(capacity)
+        self.y = np.empty(capacity)
+        self.size = np.empty(capacity)
+        self.speed = np.empty(capacity)
+        self._n = 0
+        self._pending = 0.0  # Fração de bolha acumulada entre quadros
+        self.rng = np.random.default_rng(seed)
+        self.spawn_x = spawn_x
+        self.spawn_y = spawn_y
+        self.top = top
+        self.max_size = max_size
+
+    def __len__(self):
+        return self._n
+
+    def clear(self):
+        self._n = 0
+        self._pending = 0.0
+
+    def _reserve(self, n):
+        if n > len(self.x):
+            capacity = max(n, 2 * len(self.x))
+            for name in ("x", "y", "size", "speed"):
+                old = getattr(self, name)
+                new = np.empty(capacity)
+                new[:self._n] = old[:self._n]
+                setattr(self, name, new)
+
+    def spawn(self, k):
+        """Cria k bolhas no fundo da bacia (respeitando MAX_BUBBLES)."""
+        k = min(int(k), MAX_BUBBLES - self._n)
+        if k <= 0:
+            return
+        self._reserve(self._n + k)
+        s = slice(self._n, self._n + k)
+        self.x[s] = self.rng.integers(self.spawn_x[0], self.spawn_x[1], k, endpoint=True)
+        self.y[s] = self.spawn_y
+        self.size[s] = self.rng.integers(2, 6, k, endpoint=True)
+        self.speed[s] = self.rng.uniform(1.0, 2.5, k)
+        self._n += k
+
+    def emit(self, co2_rate, minutes):
+        """
+        Emite as bolhas correspondentes a co2_rate (g/min) durante minutes
+        minutos simulados. Frações se acumulam para o próximo quadro, então a
+        densidade não depende de quantos minutos cada quadro avança.
+        """
+        self._pending += max(0.0, co2_rate) * minutes * BUBBLES_PER_GRAM
+        k = int(self._pending)
+        self._pending -= k
+        self.spawn(k)
+
+    def update(self):
+        """Um quadro de animação: sobe, cresce e remove as que estouraram."""
+        n = self._n
+        y, size = self.y[:n], self.size[:n]
+        y -= self.speed[:n]
+        size += 0.1
+        alive = (y >= self.top) & (size <= self.max_size)
+        k = int(np.count_nonzero(alive))
+        if k < n:
+            for arr in (self.x, self.y, self.size, self.speed):
+                arr[:k] = arr[:n][alive]
+            self._n = k
+
+    def draw(self, surface, rect):
+        """Desenha as bolhas cujo centro está dentro de rect (a massa)."""
+        n = self._n
+        x, y = self.x[:n], self.y[:n]
+        inside = (x > rect.left) & (x < rect.right) & (y > rect.top) & (y < rect.bottom)
+        if not inside.any():
+            return
+        r = self.size[:n][inside].astype(int)
+        px = (x[inside].astype(int) - r).tolist()
+        py = (y[inside].astype(int) - r).tolist()
+        sprites = [bubble_sprite(radius) for radius in range(int(self.max_size) + 1)]
+        surface.blits([(sprites[radius], pos) for radius, pos in zip(r.tolist(), zip(px, py))], False)
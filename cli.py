@@ -0,0 +1,155 @@
+"""
+Linha de comando do simulador: roda uma receita sem interface gráfica.
+
+Exemplos:
+    python cli.py --farinha 500 --sal 10 --tempo 180
+    python cli.py --tempo 1440 --passo 5 --formato json --saida trajetoria.json
+    python cli.py --resumo
+    python cli.py --perfil 0:4,720:4,780:28 --tempo 960 --resumo
+    python cli.py --tempo 1440 --passo 0.01 --formato gravacao --saida longa.run
+    python cli.py --tempo 10080 --passo 0.001 --saida semana.csv
+    python cli.py --tempo 1440 --adaptativo --tolerancia 0.0005
+
+As trajetórias CSV e JSON e o --resumo são gerados em blocos (fluxo.py), em
+memória constante: o passo pode ser tão fino quanto se queira.
+"""
+import argparse
+import csv
+import json
+import sys
+
+from modelo import (SIMULATION_OUTPUTS, FEEDBACK_LEVELS, FEEDBACK_MESSAGES, run_trajectory,
+                    get_prediction_feedback, classify_prediction, generate_analysis)
+from dinamico import TemperatureSchedule, run_profile_trajectory
+from dados import RunBuffer, save_run
+from fluxo import DEFAULT_TOLERANCE, iter_chunks, iter_adaptive_chunks, envelope
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Simulador de Fermentação de Pão (modo sem interface)")
+    # Valores padrão iguais aos sliders da interface
+    parser.add_argument("--farinha", type=float, default=1000.0, help="Farinha (g)")
+    parser.add_argument("--agua", type=float, default=0.68, help="Água (fração)")
+    parser.add_argument("--temperatura", type=float, default=30.0, help="Temperatura (°C)")
+    parser.add_argument("--acucar", type=float, default=20.0, help="Açúcar (g)")
+    parser.add_argument("--sal", type=float, default=15.0, help="Sal (g)")
+    parser.add_argument("--tempo", type=float, default=240.0, help="Tempo (min)")
+    parser.add_argument("--passo", type=float, default=1.0, help="Intervalo entre amostras (min)")
+    parser.add_argument("--adaptativo", action="store_true",
+                        help="Amostras densas onde as curvas mudam rápido e esparsas nos platôs (ignora --passo)")
+    parser.add_argument("--tolerancia", type=float, default=DEFAULT_TOLERANCE,
+                        help="Erro tolerado no modo adaptativo, em fração da faixa de cada saída")
+    parser.add_argument("--formato", choices=("csv", "json", "gravacao"), default="csv",
+                        help="Formato da trajetória (gravacao: arquivo .run para o replay do simulador)")
+    parser.add_argument("--saida", default=None, help="Arquivo de saída (padrão: terminal)")
+    parser.add_argument("--resumo", action="store_true", help="Mostra apenas a previsão e a análise final")
+    parser.add_argument("--perfil", default=None, metavar="MIN:TEMP,...",
+                        help="Perfil de temperatura (modo dinâmico, ignora --temperatura). "
+                             "Ex.: 0:4,720:4,780:28 = geladeira por 12 h e depois 28 °C")
+    return parser
+
+
+def params_from_args(args):
+    """Converte os argumentos na lista de parâmetros na ordem dos sliders."""
+    return [args.farinha, args.agua, args.temperatura, args.acucar, args.sal, args.tempo]
+
+
+def write_trajectory(out, chunks, fmt):
+    """
+    Escreve a trajetória bloco a bloco. chunks é uma função que retorna um
+    gerador novo de (tempos, {saída: array}); o JSON é escrito coluna a
+    coluna, percorrendo o gerador (determinístico) uma vez por coluna.
+    """
+    if fmt == "json":
+        out.write("{")
+        for k, name in enumerate(("time",) + SIMULATION_OUTPUTS):
+            out.write(f'{", " if k else ""}{json.dumps("tempo" if k == 0 else name)}: [')
+            first = True
+            for times, series in chunks():
+                values = times if k == 0 else series[name]
+                if len(values):
+                    out.write(("" if first else ", ") + json.dumps(values.tolist())[1:-1])
+                    first = False
+            out.write("]")
+        out.write("}\n")
+    else:
+        writer = csv.writer(out)
+        writer.writerow(("tempo",) + SIMULATION_OUTPUTS)
+        for times, series in chunks():
+            columns = [[f"{t:g}" for t in times.tolist()]]
+            columns += [[f"{v:.6g}" for v in series[name].tolist()] for name in SIMULATION_OUTPUTS]
+            writer.writerows(zip(*columns))
+
+
+def final_prediction(params, series):
+    """Previsão no formato de get_prediction_feedback a partir do fim de uma trajetória."""
+    ph, volume, retention = series["ph"][-1], series["volume"][-1], series["retention"][-1]
+    level = FEEDBACK_LEVELS[int(classify_prediction(params[0], ph, volume, retention))]
+    return {"ph": ph, "volume": volume, "retention": retention,
+            "feedback": FEEDBACK_MESSAGES[level], "level": level}
+
+
+def print_summary(out, params, series, prediction=None):
+    prediction = prediction or get_prediction_feedback(params)
+    out.write(f"pH Final Estimado: {prediction['ph']:.2f}\n")
+    out.write(f"Volume Final Estimado: {prediction['volume']:.0f} mL\n")
+    out.write(f"Retenção Glúten (Final): {prediction['retention']:.1f}%\n")
+    out.write(f"Análise: {prediction['feedback']}\n\n")
+    analyses = generate_analysis(params[0], series["volume"], series["ph"], series["etoh"],
+                                 series["co2"], series["retention"])
+    for analysis in analyses:
+        out.write(analysis + "\n")
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not args.passo > 0:
+        sys.exit("Erro: --passo deve ser maior que zero.")
+
+    if args.formato == "gravacao" and not args.saida and not args.resumo:
+        sys.exit("Erro: o formato gravacao requer --saida.")
+    if args.adaptativo and (args.perfil or args.formato == "gravacao"):
+        sys.exit("Erro: --adaptativo não se aplica a --perfil nem ao formato gravacao.")
+    if args.tolerancia <= 0:
+        sys.exit("Erro: --tolerancia deve ser maior que zero.")
+
+    params = params_from_args(args)
+    prediction = None
+    if args.perfil:
+        # O modo dinâmico integra passo a passo: a trajetória é calculada inteira
+        try:
+            schedule = TemperatureSchedule.parse(args.perfil)
+        except ValueError as e:
+            sys.exit(f"Erro: {e}")
+        times, series, _ = run_profile_trajectory(params, schedule, args.passo)
+        prediction = final_prediction(params, series)
+        chunks = lambda: iter([(times, series)])
+    elif args.adaptativo:
+        chunks = lambda: iter_adaptive_chunks(params, tolerance=args.tolerancia)
+    else:
+        chunks = lambda: iter_chunks(params, step=args.passo)
+
+    if args.formato == "gravacao" and not args.resumo:
+        if not args.perfil:
+            times, series = run_trajectory(params, args.passo)
+        run = RunBuffer(len(times))
+        run.extend(times, series)
+        extra = {"perfil": args.perfil} if args.perfil else {}
+        save_run(args.saida, run, params, args.passo, **extra)
+        return
+
+    out = open(args.saida, "w", encoding="utf-8", newline="") if args.saida else sys.stdout
+    try:
+        if args.resumo:
+            print_summary(out, params, envelope(chunks()), prediction)
+        else:
+            write_trajectory(out, chunks, args.formato)
+    except ValueError as e:
+        sys.exit(f"Erro: {e}")
+    finally:
+        if args.saida:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
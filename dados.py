@@ -0,0 +1,319 @@
+"""
+Armazenamento das séries de uma simulação.
+
+RunBuffer guarda o tempo e as 8 saídas do modelo num único bloco NumPy
+contíguo (uma linha por série), pré-alocado para o número esperado de
+amostras e ampliado geometricamente se for preciso. As séries são expostas
+como views (sem cópia) para os gráficos, o relatório e a análise.
+
+Uma simulação terminada pode ser gravada (save_run) num arquivo binário
+compacto: um cabeçalho JSON pequeno (parâmetros, colunas, número de amostras
+e o hash das constantes do modelo) seguido do bloco de float64, alinhado para
+memmap. RunRecording abre o arquivo sem ler as séries: o bloco é mapeado na
+memória e só as páginas usadas (ex.: até a posição do replay) são lidas.
+
+RunStore guarda as simulações fixadas para comparação (modo de comparação
+dos gráficos e do relatório) num único bloco, uma após a outra.
+"""
+import json
+import math
+import os
+import struct
+from datetime import datetime
+
+import numpy as np
+
+from modelo import SIMULATION_OUTPUTS, PARAM_NAMES, MODEL_VERSION, model_hash
+
+# Colunas: tempo + as 8 saídas de update_simulation, na mesma ordem
+RUN_COLUMNS = ("time",) + SIMULATION_OUTPUTS
+
+
+class RunBuffer:
+    """Séries de uma simulação em um bloco (colunas x capacidade) de float64."""
+
+    __slots__ = ("columns", "_index", "_block", "_n")
+
+    def __init__(self, capacity=256, columns=RUN_COLUMNS):
+        self.columns = tuple(columns)
+        self._index = {name: i for i, name in enumerate(self.columns)}
+        self._block = np.empty((len(self.columns), max(1, int(capacity))))
+        self._n = 0
+
+    @classmethod
+    def from_block(cls, block, columns=RUN_COLUMNS):
+        """RunBuffer sobre um bloco já preenchido (ex.: o memmap de uma gravação), sem cópia."""
+        run = cls.__new__(cls)
+        run.columns = tuple(columns)
+        run._index = {name: i for i, name in enumerate(run.columns)}
+        run._block = block
+        run._n = block.shape[1]
+        return run
+
+    @classmethod
+    def for_run(cls, time_limit, step):
+        """Pré-aloca para uma simulação de time_limit minutos com passo step."""
+        return cls(math.ceil(time_limit / step) + 2 if step > 0 else 256)
+
+    def __len__(self):
+        return self._n
+
+    @property
+    def capacity(self):
+        return self._block.shape[1]
+
+    def _reserve(self, n):
+        if n > self.capacity:
+            block = np.empty((len(self.columns), max(n, 2 * self.capacity)))
+            block[:, :self._n] = self._block[:, :self._n]
+            self._block = block
+
+    def append(self, t, values):
+        """Adiciona uma amostra: o tempo e as 8 saídas na ordem de update_simulation."""
+        self._reserve(self._n + 1)
+        col = self._block[:, self._n]
+        col[0] = t
+        col[1:] = values
+        self._n += 1
+
+    def extend(self, times, series):
+        """Adiciona várias amostras de uma vez (series: dict {nome: array})."""
+        k = len(times)
+        self._reserve(self._n + k)
+        end = self._n + k
+        self._block[0, self._n:end] = times
+        for name in self.columns[1:]:
+            self._block[self._index[name], self._n:end] = series[name]
+        self._n = end
+
+    def clear(self):
+        self._n = 0
+
+    def seek(self, n):
+        """
+        Passa a expor só as n primeiras amostras do bloco (replay de uma
+        gravação). Num buffer ainda sendo preenchido, use só para recuar.
+        """
+        self._n = max(0, min(int(n), self.capacity))
+
+    def __getitem__(self, name):
+        """
+        View (sem cópia) da série name com as amostras atuais. A view continua
+        válida até a próxima ampliação do bloco; não a guarde entre quadros.
+        """
+        return self._block[self._index[name], :self._n]
+
+    def last(self, name, default=None):
+        """Último valor da série name (ou default se ainda não há amostras)."""
+        return self._block[self._index[name], self._n - 1] if self._n else default
+
+    def as_dict(self):
+        """Dict {nome: view} com todas as colunas."""
+        return {name: self[name] for name in self.columns}
+
+
+# --------- Gravações ----------
+
+RUN_FILE_MAGIC = b"PAORUN\x00\x01"  # Assinatura + versão do formato
+RUN_FILE_ALIGN = 64                  # O bloco começa num múltiplo de 64 bytes
+
+
+def save_run(path, run, params, step, **extra):
+    """
+    Grava as séries de run (RunBuffer) e os parâmetros da receita (na ordem
+    dos sliders) em path. extra entra no cabeçalho (ex.: perfil de temperatura).
+    A escrita vai para um arquivo temporário e é renomeada no fim.
+    """
+    header = {
+        "columns": list(run.columns),
+        "samples": len(run),
+        "dtype": "<f8",
+        "params": dict(zip(PARAM_NAMES, (float(v) for v in params))),
+        "step": float(step),
+        "model_version": MODEL_VERSION,
+        "model_hash": model_hash(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+    }
+    header.update(extra)
+    payload = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    start = len(RUN_FILE_MAGIC) + 4 + len(payload)
+    padding = -start % RUN_FILE_ALIGN
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(RUN_FILE_MAGIC)
+        f.write(struct.pack("<I", len(payload) + padding))
+        f.write(payload + b" " * padding)
+        for name in run.columns:
+            np.asarray(run[name], dtype="<f8").tofile(f)
+    os.replace(tmp, path)
+    return path
+
+
+class RunRecording:
+    """
+    Gravação aberta para replay. O cabeçalho é lido na hora; as séries ficam
+    num memmap somente leitura (abrir uma gravação longa é instantâneo).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(RUN_FILE_MAGIC)) != RUN_FILE_MAGIC:
+                raise ValueError(f"{path} não é uma gravação do simulador")
+            (size,) = struct.unpack("<I", f.read(4))
+            self.header = json.loads(f.read(size).decode("utf-8"))
+        offset = len(RUN_FILE_MAGIC) + 4 + size
+        columns = self.header["columns"]
+        n = self.header["samples"]
+        if n:
+            self.block = np.memmap(path, dtype=self.header["dtype"], mode="r", offset=offset, shape=(len(columns), n))
+        else:
+            self.block = np.empty((len(columns), 0))
+        self.columns = tuple(columns)
+
+    def __len__(self):
+        return self.header["samples"]
+
+    @property
+    def params(self):
+        """Parâmetros da receita na ordem dos sliders."""
+        return [self.header["params"][name] for name in PARAM_NAMES]
+
+    @property
+    def step(self):
+        return self.header["step"]
+
+    @property
+    def stale(self):
+        """True se a gravação foi feita com outras constantes/equações do modelo."""
+        return self.header["model_hash"] != model_hash()
+
+    def buffer(self):
+        """RunBuffer (somente leitura) sobre o memmap, com todas as amostras."""
+        return RunBuffer.from_block(self.block, self.columns)
+
+
+# --------- Simulações fixadas (comparação) ----------
+
+MAX_PINNED_RUNS = 20
+
+# Nome curto e formato de cada parâmetro nos rótulos das simulações comparadas
+PARAM_SHORT_LABELS = (
+    ("Farinha", lambda v: f"{v:.0f} g"),
+    ("Água", lambda v: f"{v * 100:.0f}%"),
+    ("Temp.", lambda v: f"{v:.1f} °C"),
+    ("Açúcar", lambda v: f"{v:.1f} g"),
+    ("Sal", lambda v: f"{v:.1f} g"),
+    ("Tempo", lambda v: f"{v:.0f} min"),
+)
+MAX_LABEL_PARAMS = 2  # Parâmetros diferentes mostrados por rótulo
+
+
+def comparison_labels(params_list):
+    """
+    Rótulos curtos de simulações comparadas: só os parâmetros que variam entre
+    elas (ex.: "Sal 5.0 g", "Sal 25.0 g"). Sem diferenças, "Simulação n".
+    """
+    texts = [[fmt(v) for (_, fmt), v in zip(PARAM_SHORT_LABELS, params)] for params in params_list]
+    varying = [i for i in range(len(PARAM_SHORT_LABELS)) if len({t[i] for t in texts}) > 1]
+    labels = []
+    for k, t in enumerate(texts):
+        parts = [f"{PARAM_SHORT_LABELS[i][0]} {t[i]}" for i in varying[:MAX_LABEL_PARAMS]]
+        if len(varying) > MAX_LABEL_PARAMS:
+            parts.append("…")
+        labels.append(", ".join(parts) if parts else f"Simulação {k + 1}")
+    return labels
+
+
+class PinnedRun:
+    """Uma simulação fixada: parâmetros, rótulo e posição das amostras no bloco do RunStore."""
+
+    __slots__ = ("id", "params", "label", "store", "start", "stop")
+
+    def __init__(self, id, params, store, start, stop):
+        self.id = id  # Único no RunStore: chave dos artistas em cache dos gráficos
+        self.params = params
+        self.label = ""
+        self.store = store
+        self.start = start
+        self.stop = stop
+
+    def __len__(self):
+        return self.stop - self.start
+
+    @property
+    def data(self):
+        """RunBuffer (views do bloco, sem cópia). Não guarde entre mudanças do RunStore."""
+        return RunBuffer.from_block(self.store._block[:, self.start:self.stop], self.store.columns)
+
+
+class RunStore:
+    """
+    Simulações fixadas para comparação, com as séries de todas num único
+    bloco (colunas x amostras), uma após a outra. Os rótulos são refeitos a
+    cada mudança para mostrar só o que difere entre as simulações.
+    """
+
+    def __init__(self, max_runs=MAX_PINNED_RUNS, columns=RUN_COLUMNS):
+        self.max_runs = max_runs
+        self.columns = tuple(columns)
+        self._block = np.empty((len(self.columns), 1024))
+        self._n = 0
+        self._next_id = 0
+        self.runs = []
+        self.version = 0  # Muda a cada pin/remoção (os gráficos comparam para saber se redesenham)
+
+    def __len__(self):
+        return len(self.runs)
+
+    def __iter__(self):
+        return iter(self.runs)
+
+    def __getitem__(self, i):
+        return self.runs[i]
+
+    @property
+    def full(self):
+        return len(self.runs) >= self.max_runs
+
+    def pin(self, run, params):
+        """Copia as amostras de run (RunBuffer) para o bloco. Retorna o PinnedRun (ValueError se cheio)."""
+        if self.full:
+            raise ValueError(f"No máximo {self.max_runs} simulações fixadas")
+        k = len(run)
+        if k == 0:
+            raise ValueError("A simulação ainda não tem amostras")
+        if k > self._block.shape[1] - self._n:
+            block = np.empty((len(self.columns), max(self._n + k, 2 * self._block.shape[1])))
+            block[:, :self._n] = self._block[:, :self._n]
+            self._block = block
+        for i, name in enumerate(self.columns):
+            self._block[i, self._n:self._n + k] = run[name]
+        pinned = PinnedRun(self._next_id, [float(v) for v in params], self, self._n, self._n + k)
+        self._next_id += 1
+        self._n += k
+        self.runs.append(pinned)
+        self._changed()
+        return pinned
+
+    def remove(self, index):
+        """Remove uma simulação e compacta o bloco."""
+        run = self.runs.pop(index)
+        k = len(run)
+        self._block[:, run.start:self._n - k] = self._block[:, run.stop:self._n]
+        self._n -= k
+        for later in self.runs[index:]:
+            later.start -= k
+            later.stop -= k
+        self._changed()
+
+    def clear(self):
+        self.runs = []
+        self._n = 0
+        self._changed()
+
+    def _changed(self):
+        for run, label in zip(self.runs, comparison_labels([run.params for run in self.runs])):
+            run.label = label
+        self.version += 1
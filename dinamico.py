@@ -0,0 +1,251 @@
+"""
+Modo dinâmico: a mesma biologia do modelo integrada como EDOs, com a
+temperatura variando no tempo (geladeira e depois fermentação morna, massa
+aquecendo de 24 °C a 30 °C, ...).
+
+Estados integrados, por receita:
+    sacarose   dS/dt = -k_suc(T) S
+    amido      dA/dt = -k1(T) A            (potencial de maltose da farinha)
+    maltose    dM/dt =  k1(T) A - k2(T, S) M  (k2 inibido enquanto há sacarose)
+    biomassa   dX/dt =  r(T) X (1 - X / K)  (logística)
+CO₂, etanol, volume, pH e retenção de glúten saem do estado como no modelo
+fechado (modelo.outputs_from_state). Com temperatura constante o resultado
+coincide com update_simulation, exceto a maltose quando há sacarose: o modelo
+fechado aplica a inibição do instante t a toda a história, aqui ela vale
+instante a instante (sem açúcar adicionado as duas coincidem).
+
+O integrador é um Dormand-Prince 5(4) de passo adaptativo vetorizado: cada
+receita tem seu próprio tempo e passo, todas avançam juntas em arrays NumPy.
+Os passos param nos vértices do perfil de temperatura e a saída densa
+(interpolação de Hermite cúbica) é calculada nos instantes pedidos.
+
+Exemplo:
+    python cli.py --perfil 0:4,720:4,780:28 --tempo 960
+"""
+import numpy as np
+
+from modelo import (K_CONS_SUCROSE, K_PROD_MALTOSE, K_CONS_MALTOSE, MALT_FROM_STARCH, N0, Y_X_S,
+                    K_s_sugar, YEAST_GROWTH_RATE, SIMULATION_OUTPUTS,
+                    environment_factor, outputs_from_state)
+
+STATE_NAMES = ("sucrose", "starch", "maltose", "biom")
+MAX_ITERATIONS = 100_000
+
+# Tabela de Butcher do Dormand-Prince 5(4)
+_C = np.array([0.0, 1/5, 3/10, 4/5, 8/9, 1.0, 1.0])
+_A = [
+    [],
+    [1/5],
+    [3/40, 9/40],
+    [44/45, -56/15, 32/9],
+    [19372/6561, -25360/2187, 64448/6561, -212/729],
+    [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656],
+    [35/384, 0.0, 500/1113, 125/192, -2187/6784, 11/84],
+]
+_B = np.array(_A[6] + [0.0])
+_E = np.array([71/57600, 0.0, -71/16695, 71/1920, -17253/339200, 22/525, -1/40])
+
+
+class TemperatureSchedule:
+    """
+    Perfil de temperatura linear por partes: vértices (tempo em min, °C).
+    Antes do primeiro e depois do último vértice a temperatura fica
+    constante. Dois vértices no mesmo instante fazem um degrau.
+
+    times/temps podem ser (k,) (um perfil para todas as receitas) ou (n, k)
+    (um perfil por receita; veja stack).
+    """
+
+    def __init__(self, times, temps):
+        self.times = np.atleast_2d(np.asarray(times, dtype=float))
+        self.temps = np.atleast_2d(np.asarray(temps, dtype=float))
+        if self.times.shape != self.temps.shape or self.times.shape[1] == 0:
+            raise ValueError("O perfil precisa de pelo menos um vértice (tempo, temperatura).")
+        if np.any(np.diff(self.times, axis=1) < 0):
+            raise ValueError("Os tempos do perfil devem estar em ordem crescente.")
+
+    @classmethod
+    def constant(cls, temp):
+        return cls([0.0], [temp])
+
+    @classmethod
+    def parse(cls, text):
+        """Lê "0:4,720:4,780:28" (minuto:°C separados por vírgula)."""
+        try:
+            points = [tuple(float(v) for v in item.split(":")) for item in text.split(",") if item.strip()]
+            times, temps = zip(*points)
+        except ValueError:
+            raise ValueError(f"Perfil inválido: {text!r} (use minuto:temperatura,...)")
+        return cls(times, temps)
+
+    @classmethod
+    def stack(cls, schedules):
+        """Junta perfis de uma receita cada em um perfil (n, k), repetindo o último vértice."""
+        k = max(s.times.shape[1] for s in schedules)
+        pad = lambda a: np.pad(a[0], (0, k - a.shape[1]), mode="edge")
+        return cls([pad(s.times) for s in schedules], [pad(s.temps) for s in schedules])
+
+    def _rows(self, n):
+        return np.broadcast_to(self.times, (n, self.times.shape[1])), np.broadcast_to(self.temps, (n, self.temps.shape[1]))
+
+    def segment(self, t):
+        """Índice do segmento de cada receita no instante t (contínuo à direita nos degraus)."""
+        times, _ = self._rows(len(t))
+        return (times <= t[:, None]).sum(axis=1) - 1
+
+    def at(self, t, seg):
+        """Temperatura em t (array (n,)) usando o segmento seg de cada receita."""
+        times, temps = self._rows(len(t))
+        last = times.shape[1] - 1
+        i0 = np.clip(seg, 0, last)[:, None]
+        i1 = np.clip(seg + 1, 0, last)[:, None]
+        t0, t1 = np.take_along_axis(times, i0, 1)[:, 0], np.take_along_axis(times, i1, 1)[:, 0]
+        T0, T1 = np.take_along_axis(temps, i0, 1)[:, 0], np.take_along_axis(temps, i1, 1)[:, 0]
+        span = t1 - t0
+        w = np.divide(t - t0, span, out=np.zeros_like(t), where=span > 0)
+        return T0 + (T1 - T0) * w
+
+    def __call__(self, t):
+        """Temperatura nos instantes t (array (n,), um por receita)."""
+        t = np.asarray(t, dtype=float)
+        return self.at(t, self.segment(t))
+
+    def next_knot(self, t):
+        """Próximo vértice estritamente depois de t (inf se não houver)."""
+        times, _ = self._rows(len(t))
+        return np.where(times > t[:, None], times, np.inf).min(axis=1)
+
+
+def solve_batch(rhs, y0, t_end, t_eval, schedule, rtol=1e-6, atol=1e-8, first_step=5.0):
+    """
+    Integra dy/dt = rhs(t, y, seg) para n sistemas de uma vez, de t = 0 até
+    t_end (array (n,)), com Dormand-Prince 5(4) e controle de erro por
+    sistema. seg é o segmento do perfil no início de cada passo (os passos
+    nunca atravessam um vértice do perfil).
+
+    Retorna (estados (n, len(t_eval), d) nos instantes t_eval, com NaN depois
+    do t_end de cada sistema, e estatísticas {"steps", "rejected"}).
+    """
+    y = np.array(y0, dtype=float)
+    n, d = y.shape
+    t_eval = np.asarray(t_eval, dtype=float)
+    t_end = np.broadcast_to(np.asarray(t_end, dtype=float), (n,))
+    out = np.full((n, len(t_eval), d), np.nan)
+
+    t = np.zeros(n)
+    out[:, t_eval <= 0] = y[:, None, :]
+    nxt = np.full(n, int(np.searchsorted(t_eval, 0.0, side="right")))
+    last = np.searchsorted(t_eval, t_end, side="right")  # Saídas até t_end de cada sistema
+
+    h = np.minimum(first_step, t_end)
+    f = rhs(t, y, schedule.segment(t))
+    K = np.empty((7, n, d))
+    steps = rejected = 0
+
+    for _ in range(MAX_ITERATIONS):
+        active = t < t_end
+        if not active.any():
+            break
+        seg = schedule.segment(t)
+        knot = np.minimum(schedule.next_knot(t), t_end)
+        hit = active & (knot - t <= h)
+        h = np.where(hit, knot - t, np.where(active, h, 0.0))
+
+        K[0] = f
+        for i in range(1, 7):
+            dy = sum(a * K[j] for j, a in enumerate(_A[i]) if a)
+            K[i] = rhs(t + _C[i] * h, y + h[:, None] * dy, seg)
+        y_new = y + h[:, None] * np.tensordot(_B, K, 1)
+        err = h[:, None] * np.tensordot(_E, K, 1)
+        scale = atol + rtol * np.maximum(np.abs(y), np.abs(y_new))
+        err_norm = np.sqrt(np.mean((err / scale)**2, axis=1))
+
+        accept = active & (err_norm <= 1.0)
+        steps += int(accept.sum())
+        rejected += int((active & ~accept).sum())
+        t_new = np.where(hit, knot, t + h)
+
+        # Saída densa: Hermite cúbica entre (t, y, f) e (t_new, y_new, K[6])
+        idx = np.nonzero(accept)[0]
+        stop = np.minimum(np.searchsorted(t_eval, t_new[idx], side="right"), last[idx])
+        count = np.maximum(stop - nxt[idx], 0)
+        if count.sum():
+            rows = np.repeat(idx, count)
+            offsets = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+            cols = np.repeat(nxt[idx], count) + offsets
+            hh = h[rows][:, None]
+            theta = ((t_eval[cols] - t[rows]) / h[rows])[:, None]
+            h00 = (1 + 2 * theta) * (1 - theta)**2
+            h10 = theta * (1 - theta)**2
+            h01 = theta**2 * (3 - 2 * theta)
+            h11 = theta**2 * (theta - 1)
+            out[rows, cols] = (h00 * y[rows] + h10 * hh * f[rows]
+                               + h01 * y_new[rows] + h11 * hh * K[6][rows])
+        nxt[idx] += count
+
+        t = np.where(accept, t_new, t)
+        y[accept] = y_new[accept]
+        f[accept] = K[6][accept]
+
+        # Novo passo (fator limitado entre 0.2x e 5x)
+        with np.errstate(divide="ignore"):
+            factor = np.clip(0.9 * err_norm**-0.2, 0.2, 5.0)
+        h = np.where(active, h * factor, h)
+        h = np.where(hit & accept, np.maximum(h, first_step), h)  # Recomeça normal depois de um vértice
+    else:
+        raise RuntimeError("O integrador não convergiu (passos demais).")
+
+    # Instantes exatamente no fim de cada sistema que ainda faltam
+    for i in np.nonzero(nxt < last)[0]:
+        out[i, nxt[i]:last[i]] = y[i]
+    return out, {"steps": steps, "rejected": rejected}
+
+
+def simulate_profiles(params, schedule, t_eval, rtol=1e-6, atol=1e-8):
+    """
+    Integra n receitas sob o perfil de temperatura schedule (um
+    TemperatureSchedule comum ou um por receita).
+
+    params: array (n, 6) na ordem dos sliders; a coluna da temperatura é
+    ignorada e o tempo final de cada receita é a última coluna.
+    t_eval: instantes (min, crescentes) da saída densa.
+    Retorna {saída: array (n, len(t_eval))} com as 8 saídas do modelo (NaN
+    depois do tempo final de cada receita).
+    """
+    params = np.atleast_2d(np.asarray(params, dtype=float))
+    farina_g, water, _, sugar_added, salt_g, time_limit = params.T
+
+    starch_potential = farina_g * MALT_FROM_STARCH
+    total_sugar_potential = sugar_added + starch_potential
+    K = np.maximum(N0 + 0.1, total_sugar_potential * Y_X_S)
+    sugar_factor = total_sugar_potential / (K_s_sugar + total_sugar_potential)
+
+    def rhs(t, y, seg):
+        S, A, M, X = y.T
+        env, _ = environment_factor(schedule.at(t, seg), water, farina_g, salt_g)
+        env = env / 60.0  # Taxas do modelo são por hora; o tempo aqui é em minutos
+        k1 = K_PROD_MALTOSE * env
+        inhibition = np.maximum(0.01, (S / (sugar_added + 1e-6))**2)
+        k2 = K_CONS_MALTOSE * env * (1.0 - inhibition)
+        r = YEAST_GROWTH_RATE * sugar_factor * env
+        return np.column_stack((-K_CONS_SUCROSE * env * S, -k1 * A, k1 * A - k2 * M, r * X * (1 - X / K)))
+
+    y0 = np.column_stack((sugar_added, starch_potential, np.zeros(len(params)), np.full(len(params), N0)))
+    states, _ = solve_batch(rhs, y0, time_limit, t_eval, schedule, rtol, atol)
+
+    S, _, M, X = np.moveaxis(states, 2, 0)
+    col = lambda v: v[:, None]
+    return outputs_from_state(np.asarray(t_eval, dtype=float)[None, :], X, np.maximum(0, S), np.maximum(0, M),
+                              col(sugar_added), col(water), col(farina_g), col(salt_g))
+
+
+def run_profile_trajectory(params, schedule, step=1.0):
+    """
+    Como modelo.run_trajectory, mas com a temperatura seguindo schedule.
+    Retorna (tempos, dict de arrays com as 8 saídas, temperaturas).
+    """
+    time_limit = params[5]
+    times = np.append(np.arange(step, time_limit, step), time_limit)
+    series = simulate_profiles(np.asarray(params, dtype=float)[None, :], schedule, times)
+    temps = schedule(times) if schedule.times.shape[0] == 1 else None
+    return times, {name: series[name][0] for name in SIMULATION_OUTPUTS}, temps
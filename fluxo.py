@@ -0,0 +1,199 @@
+"""
+Trajetórias em fluxo: geradores que entregam as amostras da simulação aos
+poucos, em blocos NumPy ou uma a uma, sem montar a trajetória inteira.
+
+O modelo é uma fórmula fechada no tempo, então cada bloco é calculado
+independentemente (update_simulation_batch) e a memória usada não depende do
+tamanho da simulação: uma fermentação de uma semana com passo de 0,001 min
+pode ser exportada, plotada ou analisada bloco a bloco.
+
+iter_chunks usa uma grade regular (início, fim e passo quaisquer; com os
+padrões é a mesma grade de modelo.run_trajectory). iter_adaptive_chunks
+escolhe os instantes pela curvatura das saídas: amostras densas onde as
+curvas mudam rápido (inflexão da logística da biomassa, queda inicial do
+pH) e esparsas nos platôs, com o erro da interpolação linear entre amostras
+limitado a `tolerance` da faixa de cada saída.
+
+Exemplo:
+    for times, series in iter_adaptive_chunks(params):
+        writer.writerows(zip(times, series["ph"]))
+"""
+import math
+from collections import namedtuple
+
+import numpy as np
+
+from modelo import SIMULATION_OUTPUTS, update_simulation_batch
+
+DEFAULT_CHUNK_SIZE = 4096
+DEFAULT_TOLERANCE = 1e-3   # Erro de interpolação tolerado, em fração da faixa de cada saída
+DEFAULT_MIN_STEP = 0.1     # min; também o espaçamento da grade fina usada para medir a curvatura
+DEFAULT_MAX_STEP = 30.0    # min
+PREVIEW_POINTS = 257       # Amostras da prévia que estima a faixa de cada saída
+FINE_WINDOW = 65_536       # Pontos da grade fina avaliados de cada vez no modo adaptativo
+
+# Uma amostra: o tempo e as 8 saídas de update_simulation
+Sample = namedtuple("Sample", ("time",) + SIMULATION_OUTPUTS)
+
+
+def _bounds(params, start, end, step):
+    if not step > 0:
+        raise ValueError("O passo deve ser maior que zero")
+    end = params[5] if end is None else float(end)
+    # Como modelo.run_trajectory: tempo menor que o passo dá só o instante final
+    start = min(step, end) if start is None else float(start)
+    if end < start:
+        raise ValueError("O fim deve ser maior ou igual ao início")
+    return start, end
+
+
+def _evaluate(params, times, constants=None):
+    farina_g, water, temp, sugar_added, salt_g = params[:5]
+    return update_simulation_batch(times, temp, sugar_added, water, farina_g, salt_g, constants)
+
+
+def regular_times(start, end, step, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Instantes start, start + step, ... (< end) e por fim end, em blocos de até
+    chunk_size. Igual a np.append(np.arange(start, end, step), end), sem montar
+    o array inteiro.
+    """
+    n = max(0, math.ceil((end - start) / step))
+    delta = (start + step) - start  # Como np.arange: mesmos valores, bit a bit
+    for i in range(0, n, chunk_size):
+        times = start + np.arange(i, min(i + chunk_size, n)) * delta
+        # A conta de ceil pode incluir um instante igual ao fim por arredondamento
+        yield times[times < end]
+    yield np.array([end])
+
+
+def iter_chunks(params, start=None, end=None, step=1.0, chunk_size=DEFAULT_CHUNK_SIZE, constants=None):
+    """
+    Gera (tempos, {saída: array}) em blocos de até chunk_size amostras numa
+    grade regular. params segue a ordem dos sliders; start (padrão: step, ou
+    end se end < step) e end (padrão: o tempo da receita) são em minutos e end
+    é sempre incluído.
+    """
+    start, end = _bounds(params, start, end, step)
+    for times in regular_times(start, end, step, chunk_size):
+        if len(times):
+            yield times, _evaluate(params, times, constants)
+
+
+def output_scales(params, start, end, constants=None):
+    """Faixa (máx - mín) de cada saída entre start e end, numa prévia de PREVIEW_POINTS amostras."""
+    series = _evaluate(params, np.linspace(start, end, PREVIEW_POINTS), constants)
+    scales = np.array([np.ptp(series[name]) for name in SIMULATION_OUTPUTS])
+    # Saídas quase constantes não devem forçar amostras por ruído numérico
+    return np.maximum(scales, 1e-9 * np.maximum(1.0, np.abs(scales).max()))
+
+
+def adaptive_times(params, start=None, end=None, tolerance=DEFAULT_TOLERANCE, min_step=DEFAULT_MIN_STEP,
+                   max_step=DEFAULT_MAX_STEP, window=FINE_WINDOW, constants=None):
+    """
+    Gera, em blocos, instantes crescentes de start a end (inclusive) com
+    densidade proporcional à curvatura das saídas.
+
+    Em janelas de `window` pontos da grade fina (espaçamento min_step) mede a
+    segunda derivada de cada saída, normalizada pela faixa dela. O erro da
+    interpolação linear num intervalo h é h² |y''| / 8, então o passo pedido
+    é h = sqrt(8 tolerance / |y''|), limitado a [min_step, max_step]. Os
+    instantes são postos onde a integral de 1/h cruza um inteiro, de forma
+    que o passo acompanha a curvatura sem saltos entre janelas.
+    """
+    start, end = _bounds(params, start, end, min_step)
+    if not 0 < min_step <= max_step:
+        raise ValueError("É preciso 0 < passo mínimo <= passo máximo")
+    if not tolerance > 0:
+        raise ValueError("A tolerância deve ser maior que zero")
+    yield np.array([start])
+    if end == start:
+        return
+    scales = output_scales(params, start, end, constants)
+    n_fine = max(2, math.ceil((end - start) / min_step) + 1)
+    h = (end - start) / (n_fine - 1)
+    count = 0.0   # Integral de 1/passo desde start (em amostras)
+    emitted = 0   # Amostras depois de start já entregues
+    for i in range(0, n_fine - 1, window):
+        # Um ponto a mais de cada lado para a segunda diferença nas bordas
+        idx = np.arange(max(i - 1, 0), min(i + window, n_fine - 1) + 2)
+        times = np.minimum(start + idx * h, end + h)
+        series = _evaluate(params, times, constants)
+        curvature = np.zeros(len(times))
+        for k, name in enumerate(SIMULATION_OUTPUTS):
+            y = series[name] / scales[k]
+            second = np.abs(np.gradient(np.gradient(y, h), h))
+            np.maximum(curvature, second, out=curvature)
+        with np.errstate(divide="ignore"):
+            step = np.sqrt(8.0 * tolerance / curvature)
+        density = 1.0 / np.clip(step, min_step, max_step)
+
+        # Só os pontos da janela [i, i + window] (sem o vizinho anterior)
+        offset = 1 if i > 0 else 0
+        t = times[offset:offset + min(window, n_fine - 1 - i) + 1]
+        d = density[offset:offset + len(t)]
+        cumulative = count + np.concatenate(([0.0], np.cumsum((d[1:] + d[:-1]) * 0.5 * np.diff(t))))
+        targets = np.arange(emitted + 1, math.floor(cumulative[-1]) + 1)
+        count = cumulative[-1]
+        if len(targets):
+            emitted = int(targets[-1])
+            new = np.interp(targets, cumulative, t)
+            yield new[new < end]
+    yield np.array([end])
+
+
+def iter_adaptive_chunks(params, start=None, end=None, tolerance=DEFAULT_TOLERANCE, min_step=DEFAULT_MIN_STEP,
+                         max_step=DEFAULT_MAX_STEP, chunk_size=DEFAULT_CHUNK_SIZE, constants=None):
+    """
+    Como iter_chunks, mas com os instantes de adaptive_times (start padrão: 0).
+    Os blocos têm tamanhos variados (até chunk_size amostras).
+    """
+    start = 0.0 if start is None else start
+    pending = []
+    size = 0
+    for times in adaptive_times(params, start, end, tolerance, min_step, max_step, constants=constants):
+        pending.append(times)
+        size += len(times)
+        if size >= chunk_size:
+            times = np.concatenate(pending)
+            pending, size = [], 0
+            yield times, _evaluate(params, times, constants)
+    if size:
+        times = np.concatenate(pending)
+        yield times, _evaluate(params, times, constants)
+
+
+def iter_samples(chunks):
+    """Achata um gerador de blocos em amostras (Sample), uma a uma."""
+    for times, series in chunks:
+        columns = [times.tolist()] + [series[name].tolist() for name in SIMULATION_OUTPUTS]
+        for values in zip(*columns):
+            yield Sample(*values)
+
+
+def collect(chunks):
+    """Junta os blocos num (tempos, {saída: array}), como run_trajectory (materializa tudo)."""
+    chunks = list(chunks)
+    if not chunks:
+        return np.empty(0), {name: np.empty(0) for name in SIMULATION_OUTPUTS}
+    times = np.concatenate([c[0] for c in chunks])
+    return times, {name: np.concatenate([c[1][name] for c in chunks]) for name in SIMULATION_OUTPUTS}
+
+
+def envelope(chunks):
+    """
+    Mínimo, máximo e último valor de cada saída num fluxo, em memória
+    constante. Retorna {saída: array([mín, máx, último])}: séries curtas que
+    bastam para modelo.generate_analysis (usa o máximo e o último valor).
+    """
+    lo = hi = last = None
+    for _, series in chunks:
+        values = np.array([series[name] for name in SIMULATION_OUTPUTS])
+        if lo is None:
+            lo, hi = values.min(axis=1), values.max(axis=1)
+        else:
+            lo, hi = np.minimum(lo, values.min(axis=1)), np.maximum(hi, values.max(axis=1))
+        last = values[:, -1]
+    if lo is None:
+        return {name: np.empty(0) for name in SIMULATION_OUTPUTS}
+    return {name: np.array([lo[k], hi[k], last[k]]) for k, name in enumerate(SIMULATION_OUTPUTS)}
@@ -0,0 +1,274 @@
+"""
+Gráficos ao vivo da tela de simulação.
+
+Cada um dos seis painéis tem a sua figura do Matplotlib, criada uma única vez.
+O fundo de cada painel (eixos, grade, textos) fica em cache; a cada quadro ele
+é restaurado (blitting no canvas Agg) e só as linhas, reduzidas a no máximo
+MAX_POINTS pontos, são desenhadas por cima. Os eixos só são redesenhados
+quando os seus limites precisam mudar. Assim o custo por quadro não cresce com a duração da simulação.
+As bandas de incerteza (incerteza.trajectory_bands) fazem parte do fundo.
+
+No modo de comparação, as simulações fixadas (dados.RunStore) também vão para
+o fundo: cada uma tem as suas linhas criadas uma única vez (em cache pelo id
+da simulação) e só a simulação atual é desenhada a cada quadro.
+"""
+import numpy as np
+import pygame
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
+
+# (título, séries, cores, rótulo do eixo Y) — mesma ordem dos painéis originais
+GRAPH_PANELS = (
+    ("pH", ("ph",), ("blue",), "pH"),
+    ("Crescimento de Leveduras", ("biom",), ("green",), "g/L"),
+    ("Açúcares", ("sucrose", "maltose"), ("orange", "deepskyblue"), "g"),
+    ("Produção de CO₂", ("co2",), ("red",), "g"),
+    ("Volume da Massa", ("volume",), ("purple",), "mL"),
+    ("Produção de Etanol", ("etoh",), ("brown",), "g/L"),
+)
+
+# Cores das simulações fixadas (RGB), na ordem em que foram fixadas
+RUN_COLORS = (
+    (31, 119, 180), (255, 127, 14), (44, 160, 44), (214, 39, 40), (148, 103, 189),
+    (140, 86, 75), (227, 119, 194), (127, 127, 127), (188, 189, 34), (23, 190, 207),
+    (174, 199, 232), (255, 187, 120), (152, 223, 138), (255, 152, 150), (197, 176, 213),
+    (196, 156, 148), (247, 182, 210), (199, 199, 199), (219, 219, 141), (158, 218, 229),
+)
+
+
+def run_color(index, key_index=0):
+    """Cor RGB da simulação fixada index; a segunda série do painel (maltose) sai mais clara."""
+    color = RUN_COLORS[index % len(RUN_COLORS)]
+    if key_index:
+        return tuple((c + 255) // 2 for c in color)
+    return color
+
+
+SERIES_LABELS = {
+    "ph": "pH",
+    "biom": "Crescimento",
+    "sucrose": "Sacarose",
+    "maltose": "Maltose",
+    "co2": "Produção",
+    "volume": "Volume",
+    "etoh": "Produção",
+}
+
+
+def panel_ylim(title, lo, hi):
+    """
+    Limites do eixo Y de um painel dado o mínimo e o máximo dos dados.
+    Retorna None enquanto não há dados (limites padrão do eixo).
+    """
+    if "pH" in title:
+        return (3.5, 7.0)
+    if hi == -np.inf:
+        return None
+    if "Leveduras" in title:
+        return (0, hi * 1.2 if hi > 0 else 10)
+    if "Volume" in title:
+        return (lo * 0.9, max(2, hi * 1.2))
+    if "Açúcares" in title:
+        return (0, max(10, hi * 1.1))
+    return (0, max(1, hi * 1.2))  # CO₂ e Etanol
+
+
+def decimate(x, y, max_points):
+    """
+    Reduz uma série a no máximo ~max_points pontos com passo fixo (mantendo o
+    último), para que o custo de desenho não cresça com o tamanho da série.
+    """
+    n = len(x)
+    if n <= max_points:
+        return x, y
+    step = -(-n // max_points)
+    idx = np.append(np.arange(0, n - 1, step), n - 1)
+    return x[idx], y[idx]
+
+
+class _Panel:
+    """Um dos seis gráficos: figura própria, eixos, linhas e fundo em cache."""
+
+    def __init__(self, title, keys, colors, y_label, figsize, dpi):
+        self.title = title
+        self.keys = keys
+        self.colors = colors
+        self.band_artists = []
+        self.run_artists = {}  # id da simulação fixada -> linhas (uma por série)
+        self.run_legend = False  # O painel que mostra a legenda das simulações fixadas
+        self.fig = Figure(figsize=figsize, dpi=dpi)
+        self.canvas = FigureCanvas(self.fig)
+        self.size = self.canvas.get_width_height()
+        self.ax = self.fig.add_subplot(111)
+        self.ax.set_title(title, fontsize=10, pad=5)
+        self.ax.set_xlabel("Tempo (min)", fontsize=8)
+        self.ax.set_ylabel(y_label, fontsize=8)
+        self.ax.grid(True, linestyle="--", alpha=0.7)
+        self.lines = []
+        for key, color in zip(keys, colors):
+            # Linhas "animadas" não entram no fundo; são desenhadas por draw_artist
+            line, = self.ax.plot([], [], color=color, linewidth=2, label=SERIES_LABELS[key], animated=True)
+            self.lines.append((key, line))
+        if len(keys) > 1:
+            self.ax.legend(fontsize="small")
+        self.fig.tight_layout()
+
+    def reset(self, bands=None, runs=()):
+        self.lo = np.inf
+        self.hi = -np.inf
+        self._set_runs(runs)
+        for artist in self.band_artists:
+            artist.remove()
+        self.band_artists = []
+        if bands is not None:
+            # Banda entre o primeiro e o último percentil (não animada: vai para o fundo)
+            for key, color in zip(self.keys, self.colors):
+                low, high = bands[key][0], bands[key][-1]
+                self.band_artists.append(self.ax.fill_between(bands["time"], low, high, color=color,
+                                                              alpha=0.2, linewidth=0))
+                self.lo = min(self.lo, low.min())
+                self.hi = max(self.hi, high.max())
+        self.limits = panel_ylim(self.title, self.lo, self.hi)
+        self.x_max = None
+        self.background = None
+
+    def _set_runs(self, runs):
+        """Cria as linhas das simulações fixadas novas e remove as das que saíram (não animadas: vão para o fundo)."""
+        ids = {run.id for run in runs}
+        for run_id in list(self.run_artists):
+            if run_id not in ids:
+                for line in self.run_artists.pop(run_id):
+                    line.remove()
+        handles = []
+        for i, run in enumerate(runs):
+            data = run.data
+            lines = self.run_artists.get(run.id)
+            if lines is None:
+                lines = self.run_artists[run.id] = [
+                    self.ax.plot(*decimate(data["time"], data[key], LiveGraphs.MAX_POINTS), linewidth=1)[0]
+                    for key in self.keys
+                ]
+            for j, (key, line) in enumerate(zip(self.keys, lines)):
+                # A cor segue a posição (muda quando uma simulação anterior sai)
+                line.set_color(tuple(c / 255.0 for c in run_color(i, j)))
+                self.lo = min(self.lo, data[key].min())
+                self.hi = max(self.hi, data[key].max())
+            lines[0].set_label(run.label)
+            handles.append(lines[0])
+        if self.run_legend:
+            legend = self.ax.get_legend()
+            if legend is not None:
+                legend.remove()
+            if handles:
+                self.ax.legend(handles=handles, fontsize="x-small", loc="upper right",
+                               ncol=2 if len(handles) > 6 else 1)
+
+    def update(self, x, series, n_drawn, x_max):
+        """
+        Atualiza o painel com as séries x/series (arrays). Se os limites mudaram
+        o fundo é redesenhado e guardado; senão é só restaurado do cache.
+        """
+        n = len(x)
+        if n > n_drawn:
+            for key in self.keys:
+                new = series[key][n_drawn:]
+                self.lo = min(self.lo, new.min())
+                self.hi = max(self.hi, new.max())
+            if self.limits is None or self.hi > self.limits[1] or self.lo < self.limits[0]:
+                self.limits = panel_ylim(self.title, self.lo, self.hi)
+                self.background = None
+        if x_max != self.x_max:
+            self.x_max = x_max
+            self.background = None
+
+        if self.background is None:
+            if self.x_max:
+                self.ax.set_xlim(0, self.x_max)
+            if self.limits is not None:
+                self.ax.set_ylim(*self.limits)
+            # Fundo estático (eixos, grade, título, legenda) sem as linhas
+            self.canvas.draw()
+            self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        elif n == n_drawn:
+            return  # Nada mudou: a imagem atual continua válida
+        else:
+            self.canvas.restore_region(self.background)
+
+        for key, line in self.lines:
+            line.set_data(*decimate(x, series[key], LiveGraphs.MAX_POINTS))
+            self.ax.draw_artist(line)
+
+    def surface(self):
+        # A figura é opaca: "RGBX" ignora o alfa e o blit vira uma cópia simples
+        return pygame.image.frombuffer(self.canvas.buffer_rgba(), self.size, "RGBX")
+
+
+class LiveGraphs:
+    """Os seis gráficos da simulação ao vivo, numa grade 3x2."""
+
+    MAX_POINTS = 1000  # Pontos desenhados por linha, independente da duração
+
+    def __init__(self, figsize=(8, 6), dpi=100):
+        panel_size = (figsize[0] / 2, figsize[1] / 3)
+        self.panels = [_Panel(title, keys, colors, y_label, panel_size, dpi)
+                       for title, keys, colors, y_label in GRAPH_PANELS]
+        self.keys = [key for panel in self.panels for key in panel.keys]
+        self.panel_w, self.panel_h = self.panels[0].size
+        self.panels[0].run_legend = True
+        self.surface = pygame.Surface((self.panel_w * 2, self.panel_h * 3))
+        self.reset()
+
+    def reset(self, time_limit=None, bands=None, runs=()):
+        """
+        Prepara os gráficos para uma nova simulação. bands é o resultado de
+        incerteza.trajectory_bands (ou None, sem bandas) e runs as simulações
+        fixadas para comparação (dados.RunStore ou lista de PinnedRun).
+        """
+        self.time_limit = time_limit
+        self.bands = bands
+        self.runs = list(runs)
+        # O eixo de tempo cobre também a simulação fixada mais longa
+        self.runs_x_max = max((run.data.last("time") for run in self.runs if len(run)), default=0.0)
+        self.x_max = max(time_limit or 0, self.runs_x_max) if self.runs else None
+        self.n = 0
+        self.x = np.empty(256)
+        self.y = {key: np.empty(256) for key in self.keys}
+        for panel in self.panels:
+            panel.reset(bands, self.runs)
+
+    def _append(self, time_data, series, n):
+        """Copia os pontos novos para os buffers internos (crescimento geométrico)."""
+        if n > len(self.x):
+            cap = max(n, 2 * len(self.x))
+            self.x = np.resize(self.x, cap)
+            self.y = {key: np.resize(buf, cap) for key, buf in self.y.items()}
+        self.x[self.n:n] = time_data[self.n:n]
+        for key in self.keys:
+            self.y[key][self.n:n] = series[key][self.n:n]
+
+    def update(self, time_data, series):
+        """
+        Desenha os dados atuais e retorna a superfície pygame com os gráficos.
+
+        time_data é a lista (ou array) de tempos e series um dict {chave: lista}
+        com as séries de GRAPH_PANELS. Apenas os pontos adicionados desde a
+        última chamada são copiados; cada painel só redesenha os eixos quando
+        os seus limites mudam.
+        """
+        n = len(time_data)
+        if n < self.n:
+            self.reset(self.time_limit, self.bands, self.runs)
+        n_drawn = self.n
+        if n > n_drawn:
+            self._append(time_data, series, n)
+            last_t = self.x[n - 1]
+            if self.x_max is None or last_t > self.x_max:
+                self.x_max = max(last_t, self.time_limit or 0, self.runs_x_max)
+        self.n = n
+
+        x = self.x[:n]
+        y = {key: buf[:n] for key, buf in self.y.items()}
+        for i, panel in enumerate(self.panels):
+            panel.update(x, y, n_drawn, self.x_max)
+            self.surface.blit(panel.surface(), ((i % 2) * self.panel_w, (i // 2) * self.panel_h))
+        return self.surface
@@ -0,0 +1,404 @@
+"""
+Gráficos ao vivo desenhados diretamente com pygame (sem Matplotlib).
+
+Mesma interface de graficos.LiveGraphs (reset/update) e mesmos seis painéis.
+A camada estática de cada painel (moldura, grade, marcas, textos e legenda) é
+desenhada uma vez e guardada numa superfície; só é refeita quando os limites
+dos eixos mudam. A cada quadro apenas as linhas são desenhadas por cima.
+
+Para séries muito longas os pontos são agregados por coluna de pixel (primeiro,
+mínimo, máximo e último valor de cada coluna, o algoritmo "M4"), de forma
+incremental: cada quadro só processa as amostras novas e a linha desenhada
+tem no máximo 4 pontos por coluna, qualquer que seja o tamanho da série. Os
+pontos em pixels de cada linha também ficam em cache: a cada quadro só são
+refeitos os das colunas que receberam amostras (normalmente a última).
+
+As bandas de incerteza (incerteza.trajectory_bands), quando passadas, são
+desenhadas na camada estática, atrás da grade. As simulações fixadas para
+comparação também: os pontos (M4) de cada uma ficam em cache pelo id da
+simulação e pela escala, e a camada só é refeita quando os eixos mudam.
+"""
+import bisect
+import math
+
+import numpy as np
+import pygame
+
+from graficos import GRAPH_PANELS, SERIES_LABELS, panel_ylim, run_color
+
+# Cores nomeadas usadas em GRAPH_PANELS (equivalentes às do Matplotlib)
+NAMED_COLORS = {
+    "blue": (0, 0, 255),
+    "green": (0, 128, 0),
+    "orange": (255, 165, 0),
+    "deepskyblue": (0, 191, 255),
+    "red": (255, 0, 0),
+    "purple": (128, 0, 128),
+    "brown": (165, 42, 42),
+}
+
+BACKGROUND = (255, 255, 255)
+AXIS_COLOR = (0, 0, 0)
+GRID_COLOR = (200, 200, 200)
+TEXT_COLOR = (0, 0, 0)
+
+
+def nice_ticks(lo, hi, max_ticks=6):
+    """Marcas "redondas" (1, 2, 2.5, 5 x 10^k) entre lo e hi."""
+    span = hi - lo
+    if span <= 0:
+        return [lo]
+    raw = span / max_ticks
+    mag = 10 ** math.floor(math.log10(raw))
+    for mult in (1, 2, 2.5, 5, 10):
+        step = mult * mag
+        if span / step <= max_ticks:
+            break
+    first = math.ceil(lo / step - 1e-9) * step
+    ticks = []
+    v = first
+    while v <= hi + step * 1e-9:
+        ticks.append(round(v, 10))
+        v += step
+    return ticks
+
+
+def format_tick(v):
+    return f"{v:g}"
+
+
+def band_color(color, strength=0.25):
+    """Cor da banda de incerteza: a cor da série clareada em direção ao fundo."""
+    return tuple(int(b + (c - b) * strength) for c, b in zip(color, BACKGROUND))
+
+
+class ColumnAggregator:
+    """
+    Agrega uma série monotônica em x por coluna de pixel (M4).
+
+    Guarda, para cada coluna, o primeiro, o mínimo, o máximo e o último valor.
+    As amostras são adicionadas em ordem crescente de x. dirty é a primeira
+    coluna alterada desde que foi zerado (width: nenhuma).
+    """
+
+    def __init__(self, width):
+        self.width = width
+        self.reset(None)
+
+    def reset(self, x_max):
+        self.x_max = x_max
+        self.first = np.full(self.width, np.nan)
+        self.ymin = np.full(self.width, np.nan)
+        self.ymax = np.full(self.width, np.nan)
+        self.last = np.full(self.width, np.nan)
+        self.dirty = 0
+
+    def add(self, xs, ys):
+        if len(xs) == 0 or not self.x_max:
+            return
+        cols = np.minimum(np.maximum((xs / self.x_max * (self.width - 1)).astype(int), 0), self.width - 1)
+        # xs é crescente: cada coluna começa onde cols muda (sem o sort de np.unique)
+        start = np.flatnonzero(np.diff(cols, prepend=-1))
+        u = cols[start]
+        end = np.append(start[1:], len(ys)) - 1
+        mins = np.minimum.reduceat(ys, start)
+        maxs = np.maximum.reduceat(ys, start)
+
+        new = np.isnan(self.first[u])
+        self.first[u[new]] = ys[start[new]]
+        self.ymin[u] = np.fmin(self.ymin[u], mins)
+        self.ymax[u] = np.fmax(self.ymax[u], maxs)
+        self.last[u] = ys[end]
+        self.dirty = min(self.dirty, int(u[0]))
+
+    def points(self, start=0):
+        """Colunas ocupadas (a partir de start) e os valores (primeiro, mín, máx, último) em sequência."""
+        cols = np.nonzero(~np.isnan(self.first[start:]))[0] + start
+        ys = np.column_stack((self.first[cols], self.ymin[cols], self.ymax[cols], self.last[cols])).ravel()
+        return np.repeat(cols, 4), ys
+
+
+class _NativePanel:
+    """Um painel: camada estática em cache + linhas desenhadas por quadro."""
+
+    MARGIN_LEFT, MARGIN_RIGHT, MARGIN_TOP, MARGIN_BOTTOM = 58, 15, 26, 38
+
+    def __init__(self, title, keys, colors, y_label, surface, fonts):
+        self.title = title
+        self.keys = keys
+        self.colors = [NAMED_COLORS[c] for c in colors]
+        self.y_label = y_label
+        self.surface = surface  # Subsuperfície da grade: desenhar aqui já compõe a imagem final
+        self.size = size = surface.get_size()
+        self.title_font, self.label_font, self.tick_font = fonts
+        w, h = size
+        self.plot_rect = pygame.Rect(self.MARGIN_LEFT, self.MARGIN_TOP,
+                                     w - self.MARGIN_LEFT - self.MARGIN_RIGHT,
+                                     h - self.MARGIN_TOP - self.MARGIN_BOTTOM)
+        self.aggregators = {key: ColumnAggregator(self.plot_rect.width) for key in keys}
+        self.run_points = {}     # id da simulação fixada -> ((x_max, limites), [pontos por série])
+        self.run_legend = False  # O painel que mostra a legenda das simulações fixadas
+        self.line_points = {}    # série -> (limites, pontos em pixels, x de cada ponto)
+        self.reset()
+
+    def reset(self, bands=None, runs=()):
+        self.lo = np.inf
+        self.hi = -np.inf
+        self.runs = list(runs)
+        ids = {run.id for run in self.runs}
+        self.run_points = {run_id: points for run_id, points in self.run_points.items() if run_id in ids}
+        for run in self.runs:
+            data = run.data
+            for key in self.keys:
+                self.lo = min(self.lo, data[key].min())
+                self.hi = max(self.hi, data[key].max())
+        self.bands = []
+        if bands is not None:
+            # Banda entre o primeiro e o último percentil; entra nos limites do eixo
+            for key, color in zip(self.keys, self.colors):
+                low, high = bands[key][0], bands[key][-1]
+                self.bands.append((band_color(color), bands["time"], low, high))
+                self.lo = min(self.lo, low.min())
+                self.hi = max(self.hi, high.max())
+        self.limits = panel_ylim(self.title, self.lo, self.hi) or (0.0, 1.0)
+        self.x_max = None
+        self.static = None
+        for agg in self.aggregators.values():
+            agg.reset(None)
+
+    def _build_static(self):
+        """Desenha moldura, grade, marcas, textos e legenda (uma vez por escala)."""
+        surf = pygame.Surface(self.size)
+        surf.fill(BACKGROUND)
+        r = self.plot_rect
+        x_max = self.x_max or 1.0
+        y0, y1 = self.limits
+
+        surf.set_clip(r)
+        for color, times, low, high in self.bands:
+            px = r.left + (times / x_max * (r.width - 1)).astype(int)
+            upper = np.column_stack((px, [self._to_py(v) for v in high]))
+            lower = np.column_stack((px, [self._to_py(v) for v in low]))[::-1]
+            pygame.draw.polygon(surf, color, np.concatenate((upper, lower)).tolist())
+        surf.set_clip(None)
+
+        for v in nice_ticks(0.0, x_max):
+            px = r.left + int((v / x_max) * (r.width - 1))
+            self._dashed_vline(surf, px, r.top, r.bottom)
+            pygame.draw.line(surf, AXIS_COLOR, (px, r.bottom), (px, r.bottom + 3))
+            txt = self.tick_font.render(format_tick(v), True, TEXT_COLOR)
+            surf.blit(txt, (px - txt.get_width() // 2, r.bottom + 4))
+
+        for v in nice_ticks(y0, y1, 5):
+            py = self._to_py(v)
+            self._dashed_hline(surf, r.left, r.right, py)
+            pygame.draw.line(surf, AXIS_COLOR, (r.left - 3, py), (r.left, py))
+            txt = self.tick_font.render(format_tick(v), True, TEXT_COLOR)
+            surf.blit(txt, (r.left - 5 - txt.get_width(), py - txt.get_height() // 2))
+
+        # Simulações fixadas por cima da grade, abaixo da moldura
+        surf.set_clip(r)
+        for i, run in enumerate(self.runs):
+            for j, points in enumerate(self._run_points(run)):
+                if len(points) > 1:
+                    pygame.draw.lines(surf, run_color(i, j), False, points, 1)
+        surf.set_clip(None)
+
+        pygame.draw.rect(surf, AXIS_COLOR, r, 1)
+
+        title = self.title_font.render(self.title, True, TEXT_COLOR)
+        surf.blit(title, (r.centerx - title.get_width() // 2, 4))
+        x_label = self.label_font.render("Tempo (min)", True, TEXT_COLOR)
+        surf.blit(x_label, (r.centerx - x_label.get_width() // 2, self.size[1] - x_label.get_height() - 3))
+        y_label = pygame.transform.rotate(self.label_font.render(self.y_label, True, TEXT_COLOR), 90)
+        surf.blit(y_label, (4, r.centery - y_label.get_height() // 2))
+
+        if len(self.keys) > 1:
+            self._draw_legend(surf)
+        if self.run_legend and self.runs:
+            self._draw_run_legend(surf)
+        self.static = surf
+
+    def _run_points(self, run):
+        """Polilinhas (em pixels) de uma simulação fixada, em cache até a escala mudar."""
+        scale = (self.x_max, self.limits)
+        cached = self.run_points.get(run.id)
+        if cached is not None and cached[0] == scale:
+            return cached[1]
+        data = run.data
+        aggregator = ColumnAggregator(self.plot_rect.width)
+        lines = []
+        for key in self.keys:
+            aggregator.reset(self.x_max or 1.0)
+            aggregator.add(data["time"], data[key])
+            lines.append(self._polyline(*aggregator.points()))
+        self.run_points[run.id] = (scale, lines)
+        return lines
+
+    def _draw_run_legend(self, surf):
+        """Legenda das simulações fixadas (até 8 por coluna) no canto superior direito."""
+        labels = [self.tick_font.render(run.label, True, TEXT_COLOR) for run in self.runs]
+        rows = min(len(labels), 8)
+        columns = -(-len(labels) // rows)
+        line_h = max(l.get_height() for l in labels)
+        col_w = 22 + max(l.get_width() for l in labels) + 6
+        box = pygame.Rect(0, 0, col_w * columns + 4, line_h * rows + 6)
+        box.topright = (self.plot_rect.right - 4, self.plot_rect.top + 4)
+        pygame.draw.rect(surf, BACKGROUND, box)
+        pygame.draw.rect(surf, GRID_COLOR, box, 1, border_radius=3)
+        for i, label in enumerate(labels):
+            x = box.left + 4 + (i // rows) * col_w
+            y = box.top + 3 + (i % rows) * line_h
+            pygame.draw.line(surf, run_color(i), (x, y + line_h // 2), (x + 16, y + line_h // 2), 2)
+            surf.blit(label, (x + 22, y))
+
+    def _draw_legend(self, surf):
+        labels = [self.label_font.render(SERIES_LABELS[k], True, TEXT_COLOR) for k in self.keys]
+        line_h = max(l.get_height() for l in labels) + 2
+        box_w = 30 + max(l.get_width() for l in labels) + 8
+        box = pygame.Rect(self.plot_rect.right - box_w - 4, self.plot_rect.top + 4, box_w, line_h * len(labels) + 6)
+        pygame.draw.rect(surf, BACKGROUND, box)
+        pygame.draw.rect(surf, GRID_COLOR, box, 1, border_radius=3)
+        for i, (label, color) in enumerate(zip(labels, self.colors)):
+            y = box.top + 3 + i * line_h
+            pygame.draw.line(surf, color, (box.left + 5, y + line_h // 2), (box.left + 25, y + line_h // 2), 2)
+            surf.blit(label, (box.left + 30, y))
+
+    def _dashed_hline(self, surf, x0, x1, y, dash=4, gap=3):
+        for x in range(x0, x1, dash + gap):
+            pygame.draw.line(surf, GRID_COLOR, (x, y), (min(x + dash, x1), y))
+
+    def _dashed_vline(self, surf, x, y0, y1, dash=4, gap=3):
+        for y in range(y0, y1, dash + gap):
+            pygame.draw.line(surf, GRID_COLOR, (x, y), (x, min(y + dash, y1)))
+
+    def _to_py(self, v):
+        y0, y1 = self.limits
+        r = self.plot_rect
+        return r.bottom - 1 - int((v - y0) / (y1 - y0) * (r.height - 1))
+
+    def update(self, time_data, series, n_drawn, n, x_max):
+        """Agrega as amostras novas e redesenha o painel se algo mudou."""
+        if x_max != self.x_max:
+            # Mudou a escala de x: reagrega tudo (raro: início e fim da simulação)
+            self.x_max = x_max
+            self.static = None
+            n_drawn = 0
+            for agg in self.aggregators.values():
+                agg.reset(x_max)
+        if n > n_drawn:
+            xs = np.asarray(time_data[n_drawn:n], dtype=float)
+            for key in self.keys:
+                ys = np.asarray(series[key][n_drawn:n], dtype=float)
+                self.aggregators[key].add(xs, ys)
+                self.lo = min(self.lo, ys.min())
+                self.hi = max(self.hi, ys.max())
+            if self.hi > self.limits[1] or self.lo < self.limits[0] or self.static is None:
+                self.limits = panel_ylim(self.title, self.lo, self.hi) or self.limits
+                self.static = None
+        elif self.static is not None:
+            return  # Nada mudou
+
+        # Com a mesma camada estática, o quadro anterior continua na superfície:
+        # só os trechos novos das linhas são desenhados por cima. Numa coluna
+        # o mínimo e o máximo só se afastam, então o trecho novo cobre o antigo.
+        redraw = self.static is None
+        if redraw:
+            self._build_static()
+            self.surface.blit(self.static, (0, 0))
+
+        self.surface.set_clip(self.plot_rect)
+        for key, color in zip(self.keys, self.colors):
+            points, changed = self._line(key)
+            # Desde o último ponto que não mudou, para ligar o trecho novo à linha
+            first = 0 if redraw else max(changed - 1, 0)
+            if len(points) - first > 1:
+                pygame.draw.lines(self.surface, color, False, points[first:], 2)
+        self.surface.set_clip(None)
+
+    def _line(self, key):
+        """
+        Pontos em pixels da série key e o índice do primeiro que mudou desde
+        o último quadro. Em cache: só as colunas a partir da primeira alterada
+        são refeitas.
+        """
+        agg = self.aggregators[key]
+        cached = self.line_points.get(key)
+        start = agg.dirty if cached is not None and cached[0] == self.limits else 0
+        agg.dirty = agg.width
+        if cached is not None and start >= agg.width:
+            return cached[1], len(cached[1])
+        if start == 0:
+            points, xs, keep = [], [], 0
+        else:
+            # Os pontos em x são crescentes: corta a partir da coluna start
+            _, points, xs = cached
+            keep = bisect.bisect_left(xs, self.plot_rect.left + start)
+            del points[keep:], xs[keep:]
+        tail = self._polyline(*agg.points(start))
+        points.extend(tail)
+        xs.extend(x for x, _ in tail)
+        self.line_points[key] = (self.limits, points, xs)
+        return points, keep
+
+    def _polyline(self, cols, ys):
+        """Colunas e valores agregados -> lista de pontos em pixels, sem pontos repetidos."""
+        if len(cols) < 2:
+            return []
+        r = self.plot_rect
+        y0, y1 = self.limits
+        px = r.left + cols
+        py = r.bottom - 1 - ((ys - y0) / (y1 - y0) * (r.height - 1)).astype(int)
+        # Remove pontos repetidos (mesmo pixel) antes de converter para pygame
+        keep = np.ones(len(px), dtype=bool)
+        keep[1:] = (px[1:] != px[:-1]) | (py[1:] != py[:-1])
+        return np.column_stack((px[keep], py[keep])).tolist()
+
+
+class NativeGraphs:
+    """Os seis gráficos da simulação ao vivo desenhados com pygame."""
+
+    def __init__(self, size=(800, 600)):
+        fonts = (pygame.font.SysFont("Arial", 14), pygame.font.SysFont("Arial", 11),
+                 pygame.font.SysFont("Arial", 12))
+        self.surface = pygame.Surface(size)
+        w, h = size[0] // 2, size[1] // 3
+        self.panels = [
+            _NativePanel(title, keys, colors, y_label,
+                         self.surface.subsurface(((i % 2) * w, (i // 2) * h, w, h)), fonts)
+            for i, (title, keys, colors, y_label) in enumerate(GRAPH_PANELS)
+        ]
+        self.panels[0].run_legend = True
+        self.reset()
+
+    def reset(self, time_limit=None, bands=None, runs=()):
+        """
+        Prepara os gráficos para uma nova simulação. bands é o resultado de
+        incerteza.trajectory_bands (ou None, sem bandas) e runs as simulações
+        fixadas para comparação (dados.RunStore ou lista de PinnedRun).
+        """
+        self.time_limit = time_limit
+        self.bands = bands
+        self.runs = list(runs)
+        # O eixo de tempo cobre também a simulação fixada mais longa
+        runs_x_max = max((run.data.last("time") for run in self.runs), default=0.0)
+        self.x_max = max(time_limit or 0, runs_x_max) or time_limit
+        self.n = 0
+        for panel in self.panels:
+            panel.reset(bands, self.runs)
+
+    def update(self, time_data, series):
+        """
+        Desenha os dados atuais e retorna a superfície pygame com os gráficos.
+        Mesma convenção de graficos.LiveGraphs.update.
+        """
+        n = len(time_data)
+        if n < self.n:
+            self.reset(self.time_limit, self.bands, self.runs)
+        if n > 0 and (self.x_max is None or time_data[n - 1] > self.x_max):
+            self.x_max = max(time_data[n - 1], self.time_limit or 0)
+
+        for panel in self.panels:
+            panel.update(time_data, series, self.n, n, self.x_max)
+        self.n = n
+        return self.surface
@@ -0,0 +1,339 @@
+"""
+Incerteza das constantes biológicas do modelo (Monte Carlo) e análise de
+sensibilidade global (índices de Sobol).
+
+As constantes de modelo.py (rendimentos, taxas, Monod, inibição pelo sal e as
+larguras da curva de temperatura) são estimativas pontuais. Aqui cada uma vira
+uma distribuição (UNCERTAIN_CONSTANTS, configurável) e o modelo vetorizado é
+avaliado com milhares de amostras de uma vez: as constantes entram como arrays
+em update_simulation_batch(constants=...). Conjuntos grandes (10⁵–10⁶
+avaliações) são processados em blocos, opcionalmente em um pool de processos;
+cada bloco tem a sua semente derivada da posição, então o resultado não
+depende do número de processos.
+
+Exemplos:
+    python incerteza.py --amostras 200000
+    python incerteza.py --sobol 50000 --processos 4 --receita temp=25 --receita time_limit=480
+    python incerteza.py --dist K_s_sugar=uniforme:5:20 --amostras 100000
+"""
+import argparse
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from modelo import (RECIPE_PARAMS, PARAM_NAMES, DEFAULT_PARAMS, SIMULATION_OUTPUTS, FEEDBACK_LEVELS,
+                    model_constants, update_simulation_batch, classify_prediction)
+from varredura import parse_fixed
+
+DEFAULT_CHUNK_SIZE = 50_000
+DEFAULT_PERCENTILES = (5, 50, 95)
+
+# Tipos de distribuição e os seus parâmetros:
+#   ("normal", média, desvio)           ("lognormal", mediana, desvio do log)
+#   ("uniforme", mínimo, máximo)        ("triangular", mínimo, moda, máximo)
+DISTRIBUTIONS = {"normal": 2, "lognormal": 2, "uniforme": 2, "triangular": 3}
+
+
+def _default_distributions():
+    c = model_constants()
+    return {
+        "Y_X_S": ("uniforme", c["Y_X_S"] * 0.9, c["Y_X_S"] * 1.1),
+        "Y_E_S": ("uniforme", c["Y_E_S"] * 0.9, c["Y_E_S"] * 1.1),
+        "K_PROD_MALTOSE": ("lognormal", c["K_PROD_MALTOSE"], 0.2),
+        "K_CONS_SUCROSE": ("lognormal", c["K_CONS_SUCROSE"], 0.2),
+        "K_CONS_MALTOSE": ("lognormal", c["K_CONS_MALTOSE"], 0.2),
+        "K_s_sugar": ("lognormal", c["K_s_sugar"], 0.3),
+        "salt_k_inhib": ("triangular", c["salt_k_inhib"] * 0.8, c["salt_k_inhib"], c["salt_k_inhib"] * 1.2),
+        "YEAST_GROWTH_RATE": ("lognormal", c["YEAST_GROWTH_RATE"], 0.15),
+        "TEMP_WIDTH_LOW": ("normal", c["TEMP_WIDTH_LOW"], 1.5),
+        "TEMP_WIDTH_HIGH": ("normal", c["TEMP_WIDTH_HIGH"], 1.0),
+    }
+
+
+# Distribuição padrão de cada constante incerta (centrada no valor atual do modelo)
+UNCERTAIN_CONSTANTS = _default_distributions()
+
+
+def validate_distributions(distributions):
+    """Confere nomes e tipos; retorna o dict (na ordem dada)."""
+    known = model_constants()
+    for name, spec in distributions.items():
+        if name not in known:
+            raise ValueError(f"Constante desconhecida: {name}")
+        kind, *args = spec
+        if DISTRIBUTIONS.get(kind) != len(args):
+            raise ValueError(f"Distribuição inválida para {name}: {spec}")
+    return distributions
+
+
+def sample_constants(n, distributions=None, rng=None):
+    """
+    Sorteia n valores de cada constante. Retorna {nome: array (n,)}.
+    Valores não positivos (caudas da normal) são truncados em 1% da média,
+    já que nenhuma dessas constantes pode ser zero ou negativa.
+    """
+    distributions = UNCERTAIN_CONSTANTS if distributions is None else distributions
+    rng = rng if rng is not None else np.random.default_rng()
+    samples = {}
+    for name, (kind, *args) in distributions.items():
+        if kind == "normal":
+            values = rng.normal(args[0], args[1], n)
+            values = np.maximum(values, 0.01 * args[0])
+        elif kind == "lognormal":
+            values = rng.lognormal(np.log(args[0]), args[1], n)
+        elif kind == "uniforme":
+            values = rng.uniform(args[0], args[1], n)
+        else:
+            values = rng.triangular(args[0], args[1], args[2], n)
+        samples[name] = values
+    return samples
+
+
+def _recipe(params):
+    farina_g, water, temp, sugar_added, salt_g, time_limit = (float(v) for v in params)
+    return farina_g, water, temp, sugar_added, salt_g, time_limit
+
+
+def evaluate_final(params, constants):
+    """
+    Estado final de uma receita para um conjunto de amostras das constantes
+    ({nome: array (k,)}). Retorna {saída: array (k,)} mais "level".
+    """
+    farina_g, water, temp, sugar_added, salt_g, time_limit = _recipe(params)
+    k = len(next(iter(constants.values())))
+    out = update_simulation_batch(time_limit, temp, sugar_added, water, farina_g, salt_g, constants)
+    out = {name: np.broadcast_to(values, k) for name, values in out.items()}
+    out["level"] = classify_prediction(farina_g, out["ph"], out["volume"], out["retention"])
+    return out
+
+
+# --------- Execução em blocos ----------
+
+def _chunks(n, chunk_size):
+    return [(s, min(s + chunk_size, n)) for s in range(0, n, chunk_size)]
+
+
+def _run_chunks(func, tasks, processes):
+    """
+    Aplica func a cada tarefa, em ordem. Com processes > 1 usa um pool com no
+    máximo 2 tarefas por processo em espera (como varredura.run_sweep).
+    """
+    if processes == 1:
+        for task in tasks:
+            yield func(task)
+        return
+    with ProcessPoolExecutor(processes) as pool:
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.submit(func, task))
+            if len(pending) >= 2 * processes:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _monte_carlo_task(task):
+    params, distributions, seed, start, stop = task
+    rng = np.random.default_rng([seed, start])
+    return evaluate_final(params, sample_constants(stop - start, distributions, rng))
+
+
+def monte_carlo(params, n=100_000, distributions=None, seed=0, percentiles=DEFAULT_PERCENTILES,
+                chunk_size=DEFAULT_CHUNK_SIZE, processes=1):
+    """
+    Propaga a incerteza das constantes até o estado final de uma receita.
+
+    params está na ordem dos sliders. Retorna um dict com "n", "percentiles",
+    {saída: array com os percentis}, "mean" e "std" ({saída: valor}) e
+    "level_fraction" ({nível: fração das amostras}, ver FEEDBACK_LEVELS).
+    """
+    distributions = validate_distributions(UNCERTAIN_CONSTANTS if distributions is None else distributions)
+    processes = processes or os.cpu_count() or 1
+    tasks = [(list(params), distributions, seed, start, stop) for start, stop in _chunks(n, chunk_size)]
+    parts = list(_run_chunks(_monte_carlo_task, tasks, processes))
+
+    result = {"n": n, "percentiles": tuple(percentiles), "mean": {}, "std": {}}
+    for name in SIMULATION_OUTPUTS:
+        values = np.concatenate([part[name] for part in parts])
+        result[name] = np.percentile(values, percentiles)
+        result["mean"][name] = float(values.mean())
+        result["std"][name] = float(values.std())
+    counts = np.bincount(np.concatenate([part["level"] for part in parts]), minlength=len(FEEDBACK_LEVELS))
+    result["level_fraction"] = {level: float(count / n) for level, count in zip(FEEDBACK_LEVELS, counts)}
+    return result
+
+
+def prediction_ranges(params, n=2000, distributions=None, seed=0, percentiles=(5, 95)):
+    """
+    Faixas (mínimo, máximo) de pH, volume e retenção finais para o painel de
+    previsão. Poucas amostras (n) bastam para os percentis 5 e 95.
+    """
+    distributions = UNCERTAIN_CONSTANTS if distributions is None else distributions
+    out = evaluate_final(params, sample_constants(n, distributions, np.random.default_rng(seed)))
+    return {name: tuple(np.percentile(out[name], percentiles)) for name in ("ph", "volume", "retention")}
+
+
+def trajectory_bands(params, n=400, points=120, distributions=None, seed=0, percentiles=DEFAULT_PERCENTILES):
+    """
+    Bandas de percentis das 8 séries ao longo do tempo para uma receita.
+
+    Avalia n amostras das constantes em points instantes igualmente espaçados
+    até o tempo final, numa única chamada ((n, 1) x (points,)). Retorna
+    {"time": array (points,), "percentiles": ..., saída: array (len(percentiles), points)}.
+    """
+    distributions = UNCERTAIN_CONSTANTS if distributions is None else distributions
+    farina_g, water, temp, sugar_added, salt_g, time_limit = _recipe(params)
+    times = time_limit * np.linspace(1.0 / points, 1.0, points)
+    constants = {name: values[:, None]
+                 for name, values in sample_constants(n, distributions, np.random.default_rng(seed)).items()}
+    out = update_simulation_batch(times, temp, sugar_added, water, farina_g, salt_g, constants)
+    bands = {"time": times, "percentiles": tuple(percentiles)}
+    for name in SIMULATION_OUTPUTS:
+        bands[name] = np.percentile(np.broadcast_to(out[name], (n, points)), percentiles, axis=0)
+    return bands
+
+
+# --------- Sensibilidade global (Sobol) ----------
+
+def _sobol_task(task):
+    """
+    Um bloco do esquema de Saltelli: matrizes A e B (k amostras) e as d
+    matrizes AB_i (A com a coluna i de B), avaliadas numa única chamada de
+    k * (d + 2) pontos. Retorna somas parciais, combináveis entre blocos.
+    As saídas são centradas no valor nominal (shift) antes das somas, para
+    não perder precisão quando a variância é pequena perto da média (pH).
+    """
+    params, distributions, shift, seed, start, stop = task
+    k = stop - start
+    names = list(distributions)
+    d = len(names)
+    rng = np.random.default_rng([seed, start])
+    a = sample_constants(k, distributions, rng)
+    b = sample_constants(k, distributions, rng)
+
+    constants = {}
+    for j, name in enumerate(names):
+        # Blocos: A, B, AB_0, ..., AB_{d-1}; em AB_i só a coluna i vem de B
+        columns = [a[name], b[name]] + [b[name] if i == j else a[name] for i in range(d)]
+        constants[name] = np.concatenate(columns)
+    out = evaluate_final(params, constants)
+
+    sums = {}
+    for name in SIMULATION_OUTPUTS:
+        f = out[name].reshape(d + 2, k) - shift[name]
+        f_a, f_b, f_ab = f[0], f[1], f[2:]
+        sums[name] = {
+            "sum": f_a.sum() + f_b.sum(),
+            "sum_sq": (f_a**2).sum() + (f_b**2).sum(),
+            "first": (f_b * (f_ab - f_a)).sum(axis=1),     # Saltelli (2010)
+            "total": ((f_a - f_ab)**2).sum(axis=1) / 2.0,  # Jansen (1999)
+        }
+    return sums
+
+
+def sobol_indices(params, n=20_000, distributions=None, seed=0, chunk_size=5_000, processes=1):
+    """
+    Índices de Sobol de primeira ordem e totais de cada constante incerta,
+    para cada saída no tempo final da receita params.
+
+    Custo: n * (d + 2) avaliações do modelo (d = número de constantes).
+    Retorna {"n", "evaluations", "constants": nomes, saída: {"first": {nome: S},
+    "total": {nome: ST}, "variance": V}}. Saídas sem variância (ex.: sacarose
+    já esgotada em todas as amostras) ficam com índices zero.
+    """
+    distributions = validate_distributions(UNCERTAIN_CONSTANTS if distributions is None else distributions)
+    processes = processes or os.cpu_count() or 1
+    names = list(distributions)
+    nominal = evaluate_final(params, {names[0]: np.array([model_constants()[names[0]]])})
+    shift = {name: float(nominal[name][0]) for name in SIMULATION_OUTPUTS}
+    tasks = [(list(params), distributions, shift, seed, start, stop) for start, stop in _chunks(n, chunk_size)]
+
+    totals = None
+    for sums in _run_chunks(_sobol_task, tasks, processes):
+        if totals is None:
+            totals = sums
+        else:
+            for name in SIMULATION_OUTPUTS:
+                for key, value in sums[name].items():
+                    totals[name][key] = totals[name][key] + value
+
+    result = {"n": n, "evaluations": n * (len(names) + 2), "constants": names}
+    for name in SIMULATION_OUTPUTS:
+        t = totals[name]
+        mean = t["sum"] / (2 * n)
+        variance = max(0.0, t["sum_sq"] / (2 * n) - mean**2)
+        if variance <= 1e-12 * max(1.0, mean**2):
+            first = total = np.zeros(len(names))
+        else:
+            first = t["first"] / n / variance
+            total = t["total"] / n / variance
+        result[name] = {
+            "first": dict(zip(names, first.tolist())),
+            "total": dict(zip(names, total.tolist())),
+            "variance": variance,
+        }
+    return result
+
+
+# --------- Linha de comando ----------
+
+def parse_distribution(item):
+    """Converte "NOME=tipo:a:b[:c]" em (nome, (tipo, a, b[, c]))."""
+    name, _, spec = item.partition("=")
+    kind, *args = spec.split(":")
+    try:
+        return name.strip(), (kind.strip(), *(float(a) for a in args))
+    except ValueError:
+        raise ValueError(f"Distribuição inválida: {item}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Incerteza das constantes do modelo e índices de Sobol")
+    parser.add_argument("--receita", action="append", metavar="NOME=VALOR",
+                        help="Parâmetro da receita (padrão: valores iniciais dos sliders)")
+    parser.add_argument("--dist", action="append", metavar="NOME=TIPO:A:B[:C]",
+                        help="Troca a distribuição de uma constante (tipos: " + ", ".join(DISTRIBUTIONS) + ")")
+    parser.add_argument("--amostras", type=int, default=100_000, help="Amostras de Monte Carlo")
+    parser.add_argument("--sobol", type=int, default=0, metavar="N",
+                        help="Calcula os índices de Sobol com N amostras base (N * (d + 2) avaliações)")
+    parser.add_argument("--processos", type=int, default=1, help="Processos (0 = todos os núcleos)")
+    parser.add_argument("--semente", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    try:
+        recipe = parse_fixed(args.receita)
+        unknown = set(recipe) - set(PARAM_NAMES)
+        if unknown:
+            raise ValueError(f"Parâmetros desconhecidos: {', '.join(sorted(unknown))}")
+        params = [recipe.get(name, default) for name, default in zip(PARAM_NAMES, DEFAULT_PARAMS)]
+        distributions = dict(UNCERTAIN_CONSTANTS)
+        distributions.update(parse_distribution(item) for item in args.dist or [])
+        validate_distributions(distributions)
+    except ValueError as e:
+        sys.exit(f"Erro: {e}")
+
+    for (_, _, _, _, label), value in zip(RECIPE_PARAMS, params):
+        print(f"{label}: {value:g}")
+
+    mc = monte_carlo(params, args.amostras, distributions, args.semente, processes=args.processos)
+    header = "  ".join(f"p{p:g}" for p in mc["percentiles"])
+    print(f"\nMonte Carlo ({mc['n']} amostras) — {header}")
+    for name in SIMULATION_OUTPUTS:
+        print(f"  {name:10s} " + "  ".join(f"{v:10.4g}" for v in mc[name]))
+    print("  Nível: " + ", ".join(f"{level} {frac:.1%}" for level, frac in mc["level_fraction"].items()))
+
+    if args.sobol:
+        sobol = sobol_indices(params, args.sobol, distributions, args.semente, processes=args.processos)
+        print(f"\nÍndices de Sobol ({sobol['evaluations']} avaliações) — primeira ordem / total")
+        width = max(len(name) for name in sobol["constants"])
+        for output in ("volume", "ph", "retention", "co2", "etoh"):
+            print(f"  {output}:")
+            for name in sobol["constants"]:
+                print(f"    {name:{width}s}  {sobol[output]['first'][name]:6.3f} / {sobol[output]['total'][name]:6.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,501 @@
+"""
+Modelo cinético da fermentação do pão (núcleo sem interface).
+
+Este módulo não importa pygame nem matplotlib e não tem efeitos colaterais ao
+ser importado, podendo ser usado em scripts, testes e processamento em lote.
+A interface gráfica (simulador.py) e a linha de comando (cli.py) usam estas funções.
+"""
+import hashlib
+import json
+from functools import lru_cache
+
+import numpy as np
+
+# --------- Constantes Científicas ----------
+YEAST_GROWTH_RATE = 0.4  # h⁻¹ (Taxa de crescimento base da levedura)
+
+# Rendimentos (g produto / g açúcar)
+Y_X_S = 0.1; Y_E_S = 0.45; Y_C_S = 0.45
+MALT_FROM_STARCH = 0.05
+K_PROD_MALTOSE = 0.3; K_CONS_SUCROSE = 0.8; K_CONS_MALTOSE = 0.5
+N0 = 0.5  # Biomassa inicial
+K_s_sugar = 10.0  # Constante de Monod para o açúcar
+salt_k_inhib = 23.0  # Inibição exponencial pelo sal
+
+# Fator de temperatura (gaussiana assimétrica)
+OPTIMAL_TEMP = 30.0; TEMP_WIDTH_LOW = 15.0; TEMP_WIDTH_HIGH = 7.0
+
+# Constantes que definem o modelo (usadas no hash que invalida caches em disco).
+# MODEL_VERSION deve ser incrementado sempre que as equações mudarem.
+MODEL_VERSION = 1
+MODEL_CONSTANT_NAMES = (
+    "YEAST_GROWTH_RATE", "Y_X_S", "Y_E_S", "Y_C_S", "MALT_FROM_STARCH",
+    "K_PROD_MALTOSE", "K_CONS_SUCROSE", "K_CONS_MALTOSE", "N0", "K_s_sugar",
+    "salt_k_inhib", "OPTIMAL_TEMP", "TEMP_WIDTH_LOW", "TEMP_WIDTH_HIGH",
+)
+
+# Nomes das 8 saídas do modelo, na ordem retornada por update_simulation
+SIMULATION_OUTPUTS = ("biom", "sucrose", "maltose", "co2", "volume", "ph", "etoh", "retention")
+
+# --------- Parâmetros da receita (mesma ordem dos sliders) ----------
+# (nome, mínimo, máximo, padrão, rótulo)
+RECIPE_PARAMS = (
+    ("farina_g", 50, 1000, 1000, "Farinha (g)"),
+    ("water", 0.3, 0.9, 0.68, "Água (fração)"),
+    ("temp", 15, 40, 30, "Temperatura (°C)"),
+    ("sugar_added", 0, 100, 20, "Açúcar (g)"),
+    ("salt_g", 0, 30, 15, "Sal (g)"),
+    ("time_limit", 30, 1440, 240, "Tempo (min)"),
+)
+PARAM_NAMES = tuple(p[0] for p in RECIPE_PARAMS)
+DEFAULT_PARAMS = [float(p[3]) for p in RECIPE_PARAMS]
+
+# --------- Regras do feedback de previsão ----------
+PH_DANGER = 4.1          # pH final abaixo disto: massa ácida
+RETENTION_DANGER = 60.0  # Retenção de glúten (%) abaixo disto: glúten degradado
+GOOD_RISE = 2.2          # Volume final acima de 2.2x o volume base: bom crescimento
+OK_RISE = 1.7            # Volume final acima de 1.7x o volume base: crescimento moderado
+
+# Níveis do feedback (chaves da paleta da interface) e as mensagens de cada um
+FEEDBACK_LEVELS = ("error", "success", "primary", "warning")
+FEEDBACK_MESSAGES = {
+    "error": "Aviso: Risco de massa ácida e glúten degradado.",
+    "success": "Bom Volume final: Parâmetros parecem equilibrados.",
+    "primary": "OK: Fermentação moderada.",
+    "warning": "Crescimento Lento: Verifique sal, temperatura ou tempo.",
+}
+
+
+def model_constants(overrides=None):
+    """
+    Dict {nome: valor} com as constantes atuais do modelo. overrides troca
+    algumas delas (ex.: arrays de amostras na análise de incerteza).
+    """
+    constants = {name: globals()[name] for name in MODEL_CONSTANT_NAMES}
+    if overrides:
+        unknown = set(overrides) - set(constants)
+        if unknown:
+            raise ValueError(f"Constantes desconhecidas: {', '.join(sorted(unknown))}")
+        constants.update(overrides)
+    return constants
+
+
+def model_hash():
+    """Hash curto (hex) da versão e das constantes do modelo, para invalidar resultados salvos."""
+    payload = json.dumps({"version": MODEL_VERSION, "constants": model_constants()}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def update_simulation(t, temp, sugar_added, water, farina_g, salt_g, constants=None):
+    """
+    Modelo de simulação "state-at-time-t" com consumo sequencial E cálculo de glúten.
+
+    Versão escalar de update_simulation_batch (mesmas equações e constantes).
+    Retorna as 8 saídas, na ordem de SIMULATION_OUTPUTS, como floats.
+    """
+    out = update_simulation_batch(t, temp, sugar_added, water, farina_g, salt_g, constants)
+    return tuple(float(out[name]) for name in SIMULATION_OUTPUTS)
+
+
+def environment_factor(temp, water, farina_g, salt_g, constants=None):
+    """
+    Fator ambiental (temperatura x água x sal) que multiplica todas as taxas,
+    vetorizado. Retorna (env_factor, salt_percentage).
+    """
+    c = model_constants(constants)
+    width = np.where(temp < c["OPTIMAL_TEMP"], c["TEMP_WIDTH_LOW"], c["TEMP_WIDTH_HIGH"])
+    temp_factor = np.maximum(0.01, np.exp(-0.5 * ((temp - c["OPTIMAL_TEMP"]) / width)**2))
+
+    water_factor = np.maximum(0.01, 1.0 - np.abs(water - 0.68) * 0.8)
+
+    salt_percentage = salt_g / (farina_g + 1)
+    salt_factor = np.maximum(0.01, np.exp(-c["salt_k_inhib"] * salt_percentage))
+
+    return temp_factor * water_factor * salt_factor, salt_percentage
+
+
+def outputs_from_state(t, biom, sucrose, maltose, sugar_added, water, farina_g, salt_g, constants=None):
+    """
+    As 8 saídas do modelo a partir do estado biológico (biomassa, sacarose e
+    maltose) no tempo t (min): CO₂ e etanol saem do açúcar consumido pela
+    biomassa; volume, pH e retenção de glúten são funções do estado e de t.
+    Usado pelo modelo fechado (update_simulation_batch) e pelo modo dinâmico.
+    """
+    c = model_constants(constants)
+    Y_X_S, Y_E_S, Y_C_S = c["Y_X_S"], c["Y_E_S"], c["Y_C_S"]
+    total_sugar_potential = sugar_added + farina_g * c["MALT_FROM_STARCH"]
+    total_sugar_consumed = np.minimum(total_sugar_potential, (biom - c["N0"]) / Y_X_S)
+
+    sugar_for_fermentation = total_sugar_consumed * (Y_C_S + Y_E_S)
+    co2 = sugar_for_fermentation * (Y_C_S / (Y_C_S + Y_E_S))
+    etanol = sugar_for_fermentation * (Y_E_S / (Y_C_S + Y_E_S))
+
+    volume = farina_g * 0.8 + co2 * 300 * (1 - np.exp(-t/180.0))
+
+    acid_production = 0.015 * biom * (1 - np.exp(-t/120.0))
+    ph = np.maximum(3.8, 5.6 - acid_production)
+
+    # --- Retenção de Glúten ---
+    # Começa em 100%: bônus/pênalti de +/- 10% pelo sal (ótimo em 2%), pênalti por
+    # se afastar de 70% de água, pela acidez (pH abaixo de 4.5) e pelo etanol;
+    # limitada entre 5% e 98%
+    salt_percentage = salt_g / (farina_g + 1)
+    retention = (100.0 + (np.exp(-0.5 * ((salt_percentage - 0.02) / 0.01)**2) - 0.5) * 20
+                 - np.abs(water - 0.70) * 30
+                 - np.maximum(0, (4.5 - ph)) * 40
+                 - (etanol / (farina_g + 1)) * 300)
+    retention = np.clip(retention, 5.0, 98.0)
+
+    values = (biom, sucrose, maltose, co2, volume, ph, etanol, retention)
+    return dict(zip(SIMULATION_OUTPUTS, values))
+
+
+def update_simulation_batch(t, temp, sugar_added, water, farina_g, salt_g, constants=None):
+    """
+    Versão vetorizada de update_simulation.
+
+    Aceita escalares ou arrays NumPy (com broadcasting) para o tempo e para
+    cada parâmetro, e calcula todos os pontos em uma única chamada. Ex.: uma
+    trajetória inteira (t = np.arange(...)) ou milhares de receitas no mesmo t.
+    constants ({nome: valor ou array}) troca constantes do modelo; os arrays
+    entram no broadcasting (ex.: um conjunto de amostras de Monte Carlo).
+    Retorna um dict {nome: array} com as 8 saídas (ver SIMULATION_OUTPUTS).
+    """
+    c = model_constants(constants)
+    t, temp, sugar_added, water, farina_g, salt_g = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (t, temp, sugar_added, water, farina_g, salt_g))
+    )
+    t_horas = t / 60.0
+
+    # --- Fatores Ambientais ---
+    env_factor, _ = environment_factor(temp, water, farina_g, salt_g, c)
+
+    # --- Açúcares (Modelo Sequencial) ---
+    k_cons_suc = c["K_CONS_SUCROSE"] * env_factor
+    sucrose_remaining = sugar_added * np.exp(-k_cons_suc * t_horas)
+
+    k1 = c["K_PROD_MALTOSE"] * env_factor
+    inhibition_factor = np.maximum(0.01, (sucrose_remaining / (sugar_added + 1e-6))**2)
+    k2 = c["K_CONS_MALTOSE"] * env_factor * (1.0 - inhibition_factor)
+
+    starch_potential = farina_g * c["MALT_FROM_STARCH"]
+    k_diff = k2 - k1 + 1e-6
+
+    maltose_at_t = starch_potential * (k1 / k_diff) * (np.exp(-k1 * t_horas) - np.exp(-k2 * t_horas))
+    maltose_at_t = np.maximum(0, maltose_at_t)
+
+    # --- Biomassa (logística) ---
+    N0 = c["N0"]
+    total_sugar_potential = sugar_added + starch_potential
+    K = np.maximum(N0 + 0.1, total_sugar_potential * c["Y_X_S"])
+
+    sugar_factor = total_sugar_potential / (c["K_s_sugar"] + total_sugar_potential)
+    r = c["YEAST_GROWTH_RATE"] * sugar_factor * env_factor
+
+    biom = K / (1 + ((K - N0)/N0) * np.exp(-r * t_horas))
+
+    # --- CO2, Etanol, Volume, pH e Retenção de Glúten ---
+    return outputs_from_state(t, biom, sucrose_remaining, maltose_at_t, sugar_added, water, farina_g, salt_g, c)
+
+
+def run_trajectory(params, step=1.0):
+    """
+    Calcula a trajetória completa de uma receita de uma só vez (modelo vetorizado).
+
+    params segue a ordem dos sliders: [farinha, água, temperatura, açúcar, sal, tempo].
+    Os instantes vão de step até o tempo final (inclusive), como na simulação ao vivo.
+    Retorna (tempos, dict de arrays com as 8 saídas).
+    """
+    farina_g, water, temp, sugar_added, salt_g, time_limit = params
+    times = np.arange(step, time_limit, step)
+    times = np.append(times, time_limit)
+    return times, update_simulation_batch(times, temp, sugar_added, water, farina_g, salt_g)
+
+
+def batch_trajectories(params, step=1.0):
+    """
+    Trajetórias de várias receitas (array (n, 6)) numa única chamada do modelo.
+
+    Cada receita usa a grade de run_trajectory (step, 2*step, ..., tempo final);
+    as mais curtas são completadas com o próprio tempo final na matriz (n, m).
+    Retorna uma lista de (tempos, {saída: array}) com os comprimentos certos.
+    """
+    params = np.asarray(params, dtype=float)
+    farina_g, water, temp, sugar_added, salt_g, time_limit = (params[:, i:i + 1] for i in range(6))
+    base = np.arange(step, time_limit.max(), step)
+    lengths = [len(np.arange(step, limit, step)) + 1 for limit in time_limit[:, 0]]
+    times = np.empty((len(params), max(lengths)))
+    for row, (n, limit) in enumerate(zip(lengths, time_limit[:, 0])):
+        times[row, :n - 1] = base[:n - 1]
+        times[row, n - 1:] = limit
+    out = update_simulation_batch(times, temp, sugar_added, water, farina_g, salt_g)
+    return [(times[row, :n], {name: out[name][row, :n] for name in SIMULATION_OUTPUTS})
+            for row, n in enumerate(lengths)]
+
+
+def get_prediction_feedback(params, constants=None):
+    """
+    Calcula o estado final com base nos parâmetros atuais e retorna os dados e um feedback.
+
+    params segue a ordem dos sliders: [farinha, água, temperatura, açúcar, sal, tempo].
+    "level" é a chave da paleta (success/primary/warning/error) usada pela interface,
+    pelas mesmas regras de classify_prediction.
+    """
+    farina_g, water, temp, sugar_added, salt_g, time_limit = params
+
+    # Chama a simulação UMA VEZ para o tempo final
+    biom, suc, malt, co2v, vol, phv, etoh, ret = update_simulation(time_limit, temp, sugar_added, water,
+                                                                   farina_g, salt_g, constants)
+    level = FEEDBACK_LEVELS[int(classify_prediction(farina_g, phv, vol, ret))]
+
+    return {
+        "ph": phv,
+        "volume": vol,
+        "retention": ret,
+        "feedback": FEEDBACK_MESSAGES[level],
+        "level": level
+    }
+
+
+# Resolução da memoização da previsão: fração da faixa de cada slider.
+# 1/1000 é mais fino que um pixel do slider, então não muda o que é exibido.
+PREDICTION_QUANTUM = 1e-3
+
+
+def quantize_params(params, quantum=PREDICTION_QUANTUM):
+    """Chave (tupla de inteiros) dos parâmetros arredondados a `quantum` da faixa de cada slider."""
+    return tuple(
+        int(round((value - p_min) / ((p_max - p_min) * quantum)))
+        for value, (_, p_min, p_max, _, _) in zip(params, RECIPE_PARAMS)
+    )
+
+
+def dequantize_params(key, quantum=PREDICTION_QUANTUM):
+    """Inverso de quantize_params: valores dos parâmetros para uma chave."""
+    return [p_min + k * (p_max - p_min) * quantum for k, (_, p_min, p_max, _, _) in zip(key, RECIPE_PARAMS)]
+
+
+@lru_cache(maxsize=4096)
+def _cached_prediction(key):
+    return get_prediction_feedback(dequantize_params(key))
+
+
+def cached_prediction_feedback(params):
+    """
+    get_prediction_feedback memoizado (LRU) pelos parâmetros quantizados.
+    O dict retornado é compartilhado pelo cache e não deve ser alterado.
+    """
+    return _cached_prediction(quantize_params(params))
+
+
+def classify_prediction(farina_g, ph, volume, retention):
+    """
+    Regras do feedback de previsão (vetorizadas; get_prediction_feedback usa
+    as mesmas). Retorna, para cada receita, o índice do nível em FEEDBACK_LEVELS.
+    """
+    base_volume = np.asarray(farina_g, dtype=float) * 0.8
+    conditions = [
+        (ph < PH_DANGER) | (retention < RETENTION_DANGER),
+        volume > base_volume * GOOD_RISE,
+        volume > base_volume * OK_RISE,
+    ]
+    return np.select(conditions, [0, 1, 2], default=3)
+
+
+def predict_batch(params):
+    """
+    Estado final de muitas receitas de uma vez.
+
+    params é um array (..., 6) na ordem dos sliders. Retorna o dict de
+    update_simulation_batch no tempo final de cada receita, mais "level"
+    (índice em FEEDBACK_LEVELS, como em get_prediction_feedback).
+    """
+    farina_g, water, temp, sugar_added, salt_g, time_limit = np.moveaxis(np.asarray(params, dtype=float), -1, 0)
+    out = update_simulation_batch(time_limit, temp, sugar_added, water, farina_g, salt_g)
+    out["level"] = classify_prediction(farina_g, out["ph"], out["volume"], out["retention"])
+    return out
+
+
+# Saídas finais com derivadas exatas (prediction_jacobian), como no painel de previsão
+SENSITIVITY_OUTPUTS = ("volume", "ph", "retention")
+
+
+def _col(x):
+    """Valor (...) como coluna (..., 1), para multiplicar as tangentes (..., 6)."""
+    return np.asarray(x)[..., None]
+
+
+def prediction_jacobian(params, constants=None):
+    """
+    Estado final de uma ou muitas receitas e as derivadas exatas de volume,
+    pH e retenção de glúten finais em relação aos 6 parâmetros dos sliders.
+
+    Diferenciação automática no modo direto, escrita à mão: cada valor
+    intermediário do modelo fechado é levado junto com a sua tangente (um
+    vetor de 6 derivadas), tudo numa única passada vetorizada. Onde um
+    limite do modelo (max(0.01, ...), min, clip) está ativo a derivada é a
+    do ramo ativo (zero no lado limitado), sem o ruído das diferenças finitas.
+
+    params é um array (..., 6) na ordem dos sliders. Retorna (saídas,
+    jacobiana): saídas {nome: array (...)} e jacobiana {nome: array (..., 6)}
+    para cada nome de SENSITIVITY_OUTPUTS.
+    """
+    c = model_constants(constants)
+    farina_g, water, temp, sugar_added, salt_g, t = np.moveaxis(np.asarray(params, dtype=float), -1, 0)
+    # Tangentes dos próprios parâmetros (linhas da identidade)
+    d_farina, d_water, d_temp, d_sugar, d_salt, d_t = np.eye(6)
+
+    # --- Fatores Ambientais ---
+    width = np.where(temp < c["OPTIMAL_TEMP"], c["TEMP_WIDTH_LOW"], c["TEMP_WIDTH_HIGH"])
+    z = (temp - c["OPTIMAL_TEMP"]) / width
+    temp_raw = np.exp(-0.5 * z**2)
+    temp_factor = np.maximum(0.01, temp_raw)
+    d_temp_factor = _col(np.where(temp_raw > 0.01, -temp_raw * z / width, 0.0)) * d_temp
+
+    water_raw = 1.0 - np.abs(water - 0.68) * 0.8
+    water_factor = np.maximum(0.01, water_raw)
+    d_water_factor = _col(np.where(water_raw > 0.01, -0.8 * np.sign(water - 0.68), 0.0)) * d_water
+
+    salt_percentage = salt_g / (farina_g + 1)
+    d_salt_percentage = _col(1 / (farina_g + 1)) * d_salt - _col(salt_g / (farina_g + 1)**2) * d_farina
+    salt_raw = np.exp(-c["salt_k_inhib"] * salt_percentage)
+    salt_factor = np.maximum(0.01, salt_raw)
+    d_salt_factor = _col(np.where(salt_raw > 0.01, -c["salt_k_inhib"] * salt_raw, 0.0)) * d_salt_percentage
+
+    env_factor = temp_factor * water_factor * salt_factor
+    d_env = (_col(water_factor * salt_factor) * d_temp_factor + _col(temp_factor * salt_factor) * d_water_factor
+             + _col(temp_factor * water_factor) * d_salt_factor)
+
+    # --- Biomassa (logística) ---
+    N0 = c["N0"]
+    t_horas = t / 60.0
+    d_t_horas = d_t / 60.0
+    total_sugar_potential = sugar_added + farina_g * c["MALT_FROM_STARCH"]
+    d_potential = d_sugar + c["MALT_FROM_STARCH"] * d_farina
+    K_raw = total_sugar_potential * c["Y_X_S"]
+    K = np.maximum(N0 + 0.1, K_raw)
+    d_K = _col(np.where(K_raw > N0 + 0.1, c["Y_X_S"], 0.0)) * d_potential
+
+    sugar_factor = total_sugar_potential / (c["K_s_sugar"] + total_sugar_potential)
+    d_sugar_factor = _col(c["K_s_sugar"] / (c["K_s_sugar"] + total_sugar_potential)**2) * d_potential
+    r = c["YEAST_GROWTH_RATE"] * sugar_factor * env_factor
+    d_r = c["YEAST_GROWTH_RATE"] * (_col(env_factor) * d_sugar_factor + _col(sugar_factor) * d_env)
+
+    decay = np.exp(-r * t_horas)
+    d_decay = -_col(decay) * (_col(t_horas) * d_r + _col(r) * d_t_horas)
+    denominator = 1 + ((K - N0)/N0) * decay
+    d_denominator = _col(decay / N0) * d_K + _col((K - N0) / N0) * d_decay
+    biom = K / denominator
+    d_biom = d_K / _col(denominator) - _col(K / denominator**2) * d_denominator
+
+    # --- CO2, Etanol, Volume e pH (como em outputs_from_state) ---
+    Y_X_S, Y_E_S, Y_C_S = c["Y_X_S"], c["Y_E_S"], c["Y_C_S"]
+    consumed_raw = (biom - N0) / Y_X_S
+    total_sugar_consumed = np.minimum(total_sugar_potential, consumed_raw)
+    d_consumed = np.where(_col(total_sugar_potential < consumed_raw), d_potential, d_biom / Y_X_S)
+    sugar_for_fermentation = total_sugar_consumed * (Y_C_S + Y_E_S)
+    co2 = sugar_for_fermentation * (Y_C_S / (Y_C_S + Y_E_S))
+    etanol = sugar_for_fermentation * (Y_E_S / (Y_C_S + Y_E_S))
+    d_co2 = d_consumed * ((Y_C_S + Y_E_S) * (Y_C_S / (Y_C_S + Y_E_S)))
+    d_etanol = d_consumed * ((Y_C_S + Y_E_S) * (Y_E_S / (Y_C_S + Y_E_S)))
+
+    rise = 1 - np.exp(-t/180.0)
+    volume = farina_g * 0.8 + co2 * 300 * rise
+    d_volume = 0.8 * d_farina + 300 * (_col(rise) * d_co2 + _col(co2 * (1 - rise) / 180.0) * d_t)
+
+    acidity = 1 - np.exp(-t/120.0)
+    ph_raw = 5.6 - 0.015 * biom * acidity
+    ph = np.maximum(3.8, ph_raw)
+    d_acid = 0.015 * (_col(acidity) * d_biom + _col(biom * (1 - acidity) / 120.0) * d_t)
+    d_ph = np.where(_col(ph_raw > 3.8), -d_acid, 0.0)
+
+    # --- Retenção de Glúten ---
+    salt_z = (salt_percentage - 0.02) / 0.01
+    salt_bonus = np.exp(-0.5 * salt_z**2)
+    retention_raw = (100.0 + (salt_bonus - 0.5) * 20
+                     - np.abs(water - 0.70) * 30
+                     - np.maximum(0, (4.5 - ph)) * 40
+                     - (etanol / (farina_g + 1)) * 300)
+    d_retention = (_col(-20 * salt_bonus * salt_z / 0.01) * d_salt_percentage
+                   - _col(30 * np.sign(water - 0.70)) * d_water
+                   + _col(np.where(ph < 4.5, 40.0, 0.0)) * d_ph
+                   - 300 * (d_etanol / _col(farina_g + 1) - _col(etanol / (farina_g + 1)**2) * d_farina))
+    retention = np.clip(retention_raw, 5.0, 98.0)
+    d_retention = np.where(_col((retention_raw > 5.0) & (retention_raw < 98.0)), d_retention, 0.0)
+
+    outputs = {"volume": volume, "ph": ph, "retention": retention}
+    shape = np.shape(volume) + (6,)
+    jacobian = {"volume": np.broadcast_to(d_volume, shape), "ph": np.broadcast_to(d_ph, shape),
+                "retention": np.broadcast_to(d_retention, shape)}
+    return outputs, jacobian
+
+
+# Passo dos sliders nas sensibilidades mostradas: 10% da faixa de cada um
+SENSITIVITY_FRACTION = 0.1
+
+
+def slider_sensitivities(params, fraction=SENSITIVITY_FRACTION):
+    """
+    Efeito (linearizado) de mover cada slider em `fraction` da sua faixa sobre
+    volume, pH e retenção finais: as derivadas de prediction_jacobian vezes o
+    passo, para comparar parâmetros de unidades diferentes.
+    Retorna {nome: array (..., 6)} para cada nome de SENSITIVITY_OUTPUTS.
+    """
+    steps = fraction * np.array([p_max - p_min for _, p_min, p_max, _, _ in RECIPE_PARAMS])
+    _, jacobian = prediction_jacobian(params)
+    return {name: jacobian[name] * steps for name in SENSITIVITY_OUTPUTS}
+
+
+def generate_analysis(farinha_g, data_volume, data_ph, data_etoh, data_co2, data_gluten_retention=None):
+    """
+    Gera análise educacional baseada nos resultados.
+
+    Recebe a farinha usada (g) e as séries da simulação. Se a série de retenção
+    de glúten for passada, a análise do glúten é incluída no final.
+    """
+    analyses = []
+    
+    # Parâmetros usados na simulação
+    base_volume = farinha_g * 0.8 
+    
+    # Resultados da simulação
+    max_volume = max(data_volume) if len(data_volume) else base_volume
+    final_ph = data_ph[-1] if len(data_ph) else 7
+    final_etoh = data_etoh[-1] if len(data_etoh) else 0
+    
+    # --- LÓGICA DE ANÁLISE ---
+    # Análise do Volume (Crescimento)
+    if final_ph < PH_DANGER: # Priorizar checagem de perigo
+        analyses.append(f"✗ Crescimento parado. A massa ficou muito ácida (pH {final_ph:.2f}), inibindo a levedura.")
+    elif max_volume > (base_volume * GOOD_RISE): # Cresceu mais que 120%
+        analyses.append(f"✓ Excelente crescimento! A produção de CO₂ ({max(data_co2):.1f}g) foi vigorosa e a massa atingiu {max_volume:.0f} mL.")
+    elif max_volume > (base_volume * OK_RISE): # Cresceu mais que 70%
+        analyses.append(f"✓ Bom crescimento. A massa desenvolveu um volume adequado ({max_volume:.0f} mL).")
+    else:
+        analyses.append(f"✗ Crescimento limitado ({max_volume:.0f} mL). Verifique se o tempo foi curto ou se os parâmetros (sal, temp) inibiram a levedura.")
+        
+    # Análise do pH (Acidez e Sabor)
+    if 4.0 <= final_ph <= 4.8:
+        analyses.append(f"✓ O pH final ({final_ph:.2f}) está na faixa ideal, sugerindo um pão com sabor bem desenvolvido.")
+    elif final_ph > 4.8:
+        analyses.append(f"✗ O pH ({final_ph:.2f}) ficou um pouco alto. A fermentação pode não ter sido longa o suficiente para desenvolver acidez.")
+    else: # Já coberto pela análise de volume, mas reforçado aqui
+        analyses.append(f"✗ O pH ({final_ph:.2f}) está muito baixo, resultando em um pão excessivamente ácido (azedo).")
+
+    # Análise do Etanol (Aroma)
+    if final_etoh > (farinha_g * 0.003): # (ex: > 3g para 1000g de farinha)
+        analyses.append(f"✓ A produção de etanol ({final_etoh:.1f}g) foi significativa, contribuindo para o aroma.")
+    else:
+        analyses.append(f"✓ Produção de etanol moderada ({final_etoh:.1f}g). Normal para fermentações mais curtas.")
+        
+    # Análise do Glúten
+    if data_gluten_retention is not None:
+        final_gluten = data_gluten_retention[-1] if len(data_gluten_retention) else 0
+        if final_gluten > 80:
+             analyses.append(f"✓ Retenção de glúten excelente ({final_gluten:.0f})%. Os parâmetros de sal, água e tempo foram ideais.")
+        elif final_gluten > RETENTION_DANGER:
+             analyses.append(f"✓ Boa retenção de glúten ({final_gluten:.0f})%. A rede está forte.")
+        else:
+             analyses.append(f"✗ Retenção de glúten baixa ({final_gluten:.0f})%. Verifique se o tempo foi muito longo (acidez) ou se os parâmetros de sal/água estão corretos.")
+
+    return analyses
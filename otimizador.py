@@ -0,0 +1,205 @@
+"""
+Otimizador de receitas: procura os parâmetros dos sliders que dão o maior
+crescimento sem a massa ficar ácida nem o glúten degradar.
+
+Usa o método da entropia cruzada (população amostrada de uma gaussiana que
+se concentra, geração a geração, em torno das melhores receitas) com o
+modelo vetorizado avaliando cada geração inteira de uma vez. As restrições
+são as mesmas regras do painel de previsão: pH >= PH_DANGER e retenção de
+glúten >= RETENTION_DANGER. No fim, a melhor receita é refinada por subida
+de gradiente com as derivadas exatas do modelo (prediction_jacobian), o que
+a leva até os limites ativos sem mais gerações.
+
+Exemplo:
+    python otimizador.py --fixo farina_g=500 --max time_limit=180
+"""
+import argparse
+import sys
+
+import numpy as np
+
+from modelo import (RECIPE_PARAMS, PARAM_NAMES, PH_DANGER, RETENTION_DANGER, FEEDBACK_LEVELS,
+                    predict_batch, prediction_jacobian)
+from varredura import param_bounds, parse_fixed
+
+OBJECTIVES = ("rise", "volume")
+REFINE_ITERATIONS = 50
+REFINE_STEPS = 0.1 * 0.5 ** np.arange(20)  # Passos testados a cada iteração (coordenadas normalizadas)
+
+
+def search_bounds(fixed=None, bounds=None):
+    """
+    Limites da busca: as faixas dos sliders, com parâmetros fixos (fixed) e
+    limites extras (bounds: {nome: (mínimo, máximo)}, None = faixa do slider).
+    """
+    lo, hi = param_bounds(fixed)
+    for name, (b_lo, b_hi) in (bounds or {}).items():
+        if name not in PARAM_NAMES:
+            raise ValueError(f"Parâmetro desconhecido: {name}")
+        i = PARAM_NAMES.index(name)
+        if b_lo is not None:
+            lo[i] = max(lo[i], b_lo)
+        if b_hi is not None:
+            hi[i] = min(hi[i], b_hi)
+    if np.any(lo > hi):
+        raise ValueError("Limites incompatíveis: mínimo maior que o máximo.")
+    return lo, hi
+
+
+def recipe_fitness(params, objective="rise", ph_min=PH_DANGER, retention_min=RETENTION_DANGER):
+    """
+    Avalia um lote de receitas (array (n, 6)). Retorna (aptidão, saídas do modelo).
+    Receitas viáveis são ordenadas pelo objetivo ("rise": volume final / volume
+    base; "volume": volume final em mL); as inviáveis ficam sempre abaixo,
+    ordenadas pela violação das restrições.
+    """
+    out = predict_batch(params)
+    base_volume = params[:, 0] * 0.8
+    out["rise"] = out["volume"] / base_volume
+    violation = np.maximum(0, ph_min - out["ph"]) + np.maximum(0, retention_min - out["retention"]) / 100.0
+    feasible = violation == 0
+    fitness = np.where(feasible, out[objective], -1e9 * (1 + violation))
+    out["feasible"] = feasible
+    return fitness, out
+
+
+def objective_gradient(params, objective="rise"):
+    """Gradiente exato do objetivo (volume ou volume / volume base) em relação aos 6 parâmetros."""
+    outputs, jacobian = prediction_jacobian(params)
+    gradient = jacobian["volume"]
+    if objective == "rise":
+        base_volume = params[0] * 0.8
+        gradient = gradient / base_volume
+        gradient[0] -= outputs["volume"] * 0.8 / base_volume**2
+    return gradient
+
+
+def refine_recipe(params, lo, hi, objective="rise", ph_min=PH_DANGER, retention_min=RETENTION_DANGER,
+                  iterations=REFINE_ITERATIONS):
+    """
+    Refina uma receita viável por subida de gradiente projetada nos limites.
+    A cada iteração todos os passos de REFINE_STEPS na direção do gradiente
+    são avaliados num único lote e fica o melhor que mantém a receita viável;
+    para quando nenhum melhora. Retorna (parâmetros, avaliações).
+    """
+    span = hi - lo
+    params = np.asarray(params, dtype=float)
+    fitness, _ = recipe_fitness(params[None, :], objective, ph_min, retention_min)
+    best = fitness[0]
+    evaluations = 1
+    for _ in range(iterations):
+        direction = objective_gradient(params, objective) * span  # Coordenadas normalizadas
+        # Componentes que empurram para fora de um limite já atingido não contam
+        direction[((params <= lo) & (direction < 0)) | ((params >= hi) & (direction > 0))] = 0.0
+        norm = np.linalg.norm(direction)
+        if not norm > 0:
+            break
+        candidates = np.clip(params + np.outer(REFINE_STEPS, direction / norm * span), lo, hi)
+        fitness, out = recipe_fitness(candidates, objective, ph_min, retention_min)
+        evaluations += len(candidates)
+        top = np.argmax(np.where(out["feasible"], fitness, -np.inf))
+        if not (out["feasible"][top] and fitness[top] > best):
+            break
+        params, best = candidates[top], fitness[top]
+    return params, evaluations
+
+
+def optimize_recipe(fixed=None, bounds=None, objective="rise", population=2000, generations=40,
+                    elite_frac=0.05, ph_min=PH_DANGER, retention_min=RETENTION_DANGER, seed=0, tol=1e-4,
+                    refine=True):
+    """
+    Procura a receita que maximiza o objetivo respeitando as restrições.
+
+    fixed: {nome: valor} de parâmetros mantidos constantes (ex.: farina_g=500).
+    bounds: {nome: (mínimo, máximo)} para restringir faixas (ex.: time_limit=(None, 180)).
+    refine: refina a melhor receita viável com o gradiente exato (refine_recipe).
+    Retorna um dict com "params" (na ordem dos sliders), as saídas finais do
+    modelo, "feasible", "generations" e "evaluations".
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Objetivo desconhecido: {objective}")
+    if generations < 1:
+        raise ValueError("O número de gerações deve ser pelo menos 1")
+    n_elite = max(2, int(population * elite_frac))
+    if population <= n_elite:
+        raise ValueError(f"A população deve ser maior que a elite ({n_elite} receitas)")
+    lo, hi = search_bounds(fixed, bounds)
+    span = hi - lo
+    rng = np.random.default_rng(seed)
+
+    # Busca em coordenadas normalizadas [0, 1]
+    mean = np.full(len(lo), 0.5)
+    sigma = np.full(len(lo), 0.3)
+    best_u, best_fit = None, -np.inf
+    evaluations = 0
+
+    for generation in range(1, generations + 1):
+        u = np.clip(mean + sigma * rng.standard_normal((population, len(lo))), 0.0, 1.0)
+        if best_u is not None:
+            u[0] = best_u  # Elitismo: a melhor receita até agora continua na população
+        fitness, _ = recipe_fitness(lo + u * span, objective, ph_min, retention_min)
+        evaluations += population
+
+        elite = np.argpartition(-fitness, n_elite)[:n_elite]
+        top = elite[np.argmax(fitness[elite])]
+        if fitness[top] > best_fit:
+            best_fit, best_u = fitness[top], u[top].copy()
+
+        mean = u[elite].mean(axis=0)
+        sigma = 0.7 * sigma + 0.3 * u[elite].std(axis=0)
+        if np.all(sigma[span > 0] < tol):
+            break
+
+    params = lo + best_u * span
+    _, out = recipe_fitness(params[None, :], objective, ph_min, retention_min)
+    if refine and out["feasible"][0]:
+        params, extra = refine_recipe(params, lo, hi, objective, ph_min, retention_min)
+        evaluations += extra
+        _, out = recipe_fitness(params[None, :], objective, ph_min, retention_min)
+    result = {name: float(values[0]) for name, values in out.items() if name not in ("level", "feasible")}
+    result.update({
+        "params": params.tolist(),
+        "level": FEEDBACK_LEVELS[int(out["level"][0])],
+        "feasible": bool(out["feasible"][0]),
+        "generations": generation,
+        "evaluations": evaluations,
+    })
+    return result
+
+
+def _parse_limits(items):
+    return {name: float(value) for name, value in parse_fixed(items).items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Procura a receita com maior crescimento sem acidez excessiva")
+    parser.add_argument("--fixo", action="append", metavar="NOME=VALOR", help="Mantém um parâmetro constante")
+    parser.add_argument("--min", action="append", metavar="NOME=VALOR", help="Limite inferior de um parâmetro")
+    parser.add_argument("--max", action="append", metavar="NOME=VALOR", help="Limite superior de um parâmetro")
+    parser.add_argument("--objetivo", choices=OBJECTIVES, default="rise",
+                        help="rise: volume relativo ao inicial; volume: volume final em mL")
+    parser.add_argument("--populacao", type=int, default=2000)
+    parser.add_argument("--geracoes", type=int, default=40)
+    parser.add_argument("--semente", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    try:
+        mins, maxs = _parse_limits(args.min), _parse_limits(args.max)
+        bounds = {name: (mins.get(name), maxs.get(name)) for name in set(mins) | set(maxs)}
+        result = optimize_recipe(parse_fixed(args.fixo), bounds, args.objetivo,
+                                 args.populacao, args.geracoes, seed=args.semente)
+    except ValueError as e:
+        sys.exit(f"Erro: {e}")
+
+    for (_, _, _, _, label), value in zip(RECIPE_PARAMS, result["params"]):
+        print(f"{label}: {value:.2f}")
+    print(f"\nVolume final: {result['volume']:.0f} mL ({result['rise']:.2f}x o volume inicial)")
+    print(f"pH final: {result['ph']:.2f}")
+    print(f"Retenção de glúten: {result['retention']:.1f}%")
+    if not result["feasible"]:
+        print("Aviso: nenhuma receita dentro dos limites respeita as restrições de pH e glúten.")
+    print(f"({result['evaluations']} receitas avaliadas em {result['generations']} gerações)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,609 @@
+"""
+Relatórios finais em lote, sem interface (PNG ou PDF).
+
+Para cada receita de uma lista (ex.: a de cada aluno da turma) calcula a
+trajetória com o modelo vetorizado e desenha a mesma página do relatório da
+tela de resultados: parâmetros, análise de generate_analysis e o gráfico
+normalizado. Cada processo do pool cria a sua figura do Matplotlib (textos,
+eixos, linhas e legenda) uma única vez. Em PNG, a página estática (colunas,
+cabeçalhos, eixos, grade e legendas) é desenhada uma vez, o eixo de tempo é
+acrescentado a ela uma vez por escala (fundos em cache) e cada relatório só
+desenha por cima as linhas e os textos (blitting no canvas Agg); as receitas
+de cada bloco são ordenadas pelo tempo para reaproveitar o fundo. Em PDF
+(vetorial) a figura inteira é desenhada.
+A tela de resultados do simulador usa o mesmo ReportRenderer (draw).
+
+ReportCache guarda relatórios já desenhados em memória e em disco, pela
+chave report_key (parâmetros, passo, hash do modelo e as simulações
+fixadas): a mesma receita nunca é desenhada duas vezes. ReportPrerenderer
+desenha relatórios numa thread à parte para que o simulador possa prepará-los
+enquanto a simulação ainda roda (o modelo é determinístico).
+
+Exemplos:
+    python relatorios.py turma.csv --saida relatorios/
+    python relatorios.py turma.csv --formato pdf --processos 4 --saida relatorios_pdf/
+
+O CSV (ou JSON, lista de objetos) tem uma coluna por parâmetro (farina_g,
+water, temp, sugar_added, salt_g, time_limit; as ausentes usam os valores
+iniciais dos sliders) e, opcionalmente, "nome".
+"""
+import argparse
+import copy
+import csv
+import hashlib
+import json
+import os
+import re
+import sys
+import textwrap
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+from matplotlib.patches import FancyBboxPatch
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from modelo import PARAM_NAMES, DEFAULT_PARAMS, batch_trajectories, generate_analysis, model_hash, run_trajectory
+
+FORMATS = ("png", "pdf")
+DEFAULT_CHUNK_SIZE = 32  # Receitas por tarefa do pool (uma chamada do modelo por tarefa)
+BACKGROUND_CACHE_SIZE = 16  # Fundos em cache por processo (um por tempo final)
+PNG_COMPRESS_LEVEL = 1      # zlib rápido: arquivos um pouco maiores, codificação ~5x mais rápida
+REPORT_LAYOUT_VERSION = 3   # Incrementar quando a página mudar: invalida os relatórios em cache
+MEMORY_CACHE_SIZE = 8       # Relatórios em memória (~2.5 MB cada)
+DISK_CACHE_SIZE = 256       # Arquivos mantidos no diretório do cache (~100 kB cada)
+
+
+def _rgb(color):
+    return tuple(c / 255.0 for c in color)
+
+
+# Mesmas cores da paleta da interface (simulador.COLORS)
+BACKGROUND = _rgb((245, 245, 245))
+PANEL = _rgb((255, 255, 255))
+TEXT = _rgb((50, 50, 50))
+
+# Séries do gráfico normalizado: (chave, rótulo, cor)
+NORMALIZED_SERIES = (
+    ("ph", "pH", _rgb((70, 130, 180))),
+    ("biom", "Cresc. Leveduras", _rgb((65, 140, 75))),
+    ("sucrose", "Sacarose", _rgb((200, 150, 30))),
+    ("maltose", "Maltose", "deepskyblue"),
+    ("volume", "Volume", "purple"),
+    ("co2", "CO₂", _rgb((190, 45, 45))),
+    ("etoh", "Etanol", "brown"),
+)
+
+
+def normalize(data, min_val=None, max_val=None):
+    """
+    Escala uma série para [0, 1] (séries constantes ficam em 0.5). min_val e
+    max_val fixam a escala (ex.: comum a várias simulações comparadas).
+    """
+    if len(data) == 0:
+        return data
+    min_val = data.min() if min_val is None else min_val
+    max_val = data.max() if max_val is None else max_val
+    if max_val == min_val:
+        return np.full(len(data), 0.5)
+    return (data - min_val) / (max_val - min_val)
+
+
+def report_parameters(params):
+    """Linhas "Parâmetros Utilizados" do relatório (params na ordem dos sliders)."""
+    farina_g, water, temp, sugar_added, salt_g = params[:5]
+    return [
+        f"Farinha: {farina_g:.2f}g",
+        f"Hidratação: {water * 100:.0f}%",
+        f"Temperatura: {temp:.1f}°C",
+        f"Açúcar: {sugar_added:.1f}g",
+        f"Sal: {salt_g:.1f}g",
+    ]
+
+
+class ReportRenderer:
+    """
+    A página do relatório (1200 x 700 px, como a tela de resultados) numa figura
+    persistente. render() só atualiza textos e linhas e salva o arquivo.
+    Os artistas que mudam por relatório são "animados": ficam fora do fundo em cache.
+
+    Com simulações fixadas (set_runs), cada uma ganha as suas 7 linhas (em
+    cache pelo id) e o gráfico passa a usar uma escala comum por série, para
+    que as simulações possam ser comparadas entre si.
+    """
+
+    WIDTH, HEIGHT = 1200, 700
+    WRAP_CHARS = 52  # Largura da coluna de análise, em caracteres
+    ANALYSIS_LINE_PX = 21  # Altura de uma linha da análise (10 pt, espaçamento 1.5)
+    RUN_LINESTYLES = ("--", ":", "-.", (0, (5, 1, 1, 1, 1, 1)))
+    COLUMN_BOTTOM_PX = 655  # Onde termina o espaço de texto da coluna da esquerda
+
+    def __init__(self, dpi=100):
+        self.fig = Figure(figsize=(self.WIDTH / dpi, self.HEIGHT / dpi), dpi=dpi, facecolor=BACKGROUND)
+        self.canvas = FigureCanvasAgg(self.fig)
+        self.page = None  # Região salva do canvas: a página sem os artistas animados nem o eixo de tempo
+        self.legend_regions = []  # Regiões das legendas na página
+        self.backgrounds = OrderedDict()  # tempo final -> página com o eixo de tempo
+
+        # Colunas (em pixels da tela de resultados, convertidos para frações da figura)
+        for x, y, w, h in ((20, 70, 450, self.HEIGHT - 100), (500, 70, self.WIDTH - 520, self.HEIGHT - 100)):
+            self.fig.patches.append(FancyBboxPatch(self._fx(x, y + h), w / self.WIDTH, h / self.HEIGHT,
+                                                   boxstyle="round,pad=0,rounding_size=0.008",
+                                                   transform=self.fig.transFigure, facecolor=PANEL,
+                                                   edgecolor=TEXT, linewidth=1, zorder=-1))
+
+        self.title = self.fig.text(*self._fx(self.WIDTH / 2, 20), "", ha="center", va="top",
+                                   fontsize=18, weight="bold", color=TEXT)
+        self.fig.text(*self._fx(40, 90), "Parâmetros Utilizados:", va="top", fontsize=12, color=TEXT)
+        self.params_text = self.fig.text(*self._fx(50, 120), "", va="top", fontsize=11, color=TEXT,
+                                         linespacing=1.6)
+        self.analysis_title = self.fig.text(*self._fx(40, 265), "Análise dos Resultados:", va="top",
+                                            fontsize=12, color=TEXT)
+        self.analysis_text = self.fig.text(*self._fx(60, 295), "", va="top", fontsize=10, color=TEXT,
+                                           linespacing=1.5)
+        self.runs_text = self.fig.text(*self._fx(40, 480), "", va="top", fontsize=10, color=TEXT,
+                                       linespacing=1.5)  # Posição acompanha o fim da análise
+
+        left, top = self._fx(560, 100)
+        right, bottom = self._fx(1160, 600)
+        self.ax = self.fig.add_axes((left, bottom, right - left, top - bottom))
+        self.lines = [self.ax.plot([], [], color=color, label=label)[0] for _, label, color in NORMALIZED_SERIES]
+        self.ax.set_ylim(-0.05, 1.05)
+        self.ax.set_title("Evolução Normalizada da Fermentação")
+        self.ax.set_xlabel("Tempo (min)")
+        self.ax.set_ylabel("Progresso Normalizado (0 a 1)")
+        self.ax.grid(True, linestyle="--", alpha=0.7)
+        # O eixo de tempo (marcas, rótulos e grade vertical) muda com a duração
+        # da receita: é desenhado sobre a página estática a cada escala nova
+        self.ax.xaxis.set_animated(True)
+        # As legendas ficam no fundo em cache; opacas, para que a região delas
+        # possa ser restaurada por cima das linhas (ver draw)
+        self.series_legend = self.ax.legend(fontsize="small", loc="center right", framealpha=1.0)
+        self.runs_legend = None
+
+        self.runs = []
+        self.run_summaries = []  # Uma linha (rótulo, volume, pH) por simulação fixada
+        self.run_lines = {}  # id da simulação fixada -> 7 linhas (animadas, na ordem de NORMALIZED_SERIES)
+        self.dynamic = [self.title, self.params_text, self.analysis_text, self.runs_text] + self.lines
+        for artist in self.dynamic:
+            artist.set_animated(True)
+
+    def _fx(self, x, y):
+        """Pixel (x, y) da tela (origem no topo) em coordenadas da figura."""
+        return x / self.WIDTH, 1.0 - y / self.HEIGHT
+
+    def set_runs(self, runs):
+        """
+        Simulações fixadas (dados.RunStore ou lista de PinnedRun) sobrepostas ao
+        gráfico. As linhas das que continuam são reaproveitadas.
+        """
+        self.runs = list(runs)
+        ids = {run.id for run in self.runs}
+        for run_id in list(self.run_lines):
+            if run_id not in ids:
+                for line in self.run_lines.pop(run_id):
+                    line.remove()
+        handles = []
+        for i, run in enumerate(self.runs):
+            lines = self.run_lines.get(run.id)
+            if lines is None:
+                lines = self.run_lines[run.id] = [
+                    self.ax.plot([], [], color=color, linewidth=1, alpha=0.6, animated=True)[0]
+                    for _, _, color in NORMALIZED_SERIES
+                ]
+            style = self.RUN_LINESTYLES[i % len(self.RUN_LINESTYLES)]
+            for line in lines:
+                line.set_linestyle(style)
+            handles.append(Line2D([], [], color=TEXT, linewidth=1, linestyle=style, label=run.label))
+
+        # A legenda das simulações não muda entre relatórios: fica no fundo
+        if self.runs_legend is not None:
+            self.runs_legend.remove()
+            self.runs_legend = None
+        self.run_summaries = []
+        if handles:
+            self.runs_legend = self.ax.legend(handles=handles, fontsize="x-small", loc="upper left",
+                                              title="Fixadas", title_fontsize="x-small",
+                                              ncol=2 if len(handles) > 8 else 1, framealpha=1.0)
+            self.ax.add_artist(self.series_legend)
+            for run in self.runs:
+                data = run.data
+                self.run_summaries.append(f"  {run.label}: {data.last('volume'):.0f} mL, pH {data.last('ph'):.2f}")
+        self.page = None
+        self.backgrounds.clear()
+
+    def _prepare(self, params, times, series, title):
+        """Atualiza textos e linhas para uma receita. Retorna a escala do eixo de tempo."""
+        self.title.set_text(title)
+        self.params_text.set_text("\n".join(report_parameters(params)))
+        analyses = generate_analysis(params[0], series["volume"], series["ph"], series["etoh"],
+                                     series["co2"], series["retention"])
+        wrapped = []
+        for analysis in analyses:
+            wrapped.extend(textwrap.wrap(analysis, self.WRAP_CHARS) or [""])
+        self.analysis_text.set_text("\n".join(wrapped))
+        # Lista das simulações fixadas logo abaixo da análise, no espaço que sobra na coluna
+        top = 295 + len(wrapped) * self.ANALYSIS_LINE_PX + 16
+        self.runs_text.set_y(self._fx(0, top)[1])
+        lines = []
+        if self.run_summaries:
+            room = max(1, (self.COLUMN_BOTTOM_PX - top) // self.ANALYSIS_LINE_PX - 1)
+            lines = ["Simulações fixadas (volume, pH final):"]
+            if len(self.run_summaries) <= room:
+                lines += self.run_summaries
+            else:
+                lines += self.run_summaries[:room - 1]
+                lines.append(f"  + {len(self.run_summaries) - room + 1} outras")
+        self.runs_text.set_text("\n".join(lines))
+
+        runs = [run.data for run in self.runs]
+        for i, (key, _, _) in enumerate(NORMALIZED_SERIES):
+            lo = hi = None
+            if runs:
+                # Escala comum: a atual e as fixadas lado a lado
+                values = [data[key] for data in runs] + ([series[key]] if len(times) else [])
+                lo = min(v.min() for v in values)
+                hi = max(v.max() for v in values)
+            self.lines[i].set_data(times, normalize(series[key], lo, hi))
+            for run, data in zip(self.runs, runs):
+                self.run_lines[run.id][i].set_data(data["time"], normalize(data[key], lo, hi))
+        ends = ([float(times[-1])] if len(times) else []) + [float(data.last("time")) for data in runs]
+        x_max = max(ends, default=1.0)
+        self.ax.set_xlim(0, x_max)
+        return x_max
+
+    def _legends(self):
+        return [self.series_legend] + ([self.runs_legend] if self.runs_legend is not None else [])
+
+    def _animated(self):
+        return self.dynamic + [self.ax.xaxis] + [line for run in self.runs for line in self.run_lines[run.id]]
+
+    def draw(self, params, times, series, title="Relatório da Simulação"):
+        """Desenha a página de uma receita no canvas e retorna o buffer RGBA (WIDTH x HEIGHT)."""
+        x_max = self._prepare(params, times, series, title)
+        self.canvas.restore_region(self._background(x_max))
+        for run in self.runs:
+            for line in self.run_lines[run.id]:
+                self.ax.draw_artist(line)
+        for line in self.lines:
+            self.ax.draw_artist(line)
+        # As legendas (opacas, já desenhadas no fundo) voltam por cima das linhas
+        for region in self.legend_regions:
+            self.canvas.restore_region(region)
+        for artist in self.dynamic[:4]:
+            self.fig.draw_artist(artist)
+        return self.canvas.buffer_rgba()
+
+    def render(self, path, params, times, series, title="Relatório da Simulação", fmt=None):
+        """Desenha o relatório de uma receita e salva em path (PNG ou PDF)."""
+        fmt = fmt or os.path.splitext(path)[1].lstrip(".").lower() or "png"
+        if fmt != "png":
+            # Vetorial: desenha tudo (animados incluídos) direto no arquivo
+            self._prepare(params, times, series, title)
+            animated = self._animated()
+            for artist in animated:
+                artist.set_animated(False)
+            try:
+                self.fig.savefig(path, format=fmt, facecolor=BACKGROUND)
+            finally:
+                for artist in animated:
+                    artist.set_animated(True)
+            return path
+
+        rgba = np.asarray(self.draw(params, times, series, title))
+        Image.fromarray(rgba[..., :3]).save(path, format="PNG", compress_level=PNG_COMPRESS_LEVEL)
+        return path
+
+    def _background(self, x_max):
+        """
+        Fundo para o eixo de tempo até x_max (em cache por escala). Um fundo
+        novo é a página estática (desenhada uma vez) com o eixo de tempo por cima.
+        """
+        background = self.backgrounds.get(x_max)
+        if background is not None:
+            self.backgrounds.move_to_end(x_max)
+            return background
+        if self.page is None:
+            self.canvas.draw()  # Os artistas animados (e o eixo de tempo) ficam de fora
+            self.page = self.canvas.copy_from_bbox(self.fig.bbox)
+            self.legend_regions = [self.canvas.copy_from_bbox(legend.get_window_extent().padded(1))
+                                   for legend in self._legends()]
+        else:
+            self.canvas.restore_region(self.page)
+        self.ax.draw_artist(self.ax.xaxis)
+        background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.backgrounds[x_max] = background
+        if len(self.backgrounds) > BACKGROUND_CACHE_SIZE:
+            self.backgrounds.popitem(last=False)
+        return background
+
+
+# --------- Cache e pré-renderização ----------
+
+def report_key(params, step, runs=(), model=None):
+    """
+    Chave (hex) do relatório de uma receita: parâmetros (ordem dos sliders),
+    passo das amostras, hash do modelo que gerou as séries (padrão: o atual;
+    num replay, o da gravação) e as simulações fixadas (rótulo e séries).
+    """
+    digest = hashlib.sha256(json.dumps({
+        "layout": REPORT_LAYOUT_VERSION,
+        "params": [float(v) for v in params],
+        "step": float(step),
+        "model": model or model_hash(),
+    }).encode("utf-8"))
+    for run in runs:
+        digest.update(run.label.encode("utf-8"))
+        data = run.data
+        for name in data.columns:
+            digest.update(data[name].tobytes())
+    return digest.hexdigest()[:32]
+
+
+class ReportCache:
+    """
+    Relatórios desenhados (imagens RGB HEIGHT x WIDTH x 3): os mais recentes em
+    memória (LRU) e todos em PNG em directory (None: só memória), um arquivo
+    por chave. Os arquivos mais antigos saem quando passam de disk_size.
+    """
+
+    def __init__(self, directory=None, memory_size=MEMORY_CACHE_SIZE, disk_size=DISK_CACHE_SIZE):
+        self.directory = directory
+        self.memory_size = memory_size
+        self.disk_size = disk_size
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()  # A thread do ReportPrerenderer também grava aqui
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.png") if self.directory else None
+
+    def __contains__(self, key):
+        """Se a chave está em memória ou em disco (sem ler o PNG)."""
+        with self.lock:
+            if key in self.memory:
+                return True
+        path = self.path(key)
+        return path is not None and os.path.exists(path)
+
+    def get(self, key):
+        """Imagem do relatório (array somente leitura) ou None se não está em cache."""
+        with self.lock:
+            image = self.memory.get(key)
+            if image is not None:
+                self.memory.move_to_end(key)
+                return image
+        path = self.path(key)
+        if path is None or not os.path.exists(path):
+            return None
+        try:
+            with Image.open(path) as f:
+                image = np.asarray(f.convert("RGB"))
+        except OSError:
+            return None  # Arquivo corrompido ou sendo substituído: desenha de novo
+        self._remember(key, image)
+        return image
+
+    def put(self, key, image, save=True):
+        """Guarda a imagem RGB em memória e, com save, em disco (escrita atômica)."""
+        image = np.ascontiguousarray(image)
+        image.flags.writeable = False
+        self._remember(key, image)
+        if save and self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = f"{self.path(key)}.{os.getpid()}.tmp"
+            Image.fromarray(image).save(tmp, format="PNG", compress_level=PNG_COMPRESS_LEVEL)
+            os.replace(tmp, self.path(key))
+            self._prune()
+        return image
+
+    def _remember(self, key, image):
+        with self.lock:
+            self.memory[key] = image
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.memory_size:
+                self.memory.popitem(last=False)
+
+    def _prune(self):
+        files = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".png")]
+        if len(files) > self.disk_size:
+            files.sort(key=lambda entry: entry.stat().st_mtime)
+            for entry in files[:len(files) - self.disk_size]:
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+
+class ReportPrerenderer:
+    """
+    Desenha relatórios numa thread (uma só: o ReportRenderer é reaproveitado
+    entre os relatórios) e os guarda no ReportCache. Todo relatório, pedido
+    antes ou na hora, passa pela mesma thread.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.executor = None  # Criado no primeiro pedido
+        self.pending = {}  # chave -> Future
+        self.renderer = None
+        self.runs_signature = None
+
+    def submit(self, key, params, step, runs=(), times=None, series=None, title="Relatório da Simulação"):
+        """
+        Agenda o relatório da chave key, se ainda não está em cache nem na fila.
+        Sem times/series a trajetória é calculada (run_trajectory com step).
+        As simulações fixadas e as séries são copiadas: a interface pode mudá-las.
+        Um relatório já em disco não é lido aqui, só em result().
+        """
+        self._collect()
+        if key in self.pending or key in self.cache:
+            return
+        self._schedule(key, params, step, runs, times, series, title)
+
+    def _schedule(self, key, params, step, runs=(), times=None, series=None, title="Relatório da Simulação"):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="relatorio")
+        runs = copy.deepcopy(list(runs))
+        if times is not None:
+            times = np.array(times)
+            series = {name: np.array(values) for name, values in series.items()}
+        self.pending[key] = self.executor.submit(self._render, key, list(params), step, runs, times, series, title)
+
+    def result(self, key, *args, **kwargs):
+        """
+        Imagem do relatório: do cache, esperando o que está na fila ou (se
+        nunca foi pedido) desenhando agora com os argumentos de submit.
+        """
+        image = self.cache.get(key)
+        if image is not None:
+            return image
+        if key not in self.pending:
+            # Também quando o PNG em disco não pôde ser lido
+            self._schedule(key, *args, **kwargs)
+        return self.pending.pop(key).result()
+
+    def _collect(self):
+        """Esquece os pedidos já concluídos (o resultado ficou no cache)."""
+        for key in [key for key, future in self.pending.items() if future.done()]:
+            self.pending.pop(key).result()  # Propaga erros da thread
+
+    def _render(self, key, params, step, runs, times, series, title):
+        if self.renderer is None:
+            self.renderer = ReportRenderer()
+        signature = [(run.id, run.label) for run in runs]
+        if signature != self.runs_signature:
+            self.renderer.set_runs(runs)
+            self.runs_signature = signature
+        if times is None:
+            times, series = run_trajectory(params, step)
+        rgba = np.asarray(self.renderer.draw(params, times, series, title))
+        return self.cache.put(key, rgba[..., :3])
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+
+# --------- Lote em paralelo ----------
+
+_renderer = None  # Um por processo, reaproveitado entre tarefas
+
+
+def _report_filename(index, name, fmt):
+    slug = re.sub(r"[^\w-]+", "_", name, flags=re.UNICODE).strip("_") if name else ""
+    return f"relatorio_{index:04d}{'_' + slug if slug else ''}.{fmt}"
+
+
+def render_chunk(task):
+    """Calcula as trajetórias de um bloco de receitas e salva os relatórios. Retorna os caminhos."""
+    global _renderer
+    indices, params, names, out_dir, fmt, step = task
+    if _renderer is None:
+        _renderer = ReportRenderer()
+    paths = []
+    for index, name, row, (times, series) in zip(indices, names, params, batch_trajectories(params, step)):
+        path = os.path.join(out_dir, _report_filename(index, name, fmt))
+        title = f"Relatório da Simulação — {name}" if name else "Relatório da Simulação"
+        paths.append(_renderer.render(path, row.tolist(), times, series, title, fmt))
+    return paths
+
+
+def render_reports(params, out_dir, fmt="png", names=None, processes=None, step=1.0,
+                   chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """
+    Gera um relatório por receita (params: array (n, 6) na ordem dos sliders)
+    em out_dir. names (opcional) entra no título e no nome do arquivo. Com
+    processes > 1 os blocos são divididos entre processos. Retorna os caminhos
+    na ordem das receitas.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato desconhecido: {fmt}")
+    params = np.asarray(params, dtype=float).reshape(-1, len(PARAM_NAMES))
+    names = list(names) if names is not None else [""] * len(params)
+    os.makedirs(out_dir, exist_ok=True)
+    processes = processes or os.cpu_count() or 1
+
+    # Blocos de receitas com tempos finais próximos: menos preenchimento na
+    # matriz do modelo e mais acertos no cache de fundos de cada processo
+    order = np.argsort(params[:, -1], kind="stable")
+    tasks = []
+    for s in range(0, len(order), chunk_size):
+        idx = order[s:s + chunk_size]
+        tasks.append((idx.tolist(), params[idx], [names[i] for i in idx], out_dir, fmt, step))
+
+    paths = [None] * len(params)
+    done = 0
+
+    def finish(task, chunk_paths):
+        nonlocal done
+        for i, path in zip(task[0], chunk_paths):
+            paths[i] = path
+        done += len(chunk_paths)
+        if progress:
+            progress(done, len(params))
+
+    if processes == 1 or len(tasks) <= 1:
+        for task in tasks:
+            finish(task, render_chunk(task))
+    else:
+        with ProcessPoolExecutor(min(processes, len(tasks))) as pool:
+            for task, chunk_paths in zip(tasks, pool.map(render_chunk, tasks)):
+                finish(task, chunk_paths)
+    return paths
+
+
+def load_recipes(path):
+    """
+    Lê receitas de um CSV ou JSON. Retorna (array (n, 6), nomes). Parâmetros
+    ausentes usam os valores iniciais dos sliders.
+    """
+    if path.lower().endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            rows = json.load(f)
+    else:
+        with open(path, encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+    params, names = [], []
+    for i, row in enumerate(rows, 1):
+        unknown = set(row) - set(PARAM_NAMES) - {"nome"}
+        if unknown:
+            raise ValueError(f"Colunas desconhecidas: {', '.join(sorted(unknown))}")
+        try:
+            params.append([float(default if row.get(name) in (None, "") else row[name])
+                           for name, default in zip(PARAM_NAMES, DEFAULT_PARAMS)])
+        except ValueError:
+            raise ValueError(f"Valor inválido na receita {i}")
+        names.append(str(row.get("nome") or ""))
+    return np.array(params).reshape(-1, len(PARAM_NAMES)), names
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera os relatórios finais de uma lista de receitas")
+    parser.add_argument("receitas", help="Arquivo CSV ou JSON com as receitas")
+    parser.add_argument("--saida", default="relatorios", help="Diretório dos relatórios")
+    parser.add_argument("--formato", choices=FORMATS, default="png")
+    parser.add_argument("--processos", type=int, default=0, help="Processos (0 = todos os núcleos)")
+    parser.add_argument("--passo", type=float, default=1.0, help="Intervalo entre amostras (min)")
+    args = parser.parse_args(argv)
+
+    try:
+        params, names = load_recipes(args.receitas)
+    except (OSError, ValueError) as e:
+        sys.exit(f"Erro: {e}")
+
+    def show(done, total):
+        print(f"\r{done}/{total} relatórios", end="", file=sys.stderr, flush=True)
+
+    paths = render_reports(params, args.saida, args.formato, names, args.processos or None, args.passo,
+                           progress=show)
+    print(file=sys.stderr)
+    print(f"{len(paths)} relatórios em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Relógio da simulação ao vivo, com passo fixo e desacoplado dos quadros.
+
+O tempo real decorrido (multiplicado pela velocidade) diz até onde a
+simulação deveria ter chegado; o relógio entrega, de uma vez, todas as
+amostras da grade fixa (step, 2*step, ..., tempo final) que ficaram para
+trás. Se um quadro demora, o próximo recebe mais amostras; a grade, e
+portanto os resultados, não dependem da velocidade nem da máquina. É a mesma
+grade de modelo.run_trajectory.
+"""
+import numpy as np
+
+REAL_TIME_RATE = 30.0    # Minutos simulados por segundo real em 1x (1 min por quadro a 30 FPS)
+MAX_FRAME_SECONDS = 1.0  # Quadros mais longos (janela arrastada, depurador) contam como 1 s
+MIN_SPEED, MAX_SPEED = 0.25, 10000.0
+
+
+class SimulationClock:
+    """Converte tempo real em amostras de uma simulação de time_limit minutos."""
+
+    def __init__(self, time_limit, step=1.0, speed=1.0):
+        self.speed = speed
+        self.reset(time_limit, step)
+
+    def reset(self, time_limit, step=None, times=None):
+        """
+        Volta ao início (mantém a velocidade). times troca a grade regular por
+        instantes dados (ex.: a coluna de tempo de uma gravação, no replay).
+        """
+        self.time_limit = float(time_limit)
+        self.step = float(step or self.step)
+        if times is None:
+            times = np.append(np.arange(self.step, self.time_limit, self.step), self.time_limit)
+        self.times = times
+        self.target = 0.0  # Tempo simulado que o relógio real já "pagou"
+        self.emitted = 0   # Amostras já entregues
+
+    @property
+    def finished(self):
+        return self.emitted == len(self.times)
+
+    @property
+    def time(self):
+        """Tempo da última amostra entregue."""
+        return self.times[self.emitted - 1] if self.emitted else 0.0
+
+    def set_speed(self, speed):
+        self.speed = min(MAX_SPEED, max(MIN_SPEED, float(speed)))
+        return self.speed
+
+    def advance(self, seconds):
+        """
+        Avança seconds de tempo real na velocidade atual e retorna os instantes
+        das amostras novas (array, possivelmente vazio).
+        """
+        seconds = min(max(seconds, 0.0), MAX_FRAME_SECONDS)
+        self.target = min(self.time_limit, self.target + seconds * REAL_TIME_RATE * self.speed)
+        return self._emit_until(self.target)
+
+    def jump_to_end(self):
+        """Entrega de uma vez todas as amostras que faltam."""
+        self.target = self.time_limit
+        return self._emit_until(self.time_limit)
+
+    def seek(self, t):
+        """
+        Vai para o tempo t (para frente ou para trás): as amostras até t contam
+        como entregues. Retorna o número de amostras entregues.
+        """
+        self.target = min(max(float(t), 0.0), self.time_limit)
+        self.emitted = int(np.searchsorted(self.times, self.target, side="right"))
+        return self.emitted
+
+    def _emit_until(self, t):
+        stop = int(np.searchsorted(self.times, t, side="right"))
+        new = self.times[self.emitted:stop]
+        self.emitted = max(self.emitted, stop)
+        return new
@@ -0,0 +1,518 @@
+"""
+Serviço local de simulação (asyncio), compartilhado por vários clientes: a
+interface em pygame, notebooks e o painel da turma.
+
+Fala HTTP/1.1 com JSON numa porta local ou num socket Unix:
+    POST /previsao    {"params": [6 valores]}             -> previsão (como get_prediction_feedback)
+                      {"receitas": [[6 valores], ...]}     -> {"resultados": [previsão, ...]}
+    POST /trajetoria  {"params": [...], "passo": 1.0}      -> {"tempo": [...], "biom": [...], ...}
+    POST /analise     {"params": [...]}                    -> {"analise": [...], "previsao": {...}}
+    GET  /estado                                           -> contadores, lotes, cache e latências
+
+Pedidos concorrentes são juntados por RequestBatcher: o primeiro pedido de um
+lote abre uma janela curta (BATCH_WINDOW) e todos os que chegam nela são
+avaliados numa única chamada do modelo vetorizado (predict_batch ou
+batch_trajectories). Pedidos iguais no mesmo lote compartilham o resultado e
+receitas repetidas saem de um cache LRU sem passar pelo modelo. As
+trajetórias são calculadas numa thread à parte para não segurar o loop.
+
+Exemplos:
+    python servico.py --porta 8765
+    python servico.py --socket /tmp/simulador.sock --janela 1
+
+Para notebooks, ServiceClient faz os pedidos de forma bloqueante; LocalClient
+fala com um SimulationService no mesmo processo, sem rede.
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import math
+import socket
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from modelo import (PARAM_NAMES, SIMULATION_OUTPUTS, FEEDBACK_LEVELS, FEEDBACK_MESSAGES, predict_batch,
+                    batch_trajectories, generate_analysis)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+BATCH_WINDOW = 0.002            # s de espera pelos pedidos que entram no mesmo lote
+MAX_BATCH = 4096                # Previsões por lote (lote cheio é avaliado sem esperar a janela)
+MAX_TRAJECTORY_BATCH = 64
+TRAJECTORY_BATCH_POINTS = 500_000  # Pontos (receitas x instantes) por chamada do modelo
+MAX_TRAJECTORY_POINTS = 200_000    # Instantes por trajetória pedida
+CACHE_SIZE = 65_536
+TRAJECTORY_CACHE_SIZE = 256
+LATENCY_HISTORY = 10_000        # Pedidos guardados para os percentis de latência
+MAX_BODY = 8 * 1024 * 1024
+
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+def validate_params(params):
+    """Converte uma receita (6 números na ordem dos sliders) numa tupla de floats, ou ValueError."""
+    if not isinstance(params, (list, tuple)) or len(params) != len(PARAM_NAMES):
+        raise ValueError(f"params deve ter {len(PARAM_NAMES)} valores ({', '.join(PARAM_NAMES)})")
+    try:
+        values = tuple(float(v) for v in params)
+    except (TypeError, ValueError):
+        raise ValueError("params deve conter apenas números")
+    if not all(math.isfinite(v) for v in values):
+        raise ValueError("params deve conter apenas valores finitos")
+    farina_g, water, temp, sugar_added, salt_g, time_limit = values
+    # Fora destas faixas o modelo não tem sentido físico (farinha zero divide por zero)
+    if farina_g <= 0:
+        raise ValueError("farina_g deve ser maior que zero")
+    if not 0 <= water <= 1:
+        raise ValueError("water deve estar entre 0 e 1 (fração)")
+    if sugar_added < 0 or salt_g < 0:
+        raise ValueError("sugar_added e salt_g não podem ser negativos")
+    if time_limit <= 0:
+        raise ValueError("time_limit deve ser maior que zero")
+    return values
+
+
+class RequestBatcher:
+    """
+    Junta os pedidos feitos com get(chave) em lotes avaliados por
+    evaluate(lista de chaves) -> lista de resultados, com cache LRU por chave.
+    Os resultados do cache são compartilhados e não devem ser alterados.
+
+    Com executor, a avaliação roda nele e o loop continua atendendo pedidos.
+    Se o lote falha, as chaves são reavaliadas uma a uma e o erro vai só para
+    os pedidos cuja chave falhou; os outros recebem o resultado normalmente.
+    """
+
+    def __init__(self, evaluate, window=BATCH_WINDOW, max_batch=MAX_BATCH, cache_size=CACHE_SIZE,
+                 executor=None):
+        self.evaluate = evaluate
+        self.window = window
+        self.max_batch = max_batch
+        self.cache_size = cache_size
+        self.executor = executor
+        self.cache = OrderedDict()
+        self._pending = {}  # chave -> future do lote em formação
+        self._timer = None
+        self.requests = 0
+        self.hits = 0
+        self.batches = 0
+        self.evaluated = 0
+        self.latencies = np.zeros(LATENCY_HISTORY)
+        self.count = 0
+
+    async def get(self, key):
+        start = time.perf_counter()
+        self.requests += 1
+        result = self.cache.get(key)
+        if result is not None:
+            self.cache.move_to_end(key)
+            self.hits += 1
+        else:
+            future = self._pending.get(key)
+            if future is None:
+                loop = asyncio.get_running_loop()
+                future = self._pending[key] = loop.create_future()
+                if len(self._pending) >= self.max_batch:
+                    self._flush()
+                elif self._timer is None:
+                    self._timer = loop.call_later(self.window, self._flush)
+            # shield: um cliente que desiste não cancela o resultado dos outros
+            result = await asyncio.shield(future)
+        self.latencies[self.count % LATENCY_HISTORY] = time.perf_counter() - start
+        self.count += 1
+        return result
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return
+        keys = list(batch)
+        self.batches += 1
+        self.evaluated += len(keys)
+        if self.executor is None:
+            self._resolve(batch, self._evaluate(keys))
+            return
+        done = asyncio.get_running_loop().run_in_executor(self.executor, self._evaluate, keys)
+        done.add_done_callback(lambda f: self._fail(batch, f.exception()) if f.exception()
+                               else self._resolve(batch, f.result()))
+
+    def _evaluate(self, keys):
+        """
+        Resultados de evaluate(keys); se o lote falha, avalia cada chave
+        sozinha e devolve a exceção no lugar do resultado das que falharem.
+        """
+        try:
+            return self.evaluate(keys)
+        except Exception as e:
+            if len(keys) == 1:
+                return [e]
+        results = []
+        for key in keys:
+            try:
+                results.extend(self.evaluate([key]))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def _resolve(self, batch, results):
+        for (key, future), result in zip(batch.items(), results):
+            if isinstance(result, Exception):
+                if not future.done():
+                    future.set_exception(result)
+                continue
+            self.cache[key] = result
+            if not future.done():
+                future.set_result(result)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def _fail(self, batch, error):
+        for future in batch.values():
+            if not future.done():
+                future.set_exception(error)
+
+    def stats(self):
+        window = self.latencies[:min(self.count, LATENCY_HISTORY)]
+        p50, p99 = np.percentile(window, (50, 99)) * 1000.0 if len(window) else (0.0, 0.0)
+        return {
+            "pedidos": self.requests,
+            "acertos_cache": self.hits,
+            "lotes": self.batches,
+            "lote_medio": self.evaluated / self.batches if self.batches else 0.0,
+            "latencia_p50_ms": float(p50),
+            "latencia_p99_ms": float(p99),
+        }
+
+
+def evaluate_predictions(keys):
+    """Previsões (dicts de get_prediction_feedback) de uma lista de receitas, numa chamada do modelo."""
+    out = predict_batch(np.array(keys))
+    ph, volume, retention = out["ph"].tolist(), out["volume"].tolist(), out["retention"].tolist()
+    results = []
+    for i, level in enumerate(out["level"].tolist()):
+        level = FEEDBACK_LEVELS[level]
+        results.append({"ph": ph[i], "volume": volume[i], "retention": retention[i],
+                        "feedback": FEEDBACK_MESSAGES[level], "level": level})
+    return results
+
+
+def evaluate_trajectories(keys):
+    """
+    Trajetórias de uma lista de chaves (receita, passo). Agrupa por passo e
+    ordena pelo comprimento, para que cada chamada de batch_trajectories
+    complete pouco e fique abaixo de TRAJECTORY_BATCH_POINTS pontos.
+    """
+    results = [None] * len(keys)
+    order = sorted(range(len(keys)), key=lambda i: (keys[i][1], keys[i][0][-1]))
+    group = []
+    for n, i in enumerate(order):
+        group.append(i)
+        params, step = keys[i]
+        following = keys[order[n + 1]] if n + 1 < len(order) else None
+        if (following is None or following[1] != step
+                or (len(group) + 1) * following[0][-1] / step > TRAJECTORY_BATCH_POINTS):
+            trajectories = batch_trajectories([keys[j][0] for j in group], step)
+            for j, trajectory in zip(group, trajectories):
+                results[j] = trajectory
+            group = []
+    return results
+
+
+class SimulationService:
+    """
+    O motor compartilhado: previsões e trajetórias juntadas em lotes e em
+    cache. Os métodos são corrotinas chamadas dentro do loop do asyncio.
+    """
+
+    def __init__(self, window=BATCH_WINDOW, max_batch=MAX_BATCH, cache_size=CACHE_SIZE):
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="trajetorias")
+        self.predictions = RequestBatcher(evaluate_predictions, window, max_batch, cache_size)
+        self.trajectories = RequestBatcher(evaluate_trajectories, window, MAX_TRAJECTORY_BATCH,
+                                           TRAJECTORY_CACHE_SIZE, self._executor)
+        self.started = time.time()
+
+    async def predict(self, params):
+        return await self.predictions.get(validate_params(params))
+
+    async def predict_many(self, recipes):
+        keys = [validate_params(params) for params in recipes]
+        return await asyncio.gather(*(self.predictions.get(key) for key in keys))
+
+    async def trajectory(self, params, step=1.0):
+        """(tempos, {saída: array}) como run_trajectory. Os arrays são compartilhados pelo cache."""
+        params = validate_params(params)
+        try:
+            step = float(step)
+        except (TypeError, ValueError):
+            raise ValueError("passo deve ser um número")
+        if not (math.isfinite(step) and step > 0):
+            raise ValueError("passo deve ser finito e maior que zero")
+        if params[-1] / step > MAX_TRAJECTORY_POINTS:
+            raise ValueError(f"Trajetória com mais de {MAX_TRAJECTORY_POINTS} instantes; aumente o passo")
+        return await self.trajectories.get((params, step))
+
+    async def analysis(self, params, step=1.0):
+        """Análise de generate_analysis da trajetória da receita."""
+        times, series = await self.trajectory(params, step)
+        return generate_analysis(float(params[0]), series["volume"], series["ph"], series["etoh"],
+                                 series["co2"], series["retention"])
+
+    def stats(self):
+        return {
+            "ativo_s": round(time.time() - self.started, 1),
+            "previsao": self.predictions.stats(),
+            "trajetoria": self.trajectories.stats(),
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+    # --------- Rotas ----------
+
+    async def handle(self, method, path, body=None):
+        """
+        Atende um pedido (independente do transporte). body é o JSON já
+        decodificado. Retorna (status HTTP, dict de resposta).
+        """
+        route = ROUTES.get(path)
+        if route is None:
+            return 404, {"erro": f"Rota desconhecida: {path}"}
+        expected, handler = route
+        if method != expected:
+            return 405, {"erro": f"Use {expected} em {path}"}
+        if expected == "POST" and not isinstance(body, dict):
+            return 400, {"erro": "O corpo deve ser um objeto JSON"}
+        try:
+            return 200, await handler(self, body)
+        except (KeyError, ValueError, TypeError) as e:
+            message = f"Campo obrigatório ausente: {e}" if isinstance(e, KeyError) else str(e)
+            return 400, {"erro": message}
+
+    async def _route_prediction(self, body):
+        if "receitas" in body:
+            if not isinstance(body["receitas"], list):
+                raise ValueError("receitas deve ser uma lista")
+            return {"resultados": await self.predict_many(body["receitas"])}
+        return await self.predict(body["params"])
+
+    async def _route_trajectory(self, body):
+        times, series = await self.trajectory(body["params"], body.get("passo", 1.0))
+        data = {"tempo": times.tolist()}
+        data.update({name: series[name].tolist() for name in SIMULATION_OUTPUTS})
+        return data
+
+    async def _route_analysis(self, body):
+        analysis, prediction = await asyncio.gather(self.analysis(body["params"], body.get("passo", 1.0)),
+                                                    self.predict(body["params"]))
+        return {"analise": analysis, "previsao": prediction}
+
+    async def _route_status(self, body):
+        return self.stats()
+
+
+ROUTES = {
+    "/previsao": ("POST", SimulationService._route_prediction),
+    "/trajetoria": ("POST", SimulationService._route_trajectory),
+    "/analise": ("POST", SimulationService._route_analysis),
+    "/estado": ("GET", SimulationService._route_status),
+}
+
+
+# --------- HTTP ----------
+
+async def handle_connection(service, reader, writer):
+    """Uma conexão HTTP/1.1 (com keep-alive): lê pedidos e responde em JSON até o cliente fechar."""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            try:
+                method, target, version = request_line.decode("latin-1").split()
+            except ValueError:
+                break
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            try:
+                length = int(headers.get("content-length") or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                # Sem saber onde o corpo termina, a conexão não pode continuar
+                status, payload = 400, {"erro": "Content-Length inválido"}
+                keep_alive = False
+            elif length > MAX_BODY:
+                status, payload = 413, {"erro": "Corpo grande demais"}
+                keep_alive = False
+            else:
+                body = await reader.readexactly(length) if length else b""
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              and version != "HTTP/1.0")
+                try:
+                    data = json.loads(body) if body else None
+                except ValueError:
+                    status, payload = 400, {"erro": "JSON inválido"}
+                else:
+                    try:
+                        status, payload = await service.handle(method, target.split("?")[0], data)
+                    except Exception as e:
+                        status, payload = 500, {"erro": f"{type(e).__name__}: {e}"}
+
+            content = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            writer.write(f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+                         f"Content-Type: application/json; charset=utf-8\r\n"
+                         f"Content-Length: {len(content)}\r\n"
+                         f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+                         + content)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None):
+    """Abre o servidor (TCP ou socket Unix) e retorna o asyncio.Server, já aceitando conexões."""
+    async def handler(reader, writer):
+        await handle_connection(service, reader, writer)
+
+    if socket_path:
+        return await asyncio.start_unix_server(handler, socket_path)
+    return await asyncio.start_server(handler, host, port)
+
+
+# --------- Clientes ----------
+
+class LocalClient:
+    """
+    Cliente no mesmo processo: passa os pedidos direto a SimulationService.handle,
+    com a mesma ida e volta por JSON do HTTP. Os erros viram ValueError.
+    """
+
+    def __init__(self, service=None):
+        self.service = service or SimulationService()
+
+    async def request(self, method, path, body=None):
+        data = json.loads(json.dumps(body)) if body is not None else None
+        status, payload = await self.service.handle(method, path, data)
+        payload = json.loads(json.dumps(payload, ensure_ascii=False))
+        if status != 200:
+            raise ValueError(payload["erro"])
+        return payload
+
+    async def prediction(self, params):
+        return await self.request("POST", "/previsao", {"params": list(params)})
+
+    async def predictions(self, recipes):
+        return (await self.request("POST", "/previsao", {"receitas": [list(p) for p in recipes]}))["resultados"]
+
+    async def trajectory(self, params, step=1.0):
+        return await self.request("POST", "/trajetoria", {"params": list(params), "passo": step})
+
+    async def analysis(self, params):
+        return await self.request("POST", "/analise", {"params": list(params)})
+
+    async def status(self):
+        return await self.request("GET", "/estado")
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class ServiceClient:
+    """Cliente bloqueante (notebooks, scripts) com uma conexão persistente ao serviço."""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, timeout=30.0):
+        if socket_path:
+            self.connection = _UnixHTTPConnection(socket_path, timeout)
+        else:
+            self.connection = http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def request(self, method, path, body=None):
+        content = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"Content-Type": "application/json"} if content else {}
+        self.connection.request(method, path, content, headers)
+        response = self.connection.getresponse()
+        payload = json.loads(response.read())
+        if response.status != 200:
+            raise ValueError(payload.get("erro", f"HTTP {response.status}"))
+        return payload
+
+    def prediction(self, params):
+        return self.request("POST", "/previsao", {"params": list(params)})
+
+    def predictions(self, recipes):
+        return self.request("POST", "/previsao", {"receitas": [list(p) for p in recipes]})["resultados"]
+
+    def trajectory(self, params, step=1.0):
+        return self.request("POST", "/trajetoria", {"params": list(params), "passo": step})
+
+    def analysis(self, params):
+        return self.request("POST", "/analise", {"params": list(params)})
+
+    def status(self):
+        return self.request("GET", "/estado")
+
+    def close(self):
+        self.connection.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serviço local de simulação (HTTP/JSON)")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--porta", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--socket", default=None, help="Socket Unix (no lugar de host e porta)")
+    parser.add_argument("--janela", type=float, default=BATCH_WINDOW * 1000,
+                        help="Janela de agrupamento dos pedidos (ms)")
+    parser.add_argument("--lote", type=int, default=MAX_BATCH, help="Previsões por lote")
+    args = parser.parse_args(argv)
+    if args.janela < 0 or args.lote < 1:
+        sys.exit("Erro: --janela deve ser >= 0 e --lote >= 1.")
+
+    async def run():
+        service = SimulationService(args.janela / 1000.0, args.lote)
+        try:
+            server = await start_server(service, args.host, args.porta, args.socket)
+        except OSError as e:
+            sys.exit(f"Erro: {e}")
+        where = args.socket or f"http://{args.host}:{args.porta}"
+        print(f"Serviço de simulação em {where}", flush=True)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            service.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
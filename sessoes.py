@@ -0,0 +1,146 @@
+"""
+Várias simulações independentes num único processo (modo turma).
+
+Cada sessão (um aluno) tem os seus parâmetros, o seu relógio (velocidade,
+pausa) e o seu RunBuffer. SessionEngine.tick avança todas as sessões que
+estão rodando de uma vez: os instantes novos de todas são concatenados e o
+modelo vetorizado é chamado uma única vez por quadro, com os parâmetros de
+cada amostra escolhidos pelo índice da sessão. O custo por quadro cresce com
+o número de amostras novas, não com o número de sessões.
+
+Este módulo não importa pygame; o painel do professor fica em turma.py.
+"""
+import numpy as np
+
+from modelo import PARAM_NAMES, SIMULATION_OUTPUTS, classify_prediction, predict_batch, update_simulation_batch
+from dados import RunBuffer
+from relogio import SimulationClock
+
+SESSION_STEP = 1.0  # min; a mesma grade da simulação ao vivo
+MAX_SESSIONS = 200
+
+
+class Session:
+    """Uma simulação da turma: parâmetros, relógio, séries e a previsão do estado final."""
+
+    __slots__ = ("id", "name", "params", "clock", "run", "running", "final", "version")
+
+    def __init__(self, id, name, params, step=SESSION_STEP):
+        self.id = id
+        self.name = name
+        self.clock = SimulationClock(params[-1], step)
+        self.version = 0  # Muda quando a sessão recomeça (o painel limpa a miniatura)
+        self.set_params(params)
+
+    def set_params(self, params):
+        """Troca a receita e volta ao início (mantém a velocidade)."""
+        if len(params) != len(PARAM_NAMES):
+            raise ValueError(f"Uma receita tem {len(PARAM_NAMES)} parâmetros")
+        self.params = [float(v) for v in params]
+        out = predict_batch(np.array(self.params))
+        self.final = {name: float(out[name]) for name in ("volume", "ph", "retention")}
+        self.final["level"] = int(out["level"])
+        self.reset()
+
+    def reset(self):
+        self.clock.reset(self.params[-1])
+        self.run = RunBuffer.for_run(self.params[-1], self.clock.step)
+        self.running = False
+        self.version += 1
+
+    @property
+    def finished(self):
+        return self.clock.finished
+
+    @property
+    def progress(self):
+        return self.clock.time / self.clock.time_limit
+
+    def level(self):
+        """Índice em FEEDBACK_LEVELS do estado atual (ou None antes da primeira amostra)."""
+        if not len(self.run):
+            return None
+        return int(classify_prediction(self.params[0], self.run.last("ph"), self.run.last("volume"),
+                                       self.run.last("retention")))
+
+
+class SessionEngine:
+    """As sessões da turma, avançadas juntas num único passo vetorizado por quadro."""
+
+    def __init__(self, step=SESSION_STEP, max_sessions=MAX_SESSIONS):
+        self.step = step
+        self.max_sessions = max_sessions
+        self.sessions = []
+        self._next_id = 0
+        self.samples = 0  # Amostras calculadas no último tick
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def __iter__(self):
+        return iter(self.sessions)
+
+    def __getitem__(self, i):
+        return self.sessions[i]
+
+    def add(self, params, name=""):
+        """Cria uma sessão parada com a receita params (ordem dos sliders). Retorna a Session."""
+        if len(self.sessions) >= self.max_sessions:
+            raise ValueError(f"No máximo {self.max_sessions} sessões")
+        session = Session(self._next_id, name or f"Aluno {self._next_id + 1}", params, self.step)
+        self._next_id += 1
+        self.sessions.append(session)
+        return session
+
+    def remove(self, session):
+        self.sessions.remove(session)
+
+    def start(self, sessions=None):
+        """Põe para rodar as sessões dadas (padrão: todas); as terminadas recomeçam."""
+        for session in self.sessions if sessions is None else sessions:
+            if session.finished:
+                session.reset()
+            session.running = True
+
+    def pause(self, sessions=None):
+        for session in self.sessions if sessions is None else sessions:
+            session.running = False
+
+    def set_speed(self, speed, sessions=None):
+        for session in self.sessions if sessions is None else sessions:
+            session.clock.set_speed(speed)
+
+    def finish(self, sessions=None):
+        """Calcula de uma vez o restante das sessões dadas (padrão: todas)."""
+        targets = self.sessions if sessions is None else sessions
+        self._advance([(session, session.clock.jump_to_end()) for session in targets])
+
+    def tick(self, seconds):
+        """
+        Avança seconds de tempo real em todas as sessões rodando, cada uma na
+        sua velocidade. Retorna as sessões que ganharam amostras.
+        """
+        return self._advance([(session, session.clock.advance(seconds))
+                              for session in self.sessions if session.running])
+
+    def _advance(self, pending):
+        pending = [(session, times) for session, times in pending if len(times)]
+        for session, _ in pending:
+            if session.finished:
+                session.running = False
+        self.samples = sum(len(times) for _, times in pending)
+        if not pending:
+            return []
+        times = np.concatenate([times for _, times in pending])
+        counts = [len(times) for _, times in pending]
+        # Parâmetros de cada amostra: a linha da sua sessão
+        params = np.repeat(np.array([session.params for session, _ in pending]), counts, axis=0)
+        farina_g, water, temp, sugar_added, salt_g, _ = params.T
+        out = update_simulation_batch(times, temp, sugar_added, water, farina_g, salt_g)
+
+        start = 0
+        for (session, _), n in zip(pending, counts):
+            stop = start + n
+            session.run.extend(times[start:stop], {name: out[name][start:stop] for name in SIMULATION_OUTPUTS})
+            start = stop
+        return [session for session, _ in pending]
@@ -1,12 +1,24 @@
 import pygame
+import os
 import sys
 import numpy as np
 import matplotlib
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
 import random
 import time
-import pygame.gfxdraw # Importa gfxdraw (opcional)
+from collections import OrderedDict
+
+from modelo import (RECIPE_PARAMS, SENSITIVITY_FRACTION, update_simulation_batch, cached_prediction_feedback,
+                    quantize_params, slider_sensitivities)
+from dados import PARAM_SHORT_LABELS, RunBuffer, RunRecording, RunStore, save_run
+from bolhas import BubbleSystem
+from relogio import SimulationClock
+from graficos import LiveGraphs
+from graficos_nativos import NativeGraphs
+from relatorios import ReportCache, ReportPrerenderer, report_key
+from superficie import ResponseSurface
+from otimizador import optimize_recipe
+from incerteza import trajectory_bands, prediction_ranges
+from perfilador import FrameProfiler, FRAME_BUDGET_MS, HISTOGRAM_BIN_MS
 
 matplotlib.use("Agg")
 
@@ -52,13 +64,55 @@ COLORS = {
 FONT = pygame.font.SysFont("Arial", 18)
 TITLE_FONT = pygame.font.SysFont("Arial", 26, bold=True)
 LARGE_FONT = pygame.font.SysFont("Arial", 32, bold=True)
+DEBUG_FONT = pygame.font.SysFont("Arial", 16)
+
+# --------- Cache de textos renderizados ----------
+# font.render é caro e a maior parte dos textos se repete quadro a quadro.
+# Rótulos fixos (botões, títulos, fases, nomes dos campos) ficam guardados
+# para sempre; textos que mudam (valores numéricos, dicas) passam por um
+# cache LRU. As superfícies são compartilhadas: não desenhe sobre elas.
+TEXT_CACHE_SIZE = 512
+text_cache = OrderedDict()
+interned_texts = {}
+
+
+def intern_text(font, text, color, antialias=True):
+    """Superfície de um rótulo fixo (renderizada uma única vez)."""
+    key = (font, text, color, antialias)
+    surf = interned_texts.get(key)
+    if surf is None:
+        surf = interned_texts[key] = font.render(text, antialias, color)
+    return surf
+
+
+def render_text(font, text, color, antialias=True):
+    """font.render com cache LRU por (fonte, texto, cor, antialias)."""
+    key = (font, text, color, antialias)
+    surf = interned_texts.get(key)
+    if surf is not None:
+        return surf
+    surf = text_cache.get(key)
+    if surf is None:
+        surf = font.render(text, antialias, color)
+        text_cache[key] = surf
+        if len(text_cache) > TEXT_CACHE_SIZE:
+            text_cache.popitem(last=False)
+    else:
+        text_cache.move_to_end(key)
+    return surf
+
 
-# --------- Constantes Científicas ----------
-YEAST_GROWTH_RATE = 0.4  # h⁻¹ (Taxa de crescimento base da levedura)
+def draw_field(surface, font, label, value, pos, color, suffix=""):
+    """Desenha label + value + suffix em linha; só o valor é renderizado de novo."""
+    x, y = pos
+    for text, render in ((label, intern_text), (value, render_text), (suffix, intern_text)):
+        if text:
+            surf = render(font, text, color)
+            surface.blit(surf, (x, y))
+            x += surf.get_width()
 
 # --------- Estado global ----------
 state = "config"
-simulation_speed = 1.0
 simulation_finished = False
 mensagem_debug = ""
 
@@ -89,8 +143,11 @@ class Slider:
         self.handle_rect.x = self.rect.x + int(ratio * (self.rect.w - self.handle_w))
         self.handle_rect.y = self.rect.y
 
-    def draw(self, surface):
+    def draw_track(self, surface):
+        """Trilho do slider (parte estática, desenhada na camada de fundo)."""
         pygame.draw.rect(surface, GRAY, self.rect, border_radius=6)
+
+    def draw(self, surface):
         pygame.draw.rect(surface, BLUE, self.handle_rect, border_radius=6)
         # Visual feedback for hover/drag
         if self.dragging:
@@ -99,9 +156,7 @@ class Slider:
         elif self.hovered:
             pygame.draw.rect(surface, self._adjust_color(BLUE, 1.2), self.handle_rect, border_radius=6)
 
-        label_s = f"{self.label}: {self.value:.2f}"
-        txt = FONT.render(label_s, True, BLACK)
-        surface.blit(txt, (self.rect.x, self.rect.y - 22))
+        draw_field(surface, FONT, f"{self.label}: ", f"{self.value:.2f}", (self.rect.x, self.rect.y - 22), BLACK)
 
     def _adjust_color(self, color, factor):
         return tuple(min(255, int(c * factor)) for c in color)
@@ -128,13 +183,10 @@ class Slider:
         self.update_handle()
 
 # --------- Sliders ----------
+# Faixas e valores iniciais vêm de RECIPE_PARAMS (modelo.py); o último é o Tempo
 sliders = [
-    Slider(50, 200, 240, 20, 50, 1000, 1000, "Farinha (g)"),
-    Slider(50, 260, 240, 20, 0.3, 0.9, 0.68, "Água (fração)"),
-    Slider(50, 320, 240, 20, 15, 40, 30, "Temperatura (°C)"),
-    Slider(50, 380, 240, 20, 0, 100, 20, "Açúcar (g)"),
-    Slider(50, 440, 240, 20, 0, 30, 15, "Sal (g)"),
-    Slider(50, 500, 240, 20, 30, 1440, 240, "Tempo (min)") # ATUALIZADO
+    Slider(50, 200 + 60 * i, 240, 20, min_val, max_val, start_val, label)
+    for i, (_, min_val, max_val, start_val, label) in enumerate(RECIPE_PARAMS)
 ]
 
 
@@ -178,7 +230,7 @@ class ImprovedButton:
         pygame.draw.rect(surface, top_color, self.rect, border_radius=8)
         pygame.draw.rect(surface, self._adjust_color(top_color, 0.7), self.rect, 2, border_radius=8)
 
-        txt = FONT.render(self.text, True, self.text_color)
+        txt = intern_text(FONT, self.text, self.text_color)
         text_x = self.rect.centerx - txt.get_width()//2
         text_y = self.rect.centery - txt.get_height()//2
 
@@ -215,6 +267,11 @@ class TutorialSystem:
             self.current_tip = message
             self.tip_time = 0
             self.completed_steps.add(tip_key)
+
+    def show_message(self, message):
+        """Mostra uma mensagem na barra de dicas (pode repetir)."""
+        self.current_tip = message
+        self.tip_time = 0
             
     def update(self):
         if self.current_tip:
@@ -230,7 +287,7 @@ class TutorialSystem:
             surface.blit(s, (0, HEIGHT - 60))
             
             # Texto da dica
-            tip_text = FONT.render(self.current_tip, True, WHITE)
+            tip_text = render_text(FONT, self.current_tip, WHITE)
             surface.blit(tip_text, (WIDTH//2 - tip_text.get_width()//2, HEIGHT - 40))
 
 # --------- Gerenciador de Telas ----------
@@ -249,76 +306,198 @@ class ScreenManager:
 
 # --------- Botões ----------
 start_button = ImprovedButton(50, 560, 100, 36, "Start", GREEN)
+optimize_button = ImprovedButton(170, 560, 120, 36, "Otimizar", COLORS["primary"]) # Tela de configuração
+replay_button = ImprovedButton(310, 560, 100, 36, "Replay", COLORS["primary"]) # Abre a última gravação
 pause_button = ImprovedButton(170, 560, 100, 36, "Pause", RED)
 reset_button = ImprovedButton(290, 560, 100, 36, "Reset", BLUE)
-voltar_button = ImprovedButton(320, 610, 140, 30, "Voltar", RED) # Usado na simulação
-
-# Botões de velocidade
-speed_1x_button = ImprovedButton(50, 610, 80, 30, "1x", COLORS["primary"])
-speed_2x_button = ImprovedButton(140, 610, 80, 30, "2x", COLORS["primary"])
-speed_5x_button = ImprovedButton(230, 610, 80, 30, "5x", COLORS["primary"])
+voltar_button = ImprovedButton(335, 610, 80, 30, "Voltar", RED) # Usado na simulação
+
+# Botões de velocidade (teclas + e - dobram/dividem; End pula para o fim)
+speed_buttons = [
+    (ImprovedButton(50, 610, 45, 30, "1x", COLORS["primary"]), 1.0),
+    (ImprovedButton(100, 610, 50, 30, "10x", COLORS["primary"]), 10.0),
+    (ImprovedButton(155, 610, 55, 30, "100x", COLORS["primary"]), 100.0),
+    (ImprovedButton(215, 610, 60, 30, "1000x", COLORS["primary"]), 1000.0),
+]
+end_button = ImprovedButton(280, 610, 45, 30, "Fim", COLORS["primary"])
 
 ver_relatorio_button = ImprovedButton(120, 600, 160, 40, "Ver Relatório", COLORS["success"])
+pin_button = ImprovedButton(10, 600, 100, 40, "Fixar", COLORS["primary"])  # Fixa a simulação para comparação
+
+# --------- Renderização por retângulos sujos ----------
+# As partes fixas de cada tela (fundo, título, trilhos dos sliders, bacia,
+# trilho da barra de progresso e rótulos das fases) são desenhadas uma vez em
+# camadas estáticas. A cada quadro só as regiões que mudaram são recompostas a
+# partir da camada e enviadas com pygame.display.update(retângulos).
+# False volta ao modo antigo (tela inteira redesenhada e flip a cada quadro).
+DIRTY_RECT_RENDERING = True
+
+GRAPH_RECT = pygame.Rect(420, 30, 800, 600)     # Gráficos ao vivo
+VISUAL_RECT = pygame.Rect(0, 150, 420, 410)     # Massa, bolhas, curiosidade, barra de progresso e indicadores
+NOTICE_RECT = pygame.Rect(((WIDTH - 400) // 2) - 355, ((HEIGHT - 100) // 2) - 250, 400, 100)
+TUTORIAL_RECT = pygame.Rect(0, HEIGHT - 60, WIDTH, 60)
+PANEL_RECT = pygame.Rect(420, 100, 760, 220)    # Painel de previsão (configuração)
+SENSITIVITY_RECT = pygame.Rect(420, 335, 760, 220)  # Sensibilidades (configuração)
+SLIDERS_RECT = pygame.Rect(40, sliders[0].rect.y - 24, 370,
+                           sliders[-1].rect.bottom - sliders[0].rect.y + 32)
+# Botões (com folga para o deslocamento de 2 px do clique)
+CONFIG_CONTROLS_RECT = start_button.rect.unionall([optimize_button.rect, replay_button.rect]).inflate(6, 8)
+SIMULATION_CONTROLS_RECT = start_button.rect.unionall([
+    pause_button.rect, reset_button.rect, voltar_button.rect, end_button.rect, ver_relatorio_button.rect,
+    pin_button.rect]
+    + [button.rect for button, _ in speed_buttons]).inflate(6, 8)
+
+BASIN_RECT = pygame.Rect(75, 200, 340, 220)  # Bacia da massa
+PROGRESS_Y = 490                             # Barra de progresso
+PROGRESS_RECT = pygame.Rect(75, PROGRESS_Y, 340, 20)  # Área clicável da barra (busca no replay)
+PHASE_MARKERS = [
+    ("Adaptação", 0.0, RED),
+    ("Crescimento", 0.3, ORANGE),
+    ("Pico", 0.6, GREEN),
+    ("Declínio", 1.0, BLUE)
+]
+
+static_layers = {}
+progress_layer = None
+
+
+def _paint_config_layer(layer):
+    layer.blit(TITLE_FONT.render("Configuração da Simulação", True, COLORS["text"]), (40, 36))
+    for s in sliders:
+        s.draw_track(layer)
+
+
+def _paint_simulation_layer(layer):
+    pygame.draw.ellipse(layer, DARK_GRAY, BASIN_RECT, 6)
+
+
+STATIC_LAYER_PAINTERS = {"config": _paint_config_layer, "simulacao": _paint_simulation_layer}
+
+
+def get_static_layer(name):
+    """Fundo pré-renderizado (tela inteira) da tela name."""
+    layer = static_layers.get(name)
+    if layer is None:
+        layer = pygame.Surface((WIDTH, HEIGHT))
+        layer.fill(COLORS["background"])
+        STATIC_LAYER_PAINTERS[name](layer)
+        static_layers[name] = layer
+    return layer
+
+
+def get_progress_layer():
+    """Trilho da barra de progresso e rótulos das fases, a partir de (0, PROGRESS_Y - 25)."""
+    global progress_layer
+    if progress_layer is None:
+        progress_layer = pygame.Surface((WIDTH // 2, 50), pygame.SRCALPHA)
+        pygame.draw.rect(progress_layer, GRAY, (75, 25, 340, 20), border_radius=4)
+        for phase, pos, color in PHASE_MARKERS:
+            marker_x = 75 + int(340 * pos)
+            phase_text = FONT.render(phase, True, color)
+            progress_layer.blit(phase_text, (marker_x - phase_text.get_width()//2, 0))
+    return progress_layer
+
+# --------- Gráficos ao vivo ----------
+# "nativo": desenhados direto com pygame (mais leve); "matplotlib": figura persistente.
+# O relatório final continua usando Matplotlib.
+LIVE_GRAPH_RENDERER = "nativo"
+live_graphs = NativeGraphs() if LIVE_GRAPH_RENDERER == "nativo" else LiveGraphs()
 
 # --------- Simulação / dados ----------
 running_simulation = False
 paused = False
 sim_time = 0.0  
 
-time_data = []
-data_biom = []
-data_sucrose = [] 
-data_maltose = []
-data_gluten_retention = [] 
-data_co2 = []
-data_volume = []
-data_ph = []
-data_etoh = []
-data_prot = [] 
+# Passo fixo das amostras (min), independente da velocidade e da taxa de quadros
+SIMULATION_STEP = 1.0
+sim_clock = SimulationClock(sliders[-1].value, SIMULATION_STEP)
+frame_seconds = 0.0  # Duração real do último quadro
+
+# Séries da simulação atual (tempo + 8 saídas do modelo) em um bloco NumPy
+run_data = RunBuffer()
+
+# Gravações: cada simulação terminada é salva em RECORDINGS_DIR e pode ser
+# reaberta (botão Replay ou "python simulador.py arquivo.run") sem rodar o modelo
+RECORDINGS_DIR = "gravacoes"
+AUTO_SAVE_RUNS = True
+replay = None        # RunRecording em reprodução (None: simulação ao vivo)
+scrubbing = False    # Arrastando a barra de progresso no replay
+
+# Modo de comparação: simulações fixadas (botão Fixar ou tecla F; L limpa)
+# aparecem sobrepostas nos gráficos ao vivo e no gráfico do relatório
+pinned_runs = RunStore()
+
+# Relatórios da tela de resultados: desenhados numa thread desde o início da
+# simulação (o modelo é determinístico) e guardados por receita em memória e
+# em REPORT_CACHE_DIR (None: só em memória)
+REPORT_CACHE_DIR = "relatorios_cache"
+PRERENDER_REPORTS = True
+report_cache = ReportCache(REPORT_CACHE_DIR)
+report_prerenderer = ReportPrerenderer(report_cache)
+
+# Incerteza das constantes do modelo (incerteza.py): bandas de percentis 5–95
+# nos gráficos ao vivo e faixas no painel de previsão
+SHOW_UNCERTAINTY = True
+
+# Gráfico de sensibilidade (derivadas exatas do modelo) abaixo do painel de previsão
+SHOW_SENSITIVITY = True
 
 # Variável para controlar debug
 show_debug = False
 
 # Função de debug
-def debug_text(text, x=10, y=10, color=(255, 0, 0)):
-    debug_font = pygame.font.SysFont("Arial", 16)
-    text_surface = debug_font.render(str(text), True, color)
-    screen.blit(text_surface, (x, y))
+def debug_text(text, x=10, y=10, color=(255, 0, 0), value=None):
+    # Com value, text é o rótulo fixo e só o valor é renderizado de novo
+    if value is None:
+        screen.blit(render_text(DEBUG_FONT, str(text), color), (x, y))
+    else:
+        draw_field(screen, DEBUG_FONT, text, str(value), (x, y), color)
 
 # --------- Bolhas de fermentação ----------
-bubbles = []
-def add_bubble():
-    x = random.randint(95, 385) 
-    y = 370 # Posição inicial no fundo
-    size = random.randint(2, 6) # Bolhas menores
-    speed = random.uniform(1.0, 2.5)
-    bubbles.append({"x": x, "y": y, "size": size, "speed": speed})
-
-def update_bubbles():
-    for b in bubbles[:]:
-        b["y"] -= b["speed"]
-        b["size"] += 0.1 
-        # Some se sair da tela ou atingir o tamanho máximo (8)
-        if b["y"] < 220 or b["size"] > 8: 
-            bubbles.remove(b)
+# Partículas em arrays NumPy; a emissão acompanha a produção de CO₂ (bolhas.py)
+bubbles = BubbleSystem()
 
 # --------- Funções de fermentação ----------
 def reset_simulation():
-    global time_data, data_biom, data_sucrose, data_maltose, data_gluten_retention, data_co2, data_volume, data_ph, data_etoh, data_prot, running_simulation, paused, sim_time, simulation_finished
-    time_data = []
-    data_biom = []
-    data_sucrose = []
-    data_maltose = []
-    data_gluten_retention = [] 
-    data_co2 = []
-    data_volume = []
-    data_ph = []
-    data_etoh = []
-    data_prot = []
+    global run_data, running_simulation, paused, sim_time, simulation_finished, replay, scrubbing
+    replay = None
+    scrubbing = False
+    # Pré-aloca para a duração escolhida (o passo das amostras é fixo)
+    run_data = RunBuffer.for_run(sliders[-1].value, SIMULATION_STEP)
+    sim_clock.reset(sliders[-1].value, SIMULATION_STEP)
     running_simulation = False
     paused = False
     sim_time = 0.0
     simulation_finished = False 
+    params = [s.value for s in sliders]
+    live_graphs.reset(sliders[-1].value, trajectory_bands(params) if SHOW_UNCERTAINTY else None, pinned_runs)
+    bubbles.clear()
+
+def pin_current_run():
+    """Fixa a simulação atual (até onde ela foi) para comparação com as próximas."""
+    global drawn_run
+    try:
+        pinned = pinned_runs.pin(run_data, [s.value for s in sliders])
+    except ValueError as e:
+        tutorial_system.show_message(f"{e}.")
+        return
+    # Só os gráficos são refeitos; a simulação atual continua onde está
+    live_graphs.reset(live_graphs.time_limit, live_graphs.bands, pinned_runs)
+    drawn_run = None
+    if simulation_finished:
+        prerender_report()  # O relatório passa a incluir a simulação fixada
+    tutorial_system.show_message(f"Simulação fixada: {pinned.label} ({len(pinned_runs)}/{pinned_runs.max_runs}). "
+                                 "Tecla L limpa as fixadas.")
+
+def clear_pinned_runs():
+    global drawn_run
+    if len(pinned_runs):
+        pinned_runs.clear()
+        live_graphs.reset(live_graphs.time_limit, live_graphs.bands, pinned_runs)
+        drawn_run = None
+        if simulation_finished:
+            prerender_report()
+        tutorial_system.show_message("Simulações fixadas removidas.")
 
 def draw_finish_notice(surface):
     """Desenha um aviso de 'Simulação Concluída' sobre a tela."""
@@ -330,104 +509,17 @@ def draw_finish_notice(surface):
     pygame.draw.rect(s, (255, 255, 255, 200), s.get_rect(), 2, border_radius=10)
     
     # Textos
-    title_text = TITLE_FONT.render("Simulação Concluída", True, WHITE)
-    info_text = FONT.render("Clique em 'Ver Relatório' para os resultados.", True, WHITE)
+    title_text = intern_text(TITLE_FONT, "Simulação Concluída", WHITE)
+    info_text = intern_text(FONT, "Clique em 'Ver Relatório' para os resultados.", WHITE)
     
     # Posição centralizada
-    s_x = ((WIDTH - 400) // 2) - 355
-    s_y = ((HEIGHT - 100) // 2) - 250
+    s_x, s_y = NOTICE_RECT.topleft
     
     surface.blit(s, (s_x, s_y))
     surface.blit(title_text, (s_x + (400 - title_text.get_width()) // 2, s_y + 20))
     surface.blit(info_text, (s_x + (400 - info_text.get_width()) // 2, s_y + 55))
 
 
-def update_simulation(t, temp, sugar_added, water, farina_g, salt_g):
-    """
-    Modelo de simulação "state-at-time-t" com consumo sequencial E cálculo de glúten.
-    """
-
-    # --- 1. Definição de Parâmetros Biológicos ---
-    Y_X_S = 0.1; Y_E_S = 0.45; Y_C_S = 0.45
-    MALT_FROM_STARCH = 0.05
-    K_PROD_MALTOSE = 0.3; K_CONS_SUCROSE = 0.8; K_CONS_MALTOSE = 0.5
-    N0 = 0.5; t_horas = t / 60.0
-
-    # --- 2. Cálculo dos Fatores Ambientais ---
-    optimal_temp = 30.0; width_low = 15.0; width_high = 7.0
-    if temp < optimal_temp:
-        temp_factor = np.exp(-0.5 * ((temp - optimal_temp) / width_low)**2)
-    else:
-        temp_factor = np.exp(-0.5 * ((temp - optimal_temp) / width_high)**2)
-    temp_factor = max(0.01, temp_factor)
-
-    water_factor = max(0.01, 1.0 - abs(water - 0.68) * 0.8)
-
-    salt_percentage = salt_g / (farina_g + 1)
-    salt_k_inhib = 23.0
-    salt_factor = max(0.01, np.exp(-salt_k_inhib * salt_percentage))
-    
-    env_factor = temp_factor * water_factor * salt_factor
-
-    # --- 3. Cálculo dos Açúcares (Modelo Sequencial) ---
-    k_cons_suc = K_CONS_SUCROSE * env_factor
-    sucrose_remaining = sugar_added * np.exp(-k_cons_suc * t_horas)
-
-    k1 = K_PROD_MALTOSE * env_factor
-    inhibition_factor = max(0.01, (sucrose_remaining / (sugar_added + 1e-6))**2)
-    k2 = K_CONS_MALTOSE * env_factor * (1.0 - inhibition_factor)
-    
-    starch_potential = farina_g * MALT_FROM_STARCH
-    k_diff = k2 - k1 + 1e-6
-    
-    maltose_at_t = starch_potential * (k1 / k_diff) * (np.exp(-k1 * t_horas) - np.exp(-k2 * t_horas))
-    maltose_at_t = max(0, maltose_at_t)
-
-    # --- 4. Cálculo dos Outros Produtos (Biomassa, CO2, etc.) ---
-    total_sugar_potential = sugar_added + (farina_g * MALT_FROM_STARCH)
-    K = max(N0 + 0.1, total_sugar_potential * Y_X_S)
-    
-    K_s_sugar = 10.0
-    sugar_factor = total_sugar_potential / (K_s_sugar + total_sugar_potential)
-    r = YEAST_GROWTH_RATE * sugar_factor * env_factor
-    
-    biom = K / (1 + ((K - N0)/N0) * np.exp(-r * t_horas))
-    
-    biomass_produced = biom - N0
-    total_sugar_consumed = min(total_sugar_potential, biomass_produced / Y_X_S)
-    
-    sugar_for_fermentation = total_sugar_consumed * (Y_C_S + Y_E_S)
-    co2 = sugar_for_fermentation * (Y_C_S / (Y_C_S + Y_E_S))
-    etanol = sugar_for_fermentation * (Y_E_S / (Y_C_S + Y_E_S))
-
-    base_volume = farina_g * 0.8
-    
-    volume = base_volume + co2 * 300 * (1 - np.exp(-t/180.0))
-    
-    acid_production = 0.015 * biom * (1 - np.exp(-t/120.0))
-    ph = max(3.8, 5.6 - acid_production)
-
-    # --- 5. CÁLCULO DA RETENÇÃO DE GLÚTEN ---
-    retention = 100.0 # Começa em 100%
-
-    # Efeito do Sal: Ótimo em 2%
-    retention += (np.exp(-0.5 * ((salt_percentage - 0.02) / 0.01)**2) - 0.5) * 20 # Bônus/pênalti de +/- 10%
-    
-    # Efeito da Água: Ótimo em 70%
-    retention -= abs(water - 0.70) * 30 # Pênalti por se afastar de 70%
-    
-    # Efeito do Ácido (pH): Degrada abaixo de 4.5
-    retention -= max(0, (4.5 - ph)) * 40 # Pênalti forte por acidez
-    
-    # Efeito do Etanol: Degrada o glúten
-    retention -= (etanol / (farina_g + 1)) * 300 # Pênalti por etanol
-    
-    # Limita o valor entre 5% e 98%
-    retention = max(5.0, min(98.0, retention))
-
-    # Retorna 8 valores
-    return biom, sucrose_remaining, maltose_at_t, co2, volume, ph, etanol, retention
-
 def draw_prediction_panel(surface, x, y, width, height, prediction):
     """
     Desenha o painel de feedback em tempo real na tela de configuração.
@@ -438,37 +530,169 @@ def draw_prediction_panel(surface, x, y, width, height, prediction):
     pygame.draw.rect(surface, COLORS["text"], panel_rect, 1, border_radius=10)
     
     # Título
-    title_text = FONT.render("Painel de Previsão (Tempo Real)", True, COLORS["text"])
+    title_text = intern_text(FONT, "Painel de Previsão (Tempo Real)", COLORS["text"])
     surface.blit(title_text, (x + 20, y + 15))
     
     # Linha divisória
     pygame.draw.line(surface, GRAY, (x + 15, y + 45), (x + width - 15, y + 45), 1)
     
     # Métricas
-    ph_text = FONT.render(f"pH Final Estimado: {prediction['ph']:.2f}", True, COLORS["text"])
-    vol_text = FONT.render(f"Volume Final Estimado: {prediction['volume']:.0f} mL", True, COLORS["text"])
-    ret_text = FONT.render(f"Retenção Glúten (Final): {prediction['retention']:.1f}%", True, COLORS["text"])
-    
-    surface.blit(ph_text, (x + 20, y + 60))
-    surface.blit(vol_text, (x + 20, y + 85))
-    surface.blit(ret_text, (x + 20, y + 110))
+    draw_field(surface, FONT, "pH Final Estimado: ", f"{prediction['ph']:.2f}", (x + 20, y + 60), COLORS["text"])
+    draw_field(surface, FONT, "Volume Final Estimado: ", f"{prediction['volume']:.0f}", (x + 20, y + 85),
+               COLORS["text"], " mL")
+    draw_field(surface, FONT, "Retenção Glúten (Final): ", f"{prediction['retention']:.1f}", (x + 20, y + 110),
+               COLORS["text"], "%")
+
+    # Faixas de incerteza (percentis 5–95 das constantes do modelo)
+    ranges = prediction.get("ranges")
+    if ranges:
+        for row, (key, fmt) in enumerate((("ph", "{:.2f}"), ("volume", "{:.0f}"), ("retention", "{:.1f}"))):
+            lo, hi = ranges[key]
+            draw_field(surface, FONT, "faixa 90%: ", f"{fmt.format(lo)} – {fmt.format(hi)}",
+                       (x + 330, y + 60 + 25 * row), DARK_GRAY)
     
     # Feedback Qualitativo
-    feedback_title = FONT.render("Análise:", True, prediction['color'])
-    feedback_s = FONT.render(prediction['feedback'], True, prediction['color'])
+    feedback_color = COLORS[prediction['level']]
+    feedback_title = intern_text(FONT, "Análise:", feedback_color)
+    feedback_s = intern_text(FONT, prediction['feedback'], feedback_color)
     
     surface.blit(feedback_title, (x + 20, y + 145))
     surface.blit(feedback_s, (x + 20, y + 170))
 
+# Superfície de resposta pré-calculada (superficie.py) para o painel de previsão.
+# None usa o modelo exato; ex.: "superficie_resposta" usa a tabela (se válida).
+RESPONSE_SURFACE_PATH = None
+response_surface = None
+if RESPONSE_SURFACE_PATH:
+    try:
+        response_surface = ResponseSurface.load(RESPONSE_SURFACE_PATH)
+    except (OSError, ValueError, KeyError):
+        response_surface = None # Tabela ausente ou desatualizada: usa o modelo exato
+
+# Painéis de previsão já desenhados, por parâmetros quantizados (LRU pequeno:
+# cada superfície tem ~0.7 MB)
+PANEL_CACHE_SIZE = 16
+prediction_panel_cache = OrderedDict()
+
+def get_prediction_panel(params, width, height):
+    """
+    Retorna a superfície do painel de previsão para os parâmetros dados.
+    A previsão e o desenho só são refeitos quando os sliders mudam de valor.
+    """
+    key = quantize_params(params)
+    panel = prediction_panel_cache.get(key)
+    if panel is not None:
+        prediction_panel_cache.move_to_end(key)
+        return panel
+
+    panel = pygame.Surface((width, height), pygame.SRCALPHA)
+    if response_surface is not None:
+        prediction = response_surface.predict_feedback(params)
+    else:
+        prediction = cached_prediction_feedback(params)
+    if SHOW_UNCERTAINTY:
+        prediction = dict(prediction, ranges=prediction_ranges(params))
+    draw_prediction_panel(panel, 0, 0, width, height, prediction)
+    prediction_panel_cache[key] = panel
+    if len(prediction_panel_cache) > PANEL_CACHE_SIZE:
+        prediction_panel_cache.popitem(last=False)
+    return panel
+
+# Colunas do gráfico de sensibilidade: (saída, título, formato do efeito)
+SENSITIVITY_COLUMNS = (
+    ("volume", "Volume (mL)", "{:+.0f}"),
+    ("ph", "pH", "{:+.3f}"),
+    ("retention", "Retenção Glúten (%)", "{:+.1f}"),
+)
+SENSITIVITY_LABELS = [name for name, _ in PARAM_SHORT_LABELS]
+
+
+def draw_sensitivity_panel(surface, x, y, width, height, effects):
+    """
+    Gráfico de barras das sensibilidades na tela de configuração: para cada
+    saída, os sliders ordenados pelo efeito de movê-los SENSITIVITY_FRACTION
+    da faixa (azul: aumenta; laranja: diminui).
+    """
+    panel_rect = pygame.Rect(x, y, width, height)
+    pygame.draw.rect(surface, COLORS["panel"], panel_rect, border_radius=10)
+    pygame.draw.rect(surface, COLORS["text"], panel_rect, 1, border_radius=10)
+    title = f"Sensibilidade: efeito de +{SENSITIVITY_FRACTION:.0%} da faixa de cada slider"
+    surface.blit(intern_text(FONT, title, COLORS["text"]), (x + 20, y + 15))
+    pygame.draw.line(surface, GRAY, (x + 15, y + 45), (x + width - 15, y + 45), 1)
+
+    column_w = (width - 40) // 3
+    label_w, value_w = 62, 64
+    bar_max = column_w - label_w - value_w - 16
+    for k, (key, title, fmt) in enumerate(SENSITIVITY_COLUMNS):
+        cx = x + 20 + k * column_w
+        surface.blit(intern_text(DEBUG_FONT, title, COLORS["text"]), (cx, y + 52))
+        values = effects[key]
+        texts = [fmt.format(v) for v in values]
+        # Efeitos que arredondam a zero (ex.: retenção no limite de 98%) não ganham barra
+        values = np.where([float(t) == 0 for t in texts], 0.0, values)
+        scale = np.abs(values).max()
+        for row, i in enumerate(np.argsort(-np.abs(values), kind="stable")):
+            row_y = y + 76 + row * 22
+            surface.blit(intern_text(DEBUG_FONT, SENSITIVITY_LABELS[i], COLORS["text"]), (cx, row_y))
+            if values[i]:
+                bar_w = max(1, int(round(bar_max * abs(values[i]) / scale)))
+                color = COLORS["primary"] if values[i] > 0 else ORANGE
+                pygame.draw.rect(surface, color, (cx + label_w, row_y + 3, bar_w, 14), border_radius=3)
+            text = texts[i] if values[i] else "0"
+            surface.blit(render_text(DEBUG_FONT, text, DARK_GRAY), (cx + label_w + bar_max + 8, row_y))
+
+
+# Gráficos de sensibilidade já desenhados, pelos mesmos parâmetros quantizados do painel
+sensitivity_panel_cache = OrderedDict()
+
+def get_sensitivity_panel(params, width, height):
+    """Superfície do gráfico de sensibilidade; só é refeita quando os sliders mudam de valor."""
+    key = quantize_params(params)
+    panel = sensitivity_panel_cache.get(key)
+    if panel is not None:
+        sensitivity_panel_cache.move_to_end(key)
+        return panel
+
+    panel = pygame.Surface((width, height), pygame.SRCALPHA)
+    draw_sensitivity_panel(panel, 0, 0, width, height, slider_sensitivities(params))
+    sensitivity_panel_cache[key] = panel
+    if len(sensitivity_panel_cache) > PANEL_CACHE_SIZE:
+        sensitivity_panel_cache.popitem(last=False)
+    return panel
+
+def update_educational_fact():
+    """
+    Sorteia/expira a curiosidade mostrada acima da bacia.
+    Retorna True se ela apareceu ou sumiu neste quadro.
+    """
+    global current_fact, fact_display_time
+    if current_fact is None:
+        if random.random() < 0.005 and len(run_data) > 10: 
+            facts = [
+                "As leveduras consomem açúcar e produzem CO₂!",
+                "O CO₂ faz a massa crescer formando bolhas.",
+                "O sal controla a levedura e fortalece o glúten.",
+                "Acidez excessiva (pH baixo) degrada o glúten!",
+                "A temperatura ideal para a levedura é ~30°C.",
+                "Muita água pode deixar o glúten fraco."
+            ]
+            current_fact = random.choice(facts)
+            fact_display_time = 0
+            return True
+        return False
+
+    fact_display_time += 1
+    if fact_display_time > FACT_DURATION:
+        current_fact = None
+        return True
+    return False
+
+
 def draw_educational_visual(progress):
     """Desenha visualização com elementos educacionais"""
 
-    # --- Dimensões e Posições da "Bacia" ---
-    basin_rect = pygame.Rect(75, 200, 340, 220) # Retângulo para a bacia
-    basin_color = DARK_GRAY
-    
-    # Base da bacia (oval)
-    pygame.draw.ellipse(screen, basin_color, basin_rect, 6)
+    # A bacia (oval) já está na camada estática da tela
+    basin_rect = BASIN_RECT
     
     # --- CÁLCULO DE CRESCIMENTO ---
     farinha_g = sliders[0].value
@@ -479,7 +703,7 @@ def draw_educational_visual(progress):
     
     # 2. Volume Atual
     # Pega o último valor de volume calculado pela simulação.
-    current_volume = data_volume[-1] if data_volume else initial_base_volume
+    current_volume = run_data.last("volume", initial_base_volume)
     
     # 3. Volume Máximo (Visual)
     # teto visual fixo. 120% de crescimento (2.2 * base)
@@ -517,332 +741,73 @@ def draw_educational_visual(progress):
     screen.blit(shadow_surf, shadow_rect.topleft)
 
     # --- Bolhas de CO₂ Flutuando DENTRO da Massa ---
-    for b in bubbles:
-        if dough_x < b["x"] < dough_x + dough_width and dough_y < b["y"] < dough_y + dough_height:
-            try:
-                pygame.gfxdraw.aacircle(screen, int(b["x"]), int(b["y"]), int(b["size"]), (255, 255, 255, 150))
-                pygame.gfxdraw.filled_circle(screen, int(b["x"]), int(b["y"]), int(b["size"]), (255, 255, 255, 150))
-            except (AttributeError, ImportError):
-                pygame.draw.circle(screen, (255, 255, 255, 150), (int(b["x"]), int(b["y"])), int(b["size"]))
+    bubbles.draw(screen, dough_bottom_rect)
 
 
     # --- Texto educacional flutuante ---
-    global current_fact, fact_display_time
-    if current_fact is None and random.random() < 0.005 and len(data_co2) > 10: 
-        facts = [
-            "As leveduras consomem açúcar e produzem CO₂!",
-            "O CO₂ faz a massa crescer formando bolhas.",
-            "O sal controla a levedura e fortalece o glúten.",
-            "Acidez excessiva (pH baixo) degrada o glúten!",
-            "A temperatura ideal para a levedura é ~30°C.",
-            "Muita água pode deixar o glúten fraco."
-        ]
-        current_fact = random.choice(facts)
-        fact_display_time = 0
-
     if current_fact:
-        fact_display_time += 1
-        fact_text = FONT.render(current_fact, True, COLORS["text"])
+        fact_text = intern_text(FONT, current_fact, COLORS["text"])
         
         fact_x = basin_rect.centerx - fact_text.get_width() // 2
         fact_y = basin_rect.top - fact_text.get_height() - 10
         screen.blit(fact_text, (fact_x, fact_y))
-        
-        if fact_display_time > FACT_DURATION:
-            current_fact = None
             
     # --- Informações em tempo real com destaque visual ---
-    y0 = 490
-    if len(time_data) > 0:
-        pygame.draw.rect(screen, GRAY, (75, y0, 340, 20), border_radius=4)
+    y0 = PROGRESS_Y
+    if len(run_data) > 0:
+        # Trilho e rótulos das fases vêm prontos; só a parte preenchida e as marcas mudam
+        screen.blit(get_progress_layer(), (0, y0 - 25))
         pygame.draw.rect(screen, BLUE, (75, y0+5, int(340 * progress), 12), border_radius=8)
         
-        phase_markers = [
-            ("Adaptação", 0.0, RED),
-            ("Crescimento", 0.3, ORANGE),
-            ("Pico", 0.6, GREEN),
-            ("Declínio", 1.0, BLUE)
-        ]
-        
-        for phase, pos, color in phase_markers:
+        for phase, pos, color in PHASE_MARKERS:
             marker_x = 75 + int(340 * pos)
             pygame.draw.line(screen, color, (marker_x, y0 - 5), (marker_x, y0 + 25), 2)
-            phase_text = FONT.render(phase, True, color)
-            screen.blit(phase_text, (marker_x - phase_text.get_width()//2, y0 - 25))
             
+        # (rótulo, valor, unidade, x, y): só os valores são renderizados a cada quadro
         indicators = [
-            (f"Tempo: {time_data[-1]:.1f} min", 75, y0 + 30),
-            (f"pH: {data_ph[-1]:.2f}", 200, y0 + 30),
-            (f"CO₂: {data_co2[-1]:.2f} g", 325, y0 + 30),
-            (f"Volume: {data_volume[-1]:.2f} mL", 75, y0 + 50),
-            (f"Retenção Glúten: {data_gluten_retention[-1]:.1f}%", 200, y0 + 50)
+            ("Tempo: ", f"{run_data.last('time'):.1f}", " min", 75, y0 + 30),
+            ("pH: ", f"{run_data.last('ph'):.2f}", "", 200, y0 + 30),
+            ("CO₂: ", f"{run_data.last('co2'):.2f}", " g", 325, y0 + 30),
+            ("Volume: ", f"{run_data.last('volume'):.2f}", " mL", 75, y0 + 50),
+            ("Retenção Glúten: ", f"{run_data.last('retention'):.1f}", "%", 200, y0 + 50)
         ]
             
-        for text, x, y in indicators:
-            txt = FONT.render(text, True, BLACK)
-            screen.blit(txt, (x, y))
-
-
-def get_prediction_feedback(params):
-    """
-    Calcula o estado final com base nos parâmetros atuais e retorna os dados e um feedback.
-    """
-    # Extrai os parâmetros dos sliders
-    farina_g = params[0]
-    water = params[1]
-    temp = params[2]
-    sugar_added = params[3]
-    salt_g = params[4]
-    time_limit = params[5] # Tempo final
-    
-    # Chama a simulação UMA VEZ para o tempo final
-    biom, suc, malt, co2v, vol, phv, etoh, ret = update_simulation(time_limit, temp, sugar_added, water, farina_g, salt_g)
-    
-    # --- LÓGICA DE COMPARAÇÃO ---
-    # O volume inicial da massa é aprox. 80% do peso da farinha
-    base_volume = farina_g * 0.8 
-    
-    # --- Gera o Feedback Qualitativo ---
-    feedback_text = ""
-    color = COLORS["success"] # Verde por padrão
-    
-    # 1. Checagem de perigo (acidez/degradação)
-    if phv < 4.1 or ret < 60:
-        feedback_text = "Aviso: Risco de massa ácida e glúten degradado."
-        color = COLORS["error"] # Vermelho
-    
-    # 2. Checagem de crescimento (baseado no volume relativo)
-    elif vol > (base_volume * 2.2): # Cresceu mais que 120% (ex: 800mL -> > 1760mL)
-        feedback_text = "Bom Volume final: Parâmetros parecem equilibrados."
-        color = COLORS["success"]
-    elif vol > (base_volume * 1.7): # Cresceu mais que 70% (ex: 800mL -> > 1360mL)
-        feedback_text = "OK: Fermentação moderada."
-        color = COLORS["primary"]
-    else: # Cresceu menos de 70%
-        feedback_text = "Crescimento Lento: Verifique sal, temperatura ou tempo."
-        color = COLORS["warning"] # Laranja
-
-    return {
-        "ph": phv,
-        "volume": vol,
-        "retention": ret,
-        "feedback": feedback_text,
-        "color": color
-    }
-
+        for label, value, unit, x, y in indicators:
+            draw_field(screen, FONT, label, value, (x, y), BLACK, unit)
 
 
 def create_improved_graphs():
-    """Cria gráficos com melhor formatação e informações"""
-    fig = plt.figure(figsize=(8, 6), dpi=100)
-    
-    ax1 = plt.subplot2grid((3, 2), (0, 0))
-    ax2 = plt.subplot2grid((3, 2), (0, 1))
-    ax3 = plt.subplot2grid((3, 2), (1, 0)) 
-    ax4 = plt.subplot2grid((3, 2), (1, 1))
-    ax5 = plt.subplot2grid((3, 2), (2, 0))
-    ax6 = plt.subplot2grid((3, 2), (2, 1)) 
-    
-    plots = [
-        (ax1, data_ph, "pH", "blue", "pH"),
-        (ax2, data_biom, "Crescimento de Leveduras", "green", "g/L"),
-        (ax3, data_sucrose, "Açúcares", "orange", "g"), 
-        (ax4, data_co2, "Produção de CO₂", "red", "g"),
-        (ax5, data_volume, "Volume da Massa", "purple", "mL"),
-        (ax6, data_etoh, "Produção de Etanol", "brown", "g/L"),
-    ]
-    
-    for ax, series, title, color, y_label in plots:
-        ax.clear()
-        label = title.split(" ")[0] # Label padrão
-        if "Açúcares" in title:
-            label = "Sacarose" # Label específica
-            
-        if len(time_data) > 0 and len(series) > 0:
-            ax.plot(time_data, series, color=color, linewidth=2, label=label)
-        ax.set_title(title, fontsize=10, pad=5)
-        ax.set_xlabel("Tempo (min)", fontsize=8)
-        ax.set_ylabel(y_label, fontsize=8)
-        ax.grid(True, linestyle="--", alpha=0.7)
-        
-        # Ajustar limites do eixo Y com margem
-        if "pH" in title:
-            ax.set_ylim(3.5, 7.0)
-        elif any(x in title for x in ["Leveduras", "Bacteriano", "Biomassa"]):
-            if len(series) > 0: mx = max(series); ax.set_ylim(0, mx * 1.2 if mx > 0 else 10)
-        elif "Volume" in title:
-            if len(series) > 0: mx = max(series); ax.set_ylim(min(series)*0.9, max(2, mx * 1.2))
-        elif "CO₂" in title or "Ácido" in title or "Etanol" in title: 
-            if len(series) > 0: mx = max(series); ax.set_ylim(0, max(1, mx * 1.2))
-        elif "Açúcares" in title:
-             if len(data_sucrose) > 0 and len(data_maltose) > 0:
-                mx = max(max(data_sucrose), max(data_maltose))
-                ax.set_ylim(0, max(10, mx * 1.1))
-             elif len(data_sucrose) > 0:
-                 mx = max(data_sucrose)
-                 ax.set_ylim(0, max(10, mx * 1.1))
-
-    # Plotar Maltose no ax3
-    if len(time_data) > 0 and len(data_maltose) > 0:
-        ax3.plot(time_data, data_maltose, color='deepskyblue', linewidth=2, label="Maltose")
-    
-    # Adicionar legenda apenas ao gráfico de açúcares
-    ax3.legend(fontsize='small')
-    
-    plt.tight_layout()
-    canvas = FigureCanvas(fig)
-    canvas.draw()
-    raw = canvas.buffer_rgba()
-    raw_bytes = raw.tobytes()
-    size = canvas.get_width_height()
-    plt.close(fig)
-    return pygame.image.frombuffer(raw_bytes, size, "RGBA")
-
-def generate_analysis():
-    """Gera análise educacional baseada nos resultados"""
-    analyses = []
-    
-    # Parâmetros usados na simulação
-    farinha_g = sliders[0].value
-    base_volume = farinha_g * 0.8 
-    
-    # Resultados da simulação
-    max_volume = max(data_volume) if data_volume else base_volume
-    final_ph = data_ph[-1] if data_ph else 7
-    final_etoh = data_etoh[-1] if data_etoh else 0
-    
-    # --- LÓGICA DE ANÁLISE ---
-    # Análise do Volume (Crescimento)
-    if final_ph < 4.1: # Priorizar checagem de perigo
-        analyses.append(f"✗ Crescimento parado. A massa ficou muito ácida (pH {final_ph:.2f}), inibindo a levedura.")
-    elif max_volume > (base_volume * 2.2): # Cresceu mais que 120%
-        analyses.append(f"✓ Excelente crescimento! A produção de CO₂ ({max(data_co2):.1f}g) foi vigorosa e a massa atingiu {max_volume:.0f} mL.")
-    elif max_volume > (base_volume * 1.7): # Cresceu mais que 70%
-        analyses.append(f"✓ Bom crescimento. A massa desenvolveu um volume adequado ({max_volume:.0f} mL).")
-    else:
-        analyses.append(f"✗ Crescimento limitado ({max_volume:.0f} mL). Verifique se o tempo foi curto ou se os parâmetros (sal, temp) inibiram a levedura.")
-        
-    # Análise do pH (Acidez e Sabor)
-    if 4.0 <= final_ph <= 4.8:
-        analyses.append(f"✓ O pH final ({final_ph:.2f}) está na faixa ideal, sugerindo um pão com sabor bem desenvolvido.")
-    elif final_ph > 4.8:
-        analyses.append(f"✗ O pH ({final_ph:.2f}) ficou um pouco alto. A fermentação pode não ter sido longa o suficiente para desenvolver acidez.")
-    else: # Já coberto pela análise de volume, mas reforçado aqui
-        analyses.append(f"✗ O pH ({final_ph:.2f}) está muito baixo, resultando em um pão excessivamente ácido (azedo).")
-
-    # Análise do Etanol (Aroma)
-    if final_etoh > (farinha_g * 0.003): # (ex: > 3g para 1000g de farinha)
-        analyses.append(f"✓ A produção de etanol ({final_etoh:.1f}g) foi significativa, contribuindo para o aroma.")
-    else:
-        analyses.append(f"✓ Produção de etanol moderada ({final_etoh:.1f}g). Normal para fermentações mais curtas.")
-        
-    return analyses
+    """Atualiza os gráficos ao vivo (figura persistente) e retorna a superfície"""
+    return live_graphs.update(run_data["time"], run_data.as_dict())
+
+def report_request():
+    """Chave e argumentos (de ReportPrerenderer.submit) do relatório da simulação atual."""
+    params = [s.value for s in sliders]
+    if replay is not None:
+        # As séries vêm da gravação, talvez feita com outra versão do modelo
+        key = report_key(params, replay.step, pinned_runs, replay.header["model_hash"])
+        return key, (params, replay.step, pinned_runs, run_data["time"], run_data.as_dict())
+    # Ao vivo: a trajetória completa é a de run_trajectory, calculável desde o início
+    return report_key(params, SIMULATION_STEP, pinned_runs), (params, SIMULATION_STEP, pinned_runs)
+
+def prerender_report():
+    """Agenda o relatório da simulação atual em segundo plano (se ainda não está em cache)."""
+    if PRERENDER_REPORTS and (replay is None or simulation_finished):
+        key, args = report_request()
+        report_prerenderer.submit(key, *args)
 
 def create_educational_report():
-    """Cria relatório educativo final"""
-    report_surface = pygame.Surface((WIDTH, HEIGHT))
-    report_surface.fill(COLORS["background"])
-    
-    # --- Coluna Esquerda (Parâmetros e Análise) ---
-    # Cabeçalho
-    title = TITLE_FONT.render("Relatório da Simulação", True, COLORS["text"])
-    report_surface.blit(title, (WIDTH//2 - title.get_width()//2, 20))
-    
-    coluna_esquerda = pygame.Rect(20, 70, 450, HEIGHT - 100)
-    coluna_direita = pygame.Rect(500, 70, WIDTH - 520, HEIGHT - 100)
-    
-    pygame.draw.rect(report_surface, COLORS["panel"], coluna_esquerda, border_radius=10)
-    pygame.draw.rect(report_surface, COLORS["panel"], coluna_direita, border_radius=10)
-    pygame.draw.rect(report_surface, COLORS["text"], coluna_esquerda, 1, border_radius=10)
-    pygame.draw.rect(report_surface, COLORS["text"], coluna_direita, 1, border_radius=10)
-    
-    y_pos = 90
-    params = [
-        f"Farinha: {sliders[0].value:.2f}g",
-        f"Hidratação: {sliders[1].value * 100:.0f}%",
-        f"Temperatura: {sliders[2].value:.1f}°C",
-        f"Açúcar: {sliders[3].value:.1f}g",
-        f"Sal: {sliders[4].value:.1f}g"
-    ]
-    
-    titulo_params = FONT.render("Parâmetros Utilizados:", True, COLORS["text"])
-    report_surface.blit(titulo_params, (40, y_pos))
-    y_pos += 30
-    
-    for param in params:
-        text = FONT.render(param, True, COLORS["text"])
-        report_surface.blit(text, (50, y_pos))
-        y_pos += 25
-    
-    # Análise dos resultados (A análise de Glúten é MANTIDA aqui)
-    if len(time_data) > 0:
-        y_pos += 20
-        analysis_title = FONT.render("Análise dos Resultados:", True, COLORS["text"])
-        report_surface.blit(analysis_title, (40, y_pos))
-        y_pos += 30
-        
-        # Gerar análise
-        analyses = generate_analysis()
-        
-        # Análise de Glúten (MANTIDA)
-        final_gluten = data_gluten_retention[-1] if data_gluten_retention else 0
-        if final_gluten > 80:
-             analyses.append(f"✓ Retenção de glúten excelente ({final_gluten:.0f})%. Os parâmetros de sal, água e tempo foram ideais.")
-        elif final_gluten > 60:
-             analyses.append(f"✓ Boa retenção de glúten ({final_gluten:.0f})%. A rede está forte.")
-        else:
-             analyses.append(f"✗ Retenção de glúten baixa ({final_gluten:.0f})%. Verifique se o tempo foi muito longo (acidez) ou se os parâmetros de sal/água estão corretos.")
-
-        max_width = coluna_esquerda.width - 40
-        for analysis in analyses:
-            lines = wrap_text(analysis, FONT, max_width)
-            for line in lines:
-                text = FONT.render(line, True, COLORS["text"])
-                report_surface.blit(text, (60, y_pos))
-                y_pos += 25
+    """
+    Cria relatório educativo final: a mesma página de relatorios.py, com as
+    simulações fixadas sobrepostas ao gráfico normalizado. Normalmente ela já
+    foi desenhada em segundo plano (ou numa vez anterior): só é copiada.
+    """
+    key, args = report_request()
+    image = report_prerenderer.result(key, *args)
+    height, width = image.shape[:2]
+    # Cópia: o botão é desenhado por cima e a imagem em cache não pode mudar
+    report_surface = pygame.image.frombuffer(image, (width, height), "RGB").copy()
 
-    # --- Coluna Direita (Gráfico Normalizado) ---
-    
-    if len(time_data) > 0:
-        fig = plt.figure(figsize=(6, 4.5), dpi=100)
-        ax = fig.add_subplot(111)
-
-        def to_mpl_color(c):
-            return (c[0]/255.0, c[1]/255.0, c[2]/255.0)
-
-        def normalize(data):
-            if not data: return []
-            min_val, max_val = min(data), max(data)
-            if max_val == min_val:
-                return [0.5] * len(data)
-            return [(x - min_val) / (max_val - min_val) for x in data]
-        
-        ax.plot(time_data, normalize(data_ph), color=to_mpl_color(COLORS["primary"]), label='pH')
-        ax.plot(time_data, normalize(data_biom), color=to_mpl_color(COLORS["success"]), label='Cresc. Leveduras')
-        ax.plot(time_data, normalize(data_sucrose), color=to_mpl_color(COLORS["warning"]), label='Sacarose')
-        ax.plot(time_data, normalize(data_maltose), color='deepskyblue', label='Maltose')
-        ax.plot(time_data, normalize(data_volume), color='purple', label='Volume')
-        ax.plot(time_data, normalize(data_co2), color=to_mpl_color(COLORS["error"]), label='CO₂')
-        ax.plot(time_data, normalize(data_etoh), color='brown', label='Etanol') 
-        
-        ax.set_title("Evolução Normalizada da Fermentação")
-        
-        ax.set_xlabel("Tempo (min)")
-        ax.set_ylabel("Progresso Normalizado (0 a 1)")
-        ax.grid(True, linestyle="--", alpha=0.7)
-        ax.legend(fontsize='small')
-        
-        plt.tight_layout()
-        canvas = FigureCanvas(fig)
-        canvas.draw()
-        raw = canvas.buffer_rgba()
-        raw_bytes = raw.tobytes()
-        size = canvas.get_width_height()
-        plt.close(fig)
-        
-        graph = pygame.image.frombuffer(raw_bytes, size, "RGBA")
-        report_surface.blit(graph, (510, 90))
-    
     # Botão para voltar
     back_button = ImprovedButton(WIDTH//2 - 75, HEIGHT - 60, 150, 40, "Voltar", COLORS["primary"])
     back_button.draw(report_surface)
@@ -850,57 +815,95 @@ def create_educational_report():
     return report_surface, back_button
 
 
-def wrap_text(text, font, max_width):
-    """Divide um texto em várias linhas que caibam na largura especificada"""
-    words = text.split(" ")
-    lines = []
-    current_line = ""
-
-    for word in words:
-        test_line = current_line + word + " "
-        if font.size(test_line)[0] <= max_width:
-            current_line = test_line
-        else:
-            lines.append(current_line)
-            current_line = word + " "
-    lines.append(current_line)
-    return lines
-
+def optimize_sliders():
+    """
+    Ajusta os sliders para a receita de maior crescimento sem acidez nem glúten
+    degradado, mantendo a farinha escolhida e sem passar do tempo escolhido.
+    """
+    result = optimize_recipe(fixed={"farina_g": sliders[0].value},
+                             bounds={"time_limit": (None, sliders[-1].value)})
+    if not result["feasible"]:
+        tutorial_system.show_message("Nenhuma receita com esta farinha e tempo evita a acidez. Tente mais tempo ou outra farinha.")
+        return
+    for s, value in zip(sliders, result["params"]):
+        s.value = value
+        s.update_handle()
+    tutorial_system.show_message(f"Receita otimizada: volume {result['volume']:.0f} mL, pH {result['ph']:.2f}, glúten {result['retention']:.0f}%")
+
+def handle_config(events, mouse_pos, full_redraw=True):
+    """
+    Handles configuration screen.
+    Com full_redraw=False só redesenha o que mudou e retorna os retângulos
+    para pygame.display.update (None quando a tela inteira foi redesenhada).
+    """
+    global state, running_simulation, paused, active_slider, drawn_sliders, drawn_panel, drawn_sensitivity
 
-def handle_config(events, mouse_pos):
-    """Handles configuration screen."""
-    global state, running_simulation, paused, active_slider
+    # Título e trilhos dos sliders estão na camada estática
+    layer = get_static_layer("config")
 
-    title = "Configuração da Simulação"
+    # --- LÓGICA DO PAINEL DE PREVISÃO ---
+    # 1. Pega os valores atuais dos sliders
+    current_params = [s.value for s in sliders]
     
-    screen.blit(TITLE_FONT.render(title, True, COLORS["text"]), (40, 36))
+    # 2. Calcula a previsão e desenha o painel (ambos em cache enquanto os sliders não mudam)
+    panel = get_prediction_panel(current_params, 760, 220)
+    sensitivity = get_sensitivity_panel(current_params, 760, 220) if SHOW_SENSITIVITY else None
+
+    slider_state = [(s.value, s.hovered, s.dragging) for s in sliders]
+    if full_redraw:
+        dirty = None
+        screen.blit(layer, (0, 0))
+    else:
+        # Os botões têm animação de hover: são recompostos a cada quadro
+        dirty = [CONFIG_CONTROLS_RECT, TUTORIAL_RECT]
+        if slider_state != drawn_sliders:
+            dirty.append(SLIDERS_RECT)
+        if panel is not drawn_panel:
+            dirty.append(PANEL_RECT)
+        if sensitivity is not drawn_sensitivity:
+            dirty.append(SENSITIVITY_RECT)
+        for rect in dirty:
+            screen.blit(layer, rect, rect)
     
     # --- Atualiza e Desenha Sliders ---
-    for s in sliders:
-        s.draw(screen)
+    if full_redraw or slider_state != drawn_sliders:
+        for s in sliders:
+            s.draw(screen)
+        drawn_sliders = slider_state
     for s in sliders:
         s.update(mouse_pos)
         
     start_button.draw(screen)
-    
-    # --- LÓGICA DO PAINEL DE PREVISÃO ---
-    # 1. Pega os valores atuais dos sliders
-    current_params = [s.value for s in sliders]
-    
-    # 2. Calcula a previsão
-    prediction = get_prediction_feedback(current_params)
+    optimize_button.draw(screen)
+    replay_button.draw(screen)
     
     # 3. Desenha o painel (à direita da tela)
-    draw_prediction_panel(screen, 420, 100, 760, 220, prediction)
+    if full_redraw or panel is not drawn_panel:
+        screen.blit(panel, PANEL_RECT)
+        drawn_panel = panel
+    if sensitivity is not None and (full_redraw or sensitivity is not drawn_sensitivity):
+        screen.blit(sensitivity, SENSITIVITY_RECT)
+    drawn_sensitivity = sensitivity
     
     # --- Lógica dos botões e sliders ---
     if start_button.update(mouse_pos, events):
         reset_simulation()
         running_simulation = True
         paused = False
+        prerender_report()
         state = screen_manager.go_to("simulacao")
         tutorial_system.show_tip("simulation_running", "A simulação está rodando! Observe os gráficos e a visualização.")
 
+    if optimize_button.update(mouse_pos, events):
+        optimize_sliders()
+
+    if replay_button.update(mouse_pos, events):
+        path = latest_recording()
+        if path is None:
+            tutorial_system.show_message(f"Nenhuma gravação em {RECORDINGS_DIR}/. Termine uma simulação para gravá-la.")
+        elif start_replay(path):
+            return None
+
     for event in events:
         if event.type == pygame.MOUSEBUTTONDOWN:
             for s in sliders:
@@ -913,51 +916,163 @@ def handle_config(events, mouse_pos):
         elif event.type == pygame.MOUSEBUTTONUP:
             if active_slider: active_slider.stop_drag()
             active_slider = None
+    return dirty
 
-def handle_simulation(events, mouse_pos):
-    """Handles the running simulation screen."""
-    global state, running_simulation, paused, sim_time, result_screen, result_back_button, simulation_speed, simulation_finished
+def advance_simulation(new_times):
+    """Calcula um lote de amostras novas (vetorizado) e o acrescenta à simulação."""
+    global running_simulation, paused, sim_time, simulation_finished
+    if len(new_times):
+        params = [s.value for s in sliders]
+        prev_time, prev_co2 = run_data.last("time", 0.0), run_data.last("co2", 0.0)
+        if replay is not None:
+            # Replay: as amostras já estão gravadas, só a posição avança
+            run_data.seek(sim_clock.emitted)
+        else:
+            with profiler.phase("modelo"):
+                series = update_simulation_batch(new_times, params[2], params[3], params[1], params[0], params[4])
+                run_data.extend(new_times, series)
+        sim_time = sim_clock.time
+
+        # Bolhas proporcionais ao CO₂ produzido desde a amostra anterior
+        minutes = sim_time - prev_time
+        bubbles.emit((run_data.last("co2") - prev_co2) / minutes, minutes)
+
+    if sim_clock.finished:
+        just_finished = not simulation_finished
+        if just_finished and replay is None and AUTO_SAVE_RUNS:
+            save_finished_run()
+        if just_finished:
+            tutorial_system.show_tip("compare_runs", "Clique em 'Fixar' para comparar esta simulação com as próximas.")
+        running_simulation = False
+        paused = True 
+        simulation_finished = True 
+        if just_finished:
+            prerender_report()  # Replay, ou fixadas que mudaram durante a simulação
+
+def save_finished_run():
+    """Grava a simulação que acabou de terminar em RECORDINGS_DIR."""
+    path = os.path.join(RECORDINGS_DIR, time.strftime("simulacao_%Y%m%d_%H%M%S.run"))
+    try:
+        os.makedirs(RECORDINGS_DIR, exist_ok=True)
+        save_run(path, run_data, [s.value for s in sliders], SIMULATION_STEP)
+    except OSError as e:
+        tutorial_system.show_message(f"Não foi possível gravar a simulação: {e}")
+
+def latest_recording():
+    """Caminho da gravação mais recente em RECORDINGS_DIR (ou None)."""
+    try:
+        paths = [os.path.join(RECORDINGS_DIR, name) for name in os.listdir(RECORDINGS_DIR) if name.endswith(".run")]
+    except OSError:
+        return None
+    return max(paths, key=os.path.getmtime) if paths else None
+
+def start_replay(path):
+    """
+    Abre uma gravação na tela de simulação, parada na primeira amostra. As
+    séries vêm do arquivo (memmap): o modelo não é executado.
+    """
+    global replay, run_data, state
+    try:
+        recording = RunRecording(path)
+    except (OSError, ValueError, KeyError) as e:
+        tutorial_system.show_message(f"Não foi possível abrir a gravação: {e}")
+        return False
+    if len(recording) == 0:
+        tutorial_system.show_message("A gravação está vazia.")
+        return False
+
+    for s, value in zip(sliders, recording.params):
+        s.value = value
+        s.update_handle()
+    reset_simulation()
+    replay = recording
+    run_data = recording.buffer()
+    times = run_data["time"]
+    sim_clock.reset(times[-1], recording.step, times)
+    seek_replay(0.0)
+    state = screen_manager.go_to("simulacao")
+    message = f"Replay: {os.path.basename(path)}"
+    if recording.stale:
+        message += " (gravada com outra versão do modelo)"
+    tutorial_system.show_message(message)
+    return True
+
+def seek_replay(t):
+    """Vai para o minuto t do replay (para frente ou para trás), mostrando ao menos uma amostra."""
+    global sim_time, simulation_finished, running_simulation, paused
+    run_data.seek(sim_clock.seek(max(t, sim_clock.times[0])))
+    sim_time = sim_clock.time
+    bubbles.clear()
+    if sim_clock.finished:
+        running_simulation, paused, simulation_finished = False, True, True
+    elif simulation_finished:
+        # Voltou de depois do fim: fica parado na nova posição
+        running_simulation, paused, simulation_finished = True, True, False
+
+
+def handle_simulation(events, mouse_pos, full_redraw=True):
+    """
+    Handles the running simulation screen.
+    Com full_redraw=False só redesenha o que mudou e retorna os retângulos
+    para pygame.display.update (None quando a tela inteira foi redesenhada).
+    """
+    global state, running_simulation, paused, sim_time, result_screen, result_back_button, simulation_finished
+    global graph_surface, drawn_run
 
     time_limit = sliders[-1].value # Último slider é o Tempo
 
     # --- Lógica de atualização da simulação ---
     if running_simulation and not paused:
-        sim_time += simulation_speed
-        
-        params = [s.value for s in sliders]
-        biom, suc, malt, co2v, vol, phv, etoh, ret = update_simulation(sim_time, params[2], params[3], params[1], params[0], params[4])
-        
-        data_biom.append(biom)
-        data_sucrose.append(suc)
-        data_maltose.append(malt)
-        data_gluten_retention.append(ret)
-        data_co2.append(co2v)
-        data_volume.append(vol); data_ph.append(phv); data_etoh.append(etoh)
-        
-        time_data.append(sim_time)
-        if int(sim_time) % 12 == 0: add_bubble()
-        update_bubbles()
-
-        if sim_time >= time_limit:
-            sim_time = time_limit 
-            running_simulation = False
-            paused = True 
-            simulation_finished = True 
+        # O relógio entrega as amostras (passo fixo) que o tempo real do último quadro cobriu
+        advance_simulation(sim_clock.advance(frame_seconds))
+        with profiler.phase("visual"):
+            bubbles.update()
 
     # --- Lógica de Renderização ---
     progress = min(1.0, sim_time / time_limit) if time_limit > 0 else 0.0
-    graph_surf = create_improved_graphs()
-    screen.blit(graph_surf, (420, 30))
-    draw_educational_visual(progress)
+    fact_changed = update_educational_fact()
+    # Gráficos, massa e indicadores só mudam com amostras novas (ou um reset)
+    run_state = (run_data, len(run_data))
+    # (as bolhas se movem a cada quadro enquanto a simulação corre)
+    content_changed = (full_redraw or fact_changed or run_state != drawn_run
+                       or (running_simulation and not paused))
+    drawn_run = run_state
+
+    layer = get_static_layer("simulacao")
+    if full_redraw:
+        dirty = None
+        screen.blit(layer, (0, 0))
+    else:
+        restore = [SIMULATION_CONTROLS_RECT, TUTORIAL_RECT]
+        if content_changed:
+            restore.append(VISUAL_RECT)
+            if simulation_finished:
+                restore.append(NOTICE_RECT)
+        for rect in restore:
+            screen.blit(layer, rect, rect)
+        dirty = restore + [GRAPH_RECT] if content_changed else restore
+
+    if content_changed:
+        with profiler.phase("gráficos"):
+            graph_surface = create_improved_graphs()
+            screen.blit(graph_surface, GRAPH_RECT)
+        with profiler.phase("visual"):
+            draw_educational_visual(progress)
+    elif graph_surface is not None:
+        # O botão Voltar invade a área dos gráficos: recompõe essa faixa
+        overlap = SIMULATION_CONTROLS_RECT.clip(GRAPH_RECT)
+        screen.blit(graph_surface, overlap, overlap.move(-GRAPH_RECT.x, -GRAPH_RECT.y))
     
     # --- Lógica de Botões ---
     
     if simulation_finished:
         # 1. Desenha o aviso por cima de tudo
-        draw_finish_notice(screen)
+        if content_changed:
+            draw_finish_notice(screen)
         
-        # 2. Desenha o botão de Relatório e o de Voltar
+        # 2. Desenha o botão de Relatório, o de Fixar e o de Voltar
         ver_relatorio_button.draw(screen)
+        pin_button.draw(screen)
         voltar_button.draw(screen)
 
         # 3. Lida com os cliques desses botões
@@ -965,6 +1080,9 @@ def handle_simulation(events, mouse_pos):
             result_screen, result_back_button = create_educational_report()
             state = "resultados"
             simulation_finished = False 
+
+        if pin_button.update(mouse_pos, events):
+            pin_current_run()
         
         if voltar_button.update(mouse_pos, events):
             reset_simulation()
@@ -973,7 +1091,9 @@ def handle_simulation(events, mouse_pos):
     else:
         # --- Se a simulação NÃO terminou, desenha os controles normais ---
         start_button.draw(screen); pause_button.draw(screen); reset_button.draw(screen); voltar_button.draw(screen)
-        speed_1x_button.draw(screen); speed_2x_button.draw(screen); speed_5x_button.draw(screen)
+        for button, _ in speed_buttons:
+            button.draw(screen)
+        end_button.draw(screen)
 
         # Lógica de update dos botões normais
         if start_button.update(mouse_pos, events):
@@ -985,30 +1105,85 @@ def handle_simulation(events, mouse_pos):
             if running_simulation: paused = not paused
         
         if reset_button.update(mouse_pos, events):
-            reset_simulation()
+            if replay is not None:
+                seek_replay(0.0)  # Volta à primeira amostra
+            else:
+                reset_simulation()
         
         if voltar_button.update(mouse_pos, events):
             reset_simulation()
             state = "config"
         
-        # Lógica dos botões de velocidade
-        if speed_1x_button.update(mouse_pos, events):
-            simulation_speed = 1.0
-        if speed_2x_button.update(mouse_pos, events):
-            simulation_speed = 2.0
-        if speed_5x_button.update(mouse_pos, events):
-            simulation_speed = 5.0
+        # Lógica dos botões e teclas de velocidade
+        new_speed = None
+        for button, speed in speed_buttons:
+            if button.update(mouse_pos, events):
+                new_speed = speed
+        for event in events:
+            if event.type == pygame.KEYDOWN:
+                if event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                    new_speed = sim_clock.speed * 2
+                elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                    new_speed = sim_clock.speed / 2
+                elif event.key == pygame.K_END and running_simulation:
+                    advance_simulation(sim_clock.jump_to_end())
+        if new_speed is not None:
+            tutorial_system.show_message(f"Velocidade: {sim_clock.set_speed(new_speed):g}x")
+
+        if end_button.update(mouse_pos, events) and running_simulation:
+            advance_simulation(sim_clock.jump_to_end())
 
+    for event in events:
+        if event.type == pygame.KEYDOWN and state == "simulacao":
+            if event.key == pygame.K_f:
+                pin_current_run()
+            elif event.key == pygame.K_l:
+                clear_pinned_runs()
+
+    if replay is not None:
+        handle_replay_seek(events, mouse_pos, time_limit)
+    return dirty
+
+def handle_replay_seek(events, mouse_pos, time_limit):
+    """Busca no replay: clicar/arrastar na barra de progresso ou as setas (±5%)."""
+    global scrubbing
 
-def handle_resultados(events, mouse_pos):
-    """Handles the results screen."""
+    def seek_to_mouse():
+        fraction = (mouse_pos[0] - PROGRESS_RECT.x) / PROGRESS_RECT.w
+        seek_replay(min(1.0, max(0.0, fraction)) * time_limit)
+
+    for event in events:
+        if event.type == pygame.MOUSEBUTTONDOWN and PROGRESS_RECT.collidepoint(mouse_pos):
+            scrubbing = True
+            seek_to_mouse()
+        elif event.type == pygame.MOUSEMOTION and scrubbing:
+            seek_to_mouse()
+        elif event.type == pygame.MOUSEBUTTONUP:
+            scrubbing = False
+        elif event.type == pygame.KEYDOWN and event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+            direction = 1 if event.key == pygame.K_RIGHT else -1
+            seek_replay(sim_time + direction * 0.05 * time_limit)
+
+
+def handle_resultados(events, mouse_pos, full_redraw=True):
+    """Handles the results screen (o relatório é uma imagem pronta)."""
     global state
 
-    if result_screen:
+    if not result_screen:
+        screen.fill(COLORS["background"])
+        return None
+
+    if full_redraw:
+        dirty = None
         screen.blit(result_screen, (0, 0))
-        if result_back_button and result_back_button.update(mouse_pos, events):
-            state = "config" # Volta para a tela de config
-            reset_simulation()
+    else:
+        # Só a barra de dicas pode mudar sobre o relatório
+        dirty = [TUTORIAL_RECT]
+        screen.blit(result_screen, TUTORIAL_RECT, TUTORIAL_RECT)
+    if result_back_button and result_back_button.update(mouse_pos, events):
+        state = "config" # Volta para a tela de config
+        reset_simulation()
+    return dirty
 
 # --------- Inicializar sistemas ----------
 screen_manager = ScreenManager()
@@ -1016,53 +1191,132 @@ tutorial_system = TutorialSystem()
 
 # --------- Loop principal ----------
 clock = pygame.time.Clock()
-running = True
+# Tempo de cada fase do quadro (overlay de debug; tecla T grava um trace do Chrome)
+profiler = FrameProfiler()
 result_screen = None
 result_back_button = None
 
-# Inicia o tutorial na tela de configuração
-tutorial_system.show_tip("adjust_params", "Ajuste os parâmetros (Farinha, Água, Sal, etc.) e clique 'Start' para simular!")
-
-while running:
-    screen.fill(COLORS["background"])
-    events = pygame.event.get()
-    mouse_pos = pygame.mouse.get_pos()
-    mensagem_debug = time_data[-1] if time_data else 0
-
-    for event in events:
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_d:  # Tecla D para toggle debug
-                show_debug = not show_debug
-        if event.type == pygame.QUIT:
-            running = False
-
-    # Atualizar sistemas
-    tutorial_system.update()
-
-    # --------- Renderização ----------
-    if state == "config":
-        handle_config(events, mouse_pos)
-    elif state == "simulacao":
-        handle_simulation(events, mouse_pos)
-    elif state == "resultados":
-        handle_resultados(events, mouse_pos)
-
-    # Desenhar dicas do tutorial
-    tutorial_system.draw(screen)
-    
-    # Debug Information
-    if show_debug:
-        debug_text(f"Estado: {state}", 10, 10)
-        debug_text(f"Mouse: {mouse_pos}", 10, 30)
-        debug_text(f"Tempo: {sim_time:.1f}", 10, 50)
-        debug_text(f"Running: {running_simulation}", 10, 70)
-        debug_text(f"Paused: {paused}", 10, 90)
-        debug_text(f"FPS: {clock.get_fps():.1f}", 10, 110)
-        debug_text(f"Active Slider: {active_slider}", 10, 130)
-        debug_text(f"Mensagem: {mensagem_debug}", 10, 150)
-
-    pygame.display.flip()
-    clock.tick(30)
-
-pygame.quit()
-sys.exit()
\ No newline at end of file
+# O que já está na tela (modo de retângulos sujos)
+graph_surface = None   # Última imagem dos gráficos ao vivo
+drawn_run = None       # (run_data, amostras) desenhados na simulação
+drawn_sliders = None   # Estado dos sliders desenhados na configuração
+drawn_panel = None     # Painel de previsão desenhado na configuração
+drawn_sensitivity = None  # Gráfico de sensibilidade desenhado na configuração
+
+
+def draw_profiler_overlay(surface, x, y):
+    """Percentis do tempo de quadro, tempo por fase, alocações e histograma (debug)."""
+    p50, p95, p99 = profiler.frame_percentiles()
+    debug_text("Quadro p50/p95/p99: ", x, y, value=f"{p50:.1f} / {p95:.1f} / {p99:.1f} ms")
+    y += 20
+    for name, ms in profiler.phase_means().items():
+        debug_text(f"  {name}: ", x, y, value=f"{ms:.2f} ms")
+        y += 18
+    blocks, collections = profiler.allocation_means()
+    debug_text("Alocações/quadro: ", x, y, value=f"{blocks:+.0f} blocos, {collections:.2f} gc")
+    y += 22
+
+    # Histograma dos últimos quadros (linha vermelha: orçamento de 30 FPS)
+    counts = profiler.histogram()
+    box = pygame.Rect(x, y, 2 + 8 * len(counts), 52)
+    pygame.draw.rect(surface, WHITE, box)
+    pygame.draw.rect(surface, DARK_GRAY, box, 1)
+    peak = max(1, counts.max())
+    for i, count in enumerate(counts.tolist()):
+        if count:
+            h = max(1, int(48 * count / peak))
+            pygame.draw.rect(surface, BLUE, (box.x + 2 + 8 * i, box.bottom - 2 - h, 6, h))
+    budget_x = box.x + 2 + int(8 * FRAME_BUDGET_MS / HISTOGRAM_BIN_MS)
+    pygame.draw.line(surface, RED, (budget_x, box.top), (budget_x, box.bottom - 1))
+    if profiler.recording:
+        debug_text("Gravando trace (T para salvar)", x, box.bottom + 4)
+
+def toggle_trace():
+    """Começa ou termina a gravação do trace do Chrome (tecla T)."""
+    if not profiler.recording:
+        profiler.start_trace()
+        tutorial_system.show_message("Gravando trace dos quadros...")
+    else:
+        path = time.strftime("trace_quadros_%Y%m%d_%H%M%S.json")
+        frames = profiler.stop_trace(path)
+        tutorial_system.show_message(f"Trace salvo em {path} ({frames} quadros)")
+
+def main():
+    """Loop principal da interface gráfica."""
+    global state, show_debug, mensagem_debug, frame_seconds
+
+    # Inicia o tutorial na tela de configuração
+    tutorial_system.show_tip("adjust_params", "Ajuste os parâmetros (Farinha, Água, Sal, etc.) e clique 'Start' para simular!")
+
+    running = True
+    drawn_state = None  # Tela desenhada no quadro anterior
+    while running:
+        profiler.begin_frame()
+        with profiler.phase("eventos"):
+            events = pygame.event.get()
+            mouse_pos = pygame.mouse.get_pos()
+            mensagem_debug = run_data.last("time", 0)
+            # Redesenha tudo ao trocar de tela, com o debug ligado (o texto fica
+            # por cima de várias regiões) e quando a janela precisa ser repintada
+            full_redraw = not DIRTY_RECT_RENDERING or state != drawn_state or show_debug
+
+            for event in events:
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_d:  # Tecla D para toggle debug
+                        show_debug = not show_debug
+                        full_redraw = True
+                    elif event.key == pygame.K_t:  # Tecla T grava/salva o trace dos quadros
+                        toggle_trace()
+                if event.type == pygame.WINDOWEXPOSED:
+                    full_redraw = True
+                if event.type == pygame.QUIT:
+                    running = False
+
+        # Atualizar sistemas
+        with profiler.phase("tutorial"):
+            tutorial_system.update()
+
+        # --------- Renderização ----------
+        drawn_state = state
+        dirty = None
+        if state == "config":
+            dirty = handle_config(events, mouse_pos, full_redraw)
+        elif state == "simulacao":
+            dirty = handle_simulation(events, mouse_pos, full_redraw)
+        elif state == "resultados":
+            dirty = handle_resultados(events, mouse_pos, full_redraw)
+
+        # Desenhar dicas do tutorial
+        with profiler.phase("tutorial"):
+            tutorial_system.draw(screen)
+
+        # Debug Information
+        if show_debug:
+            debug_text("Estado: ", 10, 10, value=state)
+            debug_text("Mouse: ", 10, 30, value=mouse_pos)
+            debug_text("Tempo: ", 10, 50, value=f"{sim_time:.1f}")
+            debug_text("Running: ", 10, 70, value=running_simulation)
+            debug_text("Paused: ", 10, 90, value=paused)
+            debug_text("FPS: ", 10, 110, value=f"{clock.get_fps():.1f}")
+            debug_text("Active Slider: ", 10, 130, value=active_slider)
+            debug_text("Mensagem: ", 10, 150, value=mensagem_debug)
+            draw_profiler_overlay(screen, 10, 180)
+
+        with profiler.phase("flip"):
+            if dirty is None:
+                pygame.display.flip()
+            else:
+                pygame.display.update(dirty)
+        profiler.end_frame()
+        frame_seconds = clock.tick(30) / 1000.0
+
+    report_prerenderer.close()
+    pygame.quit()
+    sys.exit()
+
+
+if __name__ == "__main__":
+    # python simulador.py arquivo.run: abre direto o replay da gravação
+    if len(sys.argv) > 1:
+        start_replay(sys.argv[1])
+    main()
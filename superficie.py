@@ -0,0 +1,196 @@
+"""
+Superfície de resposta pré-calculada para previsões instantâneas.
+
+Uma grade regular sobre as seis faixas dos sliders guarda o pH, o volume e a
+retenção de glúten finais de cada receita. A tabela é calculada uma vez (em
+paralelo, com o executor da varredura), gravada em disco como .npy e aberta
+com memory-map; as consultas são feitas por interpolação multilinear, em lote.
+
+Junto da tabela fica um .json com as faixas, o hash do modelo (a tabela é
+recalculada quando as constantes mudam) e o erro medido contra o modelo exato
+em pontos aleatórios.
+
+Exemplo:
+    python superficie.py --niveis 9 --saida superficie_resposta
+"""
+import argparse
+import itertools
+import json
+
+import numpy as np
+
+from modelo import (PARAM_NAMES, FEEDBACK_LEVELS, FEEDBACK_MESSAGES,
+                    classify_prediction, model_hash, predict_batch)
+from varredura import GridSampler, run_sweep
+
+SURFACE_OUTPUTS = ("ph", "volume", "retention")
+INTERP_CHUNK = 32768  # Receitas por bloco na interpolação (limita a memória dos 64 vértices)
+
+
+class _TableWriter:
+    """Recebe os blocos da varredura (em ordem) e preenche a tabela."""
+
+    def __init__(self, table):
+        self.flat = table.reshape(-1, len(SURFACE_OUTPUTS))
+        self.pos = 0
+
+    def write(self, result):
+        k = len(result["level"])
+        for j, name in enumerate(SURFACE_OUTPUTS):
+            self.flat[self.pos:self.pos + k, j] = result[name]
+        self.pos += k
+
+
+class ResponseSurface:
+    """Tabela (níveis..., 3) sobre a grade dos sliders, com interpolação multilinear."""
+
+    def __init__(self, table, axes, meta):
+        self.table = table
+        self.axes = axes
+        self.shape = tuple(len(ax) for ax in axes)
+        self.meta = meta
+        self._flat = table.reshape(-1, len(SURFACE_OUTPUTS))
+        # Deslocamento (no array achatado) de cada um dos 2^6 vértices de uma célula
+        strides = np.array([int(np.prod(self.shape[d + 1:])) for d in range(len(self.shape))])
+        steps = np.array([1 if n > 1 else 0 for n in self.shape])
+        corners = np.array(list(itertools.product((0, 1), repeat=len(self.shape))))
+        self._corner_offsets = (corners * steps) @ strides
+
+    @property
+    def error_bound(self):
+        """Erro máximo e p99 (por saída) medidos contra o modelo exato na construção."""
+        return self.meta["error"]
+
+    # --------- Construção / carregamento ----------
+
+    @classmethod
+    def build(cls, path, levels=9, processes=None, check_points=5000, seed=0):
+        """Calcula a tabela, mede o erro e grava path.npy / path.json."""
+        sampler = GridSampler(levels)
+        table = np.lib.format.open_memmap(f"{path}.npy", mode="w+", dtype=np.float32,
+                                          shape=sampler.shape + (len(SURFACE_OUTPUTS),))
+        run_sweep(sampler, _TableWriter(table), processes)
+        table.flush()
+
+        meta = {
+            "model_hash": model_hash(),
+            "outputs": list(SURFACE_OUTPUTS),
+            "params": list(PARAM_NAMES),
+            "axes": [ax.tolist() for ax in sampler.axes],
+        }
+        surface = cls(table, sampler.axes, meta)
+        meta["error"] = surface.measure_error(check_points, seed)
+        with open(f"{path}.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=1)
+        return surface
+
+    @classmethod
+    def load(cls, path):
+        """
+        Abre uma tabela já calculada (memory-map, sem ler tudo para a memória).
+        Levanta ValueError se ela foi calculada com outras constantes do modelo.
+        """
+        with open(f"{path}.json", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("model_hash") != model_hash():
+            raise ValueError(f"A superfície em {path} foi calculada com outra versão do modelo.")
+        table = np.load(f"{path}.npy", mmap_mode="r")
+        return cls(table, [np.array(ax) for ax in meta["axes"]], meta)
+
+    @classmethod
+    def load_or_build(cls, path, levels=9, processes=None):
+        """Carrega a tabela se ela existe e está válida; senão recalcula."""
+        try:
+            return cls.load(path)
+        except (OSError, ValueError, KeyError):
+            return cls.build(path, levels, processes)
+
+    # --------- Consultas ----------
+
+    def interpolate(self, params):
+        """
+        Interpolação multilinear para um array (..., 6) de receitas na ordem dos
+        sliders. Valores fora das faixas são limitados às bordas da grade.
+        Retorna {saída: array}.
+        """
+        p = np.asarray(params, dtype=float)
+        batch_shape = p.shape[:-1]
+        p = p.reshape(-1, len(self.axes))
+        out = np.empty((len(p), len(SURFACE_OUTPUTS)))
+        for start in range(0, len(p), INTERP_CHUNK):
+            out[start:start + INTERP_CHUNK] = self._interpolate_chunk(p[start:start + INTERP_CHUNK])
+        return {name: out[:, j].reshape(batch_shape) for j, name in enumerate(SURFACE_OUTPUTS)}
+
+    def _interpolate_chunk(self, p):
+        base = np.zeros(len(p), dtype=np.intp)
+        frac = np.zeros(p.shape)
+        for d, ax in enumerate(self.axes):
+            if len(ax) == 1:
+                continue
+            # Grade uniforme: a célula sai direto da posição relativa
+            x = (np.clip(p[:, d], ax[0], ax[-1]) - ax[0]) / (ax[1] - ax[0])
+            i = np.minimum(x.astype(np.intp), len(ax) - 2)
+            base += i * int(np.prod(self.shape[d + 1:]))
+            frac[:, d] = x - i
+
+        # Valores nos 2^6 vértices, reduzidos uma dimensão por vez
+        values = self._flat[base[:, None] + self._corner_offsets]  # (n, 64, saídas)
+        values = values.reshape((len(p),) + (2,) * len(self.axes) + (len(SURFACE_OUTPUTS),))
+        for d in range(len(self.axes)):
+            f = frac[:, d].reshape((-1,) + (1,) * (values.ndim - 2))
+            values = values[:, 0] * (1.0 - f) + values[:, 1] * f
+        return values
+
+    def predict_batch(self, params):
+        """Como modelo.predict_batch, mas só com ph, volume, retention e level."""
+        out = self.interpolate(params)
+        farina_g = np.asarray(params, dtype=float)[..., 0]
+        out["level"] = classify_prediction(farina_g, out["ph"], out["volume"], out["retention"])
+        return out
+
+    def predict_feedback(self, params):
+        """Mesmo formato de modelo.get_prediction_feedback, para uma receita."""
+        out = self.predict_batch(params)
+        level = FEEDBACK_LEVELS[int(out["level"])]
+        return {
+            "ph": float(out["ph"]),
+            "volume": float(out["volume"]),
+            "retention": float(out["retention"]),
+            "feedback": FEEDBACK_MESSAGES[level],
+            "level": level,
+        }
+
+    def measure_error(self, n=5000, seed=0):
+        """Compara a interpolação com o modelo exato em n receitas aleatórias."""
+        rng = np.random.default_rng(seed)
+        lo = np.array([ax[0] for ax in self.axes])
+        hi = np.array([ax[-1] for ax in self.axes])
+        params = lo + rng.random((n, len(lo))) * (hi - lo)
+        exact = predict_batch(params)
+        approx = self.predict_batch(params)
+        error = {}
+        for name in SURFACE_OUTPUTS:
+            diff = np.abs(approx[name] - exact[name])
+            error[name] = {"max": float(diff.max()), "p99": float(np.percentile(diff, 99))}
+        error["level_agreement"] = float(np.mean(approx["level"] == exact["level"]))
+        error["points"] = n
+        return error
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calcula a superfície de resposta do simulador")
+    parser.add_argument("--niveis", type=int, default=9, help="Valores por parâmetro na grade")
+    parser.add_argument("--saida", default="superficie_resposta", help="Prefixo dos arquivos .npy/.json")
+    parser.add_argument("--processos", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    surface = ResponseSurface.build(args.saida, args.niveis, args.processos)
+    print(f"Tabela {surface.shape} gravada em {args.saida}.npy (modelo {surface.meta['model_hash']})")
+    for name in SURFACE_OUTPUTS:
+        err = surface.error_bound[name]
+        print(f"  {name}: erro máx {err['max']:.4g}, p99 {err['p99']:.4g}")
+    print(f"  Classificação igual ao modelo exato em {surface.error_bound['level_agreement']:.1%} dos pontos")
+
+
+if __name__ == "__main__":
+    main()
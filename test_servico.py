@@ -0,0 +1,150 @@
+"""
+Testes do serviço de simulação (servico.py) com LocalClient: o serviço roda
+no mesmo processo, sem rede, com a mesma ida e volta por JSON do HTTP.
+
+    python -m pytest -q test_servico.py
+"""
+import asyncio
+import math
+
+import numpy as np
+import pytest
+
+from modelo import DEFAULT_PARAMS, RECIPE_PARAMS, get_prediction_feedback, run_trajectory
+from servico import LocalClient, RequestBatcher, SimulationService, start_server
+
+
+def run(coroutine_function):
+    """Roda coroutine_function(cliente) num loop novo e fecha o serviço no fim."""
+    async def main():
+        client = LocalClient(SimulationService())
+        try:
+            return await coroutine_function(client)
+        finally:
+            client.service.close()
+    return asyncio.run(main())
+
+
+def recipes(n, seed=0):
+    rng = np.random.default_rng(seed)
+    lo = np.array([p[1] for p in RECIPE_PARAMS])
+    hi = np.array([p[2] for p in RECIPE_PARAMS])
+    return (lo + rng.random((n, len(RECIPE_PARAMS))) * (hi - lo)).tolist()
+
+
+def test_prediction_matches_get_prediction_feedback():
+    params = recipes(20)
+
+    async def body(client):
+        single = await client.prediction(DEFAULT_PARAMS)
+        many = await client.predictions(params)
+        return single, many
+
+    single, many = run(body)
+    for p, result in zip([DEFAULT_PARAMS] + params, [single] + many):
+        expected = get_prediction_feedback(p)
+        assert result["level"] == expected["level"]
+        assert result["feedback"] == expected["feedback"]
+        for name in ("ph", "volume", "retention"):
+            assert result[name] == pytest.approx(float(expected[name]), rel=1e-12)
+
+
+def test_concurrent_requests_share_batches():
+    params = recipes(50, seed=1)
+
+    async def body(client):
+        results = await asyncio.gather(*(client.prediction(p) for p in params))
+        return results, client.service.predictions.batches
+
+    results, batches = run(body)
+    assert len(results) == len(params)
+    assert batches < len(params)
+
+
+def test_repeated_recipe_is_a_cache_hit():
+    async def body(client):
+        first = await client.prediction(DEFAULT_PARAMS)
+        second = await client.prediction(DEFAULT_PARAMS)
+        stats = (await client.status())["previsao"]
+        return first, second, stats
+
+    first, second, stats = run(body)
+    assert first == second
+    assert stats["pedidos"] == 2
+    assert stats["acertos_cache"] == 1
+    assert stats["lotes"] == 1
+
+
+def test_trajectory_matches_run_trajectory():
+    params = list(DEFAULT_PARAMS[:-1]) + [120.0]
+    data = run(lambda client: client.trajectory(params, 1.0))
+    times, series = run_trajectory(params, 1.0)
+    np.testing.assert_allclose(data["tempo"], times)
+    np.testing.assert_allclose(data["ph"], series["ph"])
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/previsao", {"params": [1, 2, 3]}),
+    ("/previsao", {"params": ["a", 1, 1, 1, 1, 1]}),
+    ("/previsao", {"params": list(DEFAULT_PARAMS[:-1]) + [math.inf]}),
+    ("/previsao", {"params": [-1] + list(DEFAULT_PARAMS[1:])}),
+    ("/previsao", {"params": [500, 1.5] + list(DEFAULT_PARAMS[2:])}),
+    ("/previsao", {"params": list(DEFAULT_PARAMS[:4]) + [-1, 240]}),
+    ("/previsao", {}),
+    ("/trajetoria", {"params": DEFAULT_PARAMS, "passo": 0}),
+    ("/trajetoria", {"params": DEFAULT_PARAMS, "passo": math.inf}),
+    ("/trajetoria", {"params": DEFAULT_PARAMS, "passo": "x"}),
+])
+def test_invalid_input_is_a_400(path, body):
+    status, payload = run(lambda client: client.service.handle("POST", path, body))
+    assert status == 400
+    assert payload["erro"]
+
+
+def test_malformed_content_length_is_a_400():
+    async def body(client):
+        server = await start_server(client.service, "127.0.0.1", 0)
+        try:
+            reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+            writer.write(b"POST /previsao HTTP/1.1\r\nContent-Length: abc\r\n\r\n")
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+            return response
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    response = run(body)
+    assert response.startswith(b"HTTP/1.1 400 ")
+    assert "Content-Length inválido".encode("utf-8") in response
+
+
+def test_bad_request_does_not_fail_its_batch():
+    async def body(client):
+        return await asyncio.gather(client.trajectory(DEFAULT_PARAMS, 1.0),
+                                    client.trajectory(DEFAULT_PARAMS, math.inf),
+                                    return_exceptions=True)
+
+    good, bad = run(body)
+    assert len(good["tempo"]) == len(run_trajectory(DEFAULT_PARAMS, 1.0)[0])
+    assert isinstance(bad, ValueError)
+
+
+def test_failing_key_only_fails_its_own_request():
+    def evaluate(keys):
+        if "ruim" in keys:
+            raise ValueError("chave ruim")
+        return [key.upper() for key in keys]
+
+    async def body():
+        batcher = RequestBatcher(evaluate)
+        results = await asyncio.gather(batcher.get("a"), batcher.get("ruim"), batcher.get("b"),
+                                       return_exceptions=True)
+        return results, batcher
+
+    results, batcher = asyncio.run(body())
+    assert results[0] == "A" and results[2] == "B"
+    assert isinstance(results[1], ValueError)
+    assert batcher.batches == 1
+    assert "ruim" not in batcher.cache
@@ -0,0 +1,331 @@
+"""
+Modo turma: muitas simulações num único processo, com o painel do professor.
+
+As sessões (uma por aluno, ver sessoes.py) são avançadas juntas num único
+passo vetorizado por quadro. O painel mostra uma miniatura de cada sessão
+(curva do volume, pH, volume e retenção atuais, progresso e a cor do
+feedback) e só redesenha as miniaturas que mudaram; a curva de cada uma é
+desenhada aos poucos numa camada própria, em escala fixa (do volume base
+ao volume final previsto), sem refazer o que já foi desenhado.
+
+Controles:
+    clique numa miniatura: seleciona (de novo: tira a seleção); Esc: nenhuma
+    Espaço: roda/pausa a selecionada (sem seleção: todas)
+    + e -: dobra/divide a velocidade; F: calcula até o fim; R: recomeça
+
+Exemplos:
+    python turma.py turma.csv                 # uma sessão por receita (colunas como em relatorios.py)
+    python turma.py --sessoes 36 --iniciar    # receitas sorteadas, já rodando
+"""
+import argparse
+import math
+import sys
+import time
+
+import numpy as np
+import pygame
+
+from modelo import FEEDBACK_LEVELS
+from dados import PARAM_SHORT_LABELS
+from relatorios import load_recipes
+from sessoes import SessionEngine
+from varredura import LatinHypercubeSampler
+
+WIDTH, HEIGHT = 1200, 700
+HEADER_H = 50
+DETAIL_H = 60
+GAP = 8
+FPS = 30
+
+BACKGROUND = (245, 245, 245)
+PANEL = (255, 255, 255)
+TEXT = (50, 50, 50)
+MUTED = (120, 120, 120)
+GRID = (225, 225, 225)
+CURVE = (128, 0, 128)  # Roxo, como o volume nos gráficos da simulação
+PROGRESS = (70, 130, 180)
+SELECTED = (255, 215, 0)
+# Mesmas cores de feedback da interface (simulador.COLORS)
+LEVEL_COLORS = {
+    "success": (65, 140, 75),
+    "primary": (70, 130, 180),
+    "warning": (200, 150, 30),
+    "error": (190, 45, 45),
+}
+IDLE_COLOR = (200, 200, 200)
+
+
+def grid_layout(n, width=WIDTH, height=HEIGHT - HEADER_H - DETAIL_H):
+    """Colunas e tamanho (largura, altura) das miniaturas para n sessões na área dada."""
+    cols = max(1, math.ceil(math.sqrt(n * width / height)))
+    rows = max(1, math.ceil(n / cols))
+    return cols, ((width - GAP) // cols - GAP, (height - GAP) // rows - GAP)
+
+
+class SessionTile:
+    """Miniatura de uma sessão: curva do volume em cache (desenhada aos poucos) e textos."""
+
+    TEXT_H = 36  # Nome e status em cima; métricas embaixo
+    PROGRESS_H = 4
+
+    def __init__(self, session, rect, fonts):
+        self.session = session
+        self.rect = pygame.Rect(rect)
+        self.fonts = fonts
+        w, h = self.rect.size
+        self.graph_rect = pygame.Rect(6, 22, w - 12, max(8, h - 22 - self.TEXT_H // 2 - self.PROGRESS_H - 10))
+        self.graph = pygame.Surface(self.graph_rect.size)
+        self.version = None
+        self.drawn = None  # (amostras, rodando, velocidade, selecionada) da última imagem
+
+    def _reset_graph(self):
+        """Limpa a curva e fixa a escala: tempo até o fim, volume do base ao final previsto."""
+        session = self.session
+        self.graph.fill(PANEL)
+        w, h = self.graph_rect.size
+        for frac in (0.25, 0.5, 0.75):
+            pygame.draw.line(self.graph, GRID, (0, int(h * frac)), (w, int(h * frac)))
+        self.x_scale = (w - 1) / session.clock.time_limit
+        self.y_lo = session.params[0] * 0.8
+        y_hi = max(session.final["volume"], self.y_lo + 1.0) * 1.05
+        self.y_scale = (h - 1) / (y_hi - self.y_lo)
+        self.last_point = None
+        self.n_plotted = 0
+        self.version = session.version
+
+    def _plot_new(self):
+        """Acrescenta à curva só as amostras novas (um ponto por coluna de pixel)."""
+        run = self.session.run
+        n = len(run)
+        if n <= self.n_plotted:
+            return
+        h = self.graph_rect.height
+        xs = (run["time"][self.n_plotted:n] * self.x_scale).astype(int)
+        ys = (h - 1 - (run["volume"][self.n_plotted:n] - self.y_lo) * self.y_scale).astype(int)
+        # O último ponto de cada coluna basta: o volume só cresce
+        keep = np.append(xs[1:] != xs[:-1], True)
+        points = list(zip(xs[keep].tolist(), np.clip(ys[keep], 0, h - 1).tolist()))
+        if self.last_point is not None:
+            points.insert(0, self.last_point)
+        if len(points) > 1:
+            pygame.draw.lines(self.graph, CURVE, False, points, 2)
+        self.last_point = points[-1]
+        self.n_plotted = n
+
+    def draw(self, surface, selected):
+        """Redesenha a miniatura em surface se algo mudou. Retorna True se redesenhou."""
+        session = self.session
+        state = (len(session.run), session.running, session.clock.speed, selected)
+        if session.version != self.version:
+            self._reset_graph()
+        elif state == self.drawn:
+            return False
+        self._plot_new()
+        self.drawn = state
+
+        small, tiny = self.fonts
+        x, y, w, h = self.rect
+        level = session.level()
+        border = IDLE_COLOR if level is None else LEVEL_COLORS[FEEDBACK_LEVELS[level]]
+        clip = surface.get_clip()
+        surface.set_clip(self.rect)  # Em grades densas os textos não invadem as vizinhas
+        pygame.draw.rect(surface, BACKGROUND, self.rect)
+        pygame.draw.rect(surface, PANEL, self.rect, border_radius=6)
+        pygame.draw.rect(surface, SELECTED if selected else border, self.rect, 4 if selected else 2, border_radius=6)
+
+        name_s = small.render(session.name, True, TEXT)
+        surface.blit(name_s, (x + 8, y + 4))
+        if session.finished:
+            status = "terminada"
+        elif session.running:
+            status = f"{session.clock.speed:g}x"
+        else:
+            status = "pausada" if len(session.run) else "parada"
+        status_s = tiny.render(status, True, MUTED)
+        if name_s.get_width() + status_s.get_width() + 20 <= w:
+            surface.blit(status_s, (x + w - status_s.get_width() - 8, y + 6))
+
+        surface.blit(self.graph, self.graph_rect.move(x, y))
+        run = session.run
+        if len(run):
+            # Do mais completo ao mais curto, o primeiro que couber
+            ph, volume, retention = run.last("ph"), run.last("volume"), run.last("retention")
+            options = (f"pH {ph:.2f}  {volume:.0f} mL  {retention:.0f}%", f"pH {ph:.2f}  {volume:.0f} mL",
+                       f"{volume:.0f} mL")
+        else:
+            options = (f"{session.clock.time_limit:.0f} min",)
+        for text in options:
+            metrics_s = tiny.render(text, True, TEXT)
+            if metrics_s.get_width() <= w - 16:
+                break
+        surface.blit(metrics_s, (x + 8, y + h - self.PROGRESS_H - 22))
+
+        bar = pygame.Rect(x + 6, y + h - self.PROGRESS_H - 5, w - 12, self.PROGRESS_H)
+        pygame.draw.rect(surface, GRID, bar)
+        bar.width = int(bar.width * session.progress)
+        pygame.draw.rect(surface, PROGRESS, bar)
+        surface.set_clip(clip)
+        return True
+
+
+class TeacherDashboard:
+    """Painel do professor: todas as sessões do SessionEngine numa grade de miniaturas."""
+
+    def __init__(self, engine, surface):
+        self.engine = engine
+        self.surface = surface
+        self.fonts = (pygame.font.SysFont("Arial", 15, bold=True), pygame.font.SysFont("Arial", 13))
+        self.header_font = pygame.font.SysFont("Arial", 22, bold=True)
+        self.selected = None
+        self.tick_ms = 0.0
+        self.layout()
+
+    def layout(self):
+        """Refaz a grade (ao criar ou remover sessões)."""
+        cols, (w, h) = grid_layout(len(self.engine))
+        self.tiles = []
+        for i, session in enumerate(self.engine):
+            x = GAP + (i % cols) * (w + GAP)
+            y = HEADER_H + GAP + (i // cols) * (h + GAP)
+            self.tiles.append(SessionTile(session, (x, y, w, h), self.fonts))
+        self.full_redraw = True
+
+    def targets(self):
+        """Sessões afetadas pelos comandos: a selecionada ou todas."""
+        return None if self.selected is None else [self.selected]
+
+    def handle_event(self, event):
+        engine = self.engine
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            for tile in self.tiles:
+                if tile.rect.collidepoint(event.pos):
+                    self.selected = None if self.selected is tile.session else tile.session
+                    break
+        elif event.type == pygame.KEYDOWN:
+            targets = self.targets()
+            sessions = engine.sessions if targets is None else targets
+            if event.key == pygame.K_SPACE:
+                if any(s.running for s in sessions):
+                    engine.pause(targets)
+                else:
+                    engine.start(targets)
+            elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                for s in sessions:
+                    s.clock.set_speed(s.clock.speed * 2)
+            elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                for s in sessions:
+                    s.clock.set_speed(s.clock.speed / 2)
+            elif event.key == pygame.K_f:
+                engine.finish(targets)
+            elif event.key == pygame.K_r:
+                for s in sessions:
+                    s.reset()
+            elif event.key == pygame.K_ESCAPE:
+                self.selected = None
+
+    def update(self, seconds):
+        """Avança todas as sessões (um passo vetorizado) e mede o tempo do passo."""
+        start = time.perf_counter()
+        self.engine.tick(seconds)
+        self.tick_ms = (time.perf_counter() - start) * 1000.0
+
+    def draw(self, fps=0.0):
+        """Desenha o que mudou. Retorna os retângulos alterados (None: tela inteira)."""
+        surface = self.surface
+        full = self.full_redraw
+        if full:
+            surface.fill(BACKGROUND)
+            for tile in self.tiles:
+                tile.drawn = None
+            self.full_redraw = False
+        dirty = []
+        for tile in self.tiles:
+            if tile.draw(surface, tile.session is self.selected):
+                dirty.append(tile.rect)
+
+        header = pygame.Rect(0, 0, WIDTH, HEADER_H)
+        surface.fill(BACKGROUND, header)
+        sessions = self.engine.sessions
+        running = sum(s.running for s in sessions)
+        finished = sum(s.finished for s in sessions)
+        surface.blit(self.header_font.render(f"Turma: {len(sessions)} sessões", True, TEXT), (GAP + 4, 12))
+        info = (f"{running} rodando, {finished} terminadas  |  passo {self.tick_ms:.1f} ms "
+                f"({self.engine.samples} amostras)  |  {fps:.0f} FPS")
+        info_s = self.fonts[1].render(info, True, MUTED)
+        surface.blit(info_s, (WIDTH - info_s.get_width() - GAP - 4, 18))
+
+        detail = pygame.Rect(0, HEIGHT - DETAIL_H, WIDTH, DETAIL_H)
+        surface.fill(BACKGROUND, detail)
+        session = self.selected
+        if session is None:
+            lines = ("Clique numa sessão para selecioná-la. Espaço: rodar/pausar  + -: velocidade  "
+                     "F: até o fim  R: recomeçar  (sem seleção: todas)",)
+        else:
+            recipe = ", ".join(f"{label} {fmt(v)}" for (label, fmt), v in zip(PARAM_SHORT_LABELS, session.params))
+            final = session.final
+            lines = (f"{session.name}: {recipe}",
+                     f"Tempo {session.clock.time:.0f} de {session.clock.time_limit:.0f} min, "
+                     f"{session.clock.speed:g}x  |  previsão final: pH {final['ph']:.2f}, "
+                     f"{final['volume']:.0f} mL, glúten {final['retention']:.0f}%")
+        for row, line in enumerate(lines):
+            surface.blit(self.fonts[1].render(line, True, TEXT), (GAP + 4, detail.y + 10 + 20 * row))
+        return None if full else dirty + [header, detail]
+
+
+def random_recipes(n, seed=0):
+    """n receitas sorteadas (hipercubo latino nas faixas dos sliders)."""
+    return LatinHypercubeSampler(n, seed).chunk(0, n)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Modo turma: várias simulações com o painel do professor")
+    parser.add_argument("receitas", nargs="?", help="CSV ou JSON com uma receita por aluno (coluna nome opcional)")
+    parser.add_argument("--sessoes", type=int, default=30, help="Sessões sorteadas, sem arquivo de receitas")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--velocidade", type=float, default=1.0, help="Velocidade inicial de todas as sessões")
+    parser.add_argument("--iniciar", action="store_true", help="Começa com todas as sessões rodando")
+    args = parser.parse_args(argv)
+
+    engine = SessionEngine()
+    try:
+        if args.receitas:
+            params, names = load_recipes(args.receitas)
+        else:
+            if args.sessoes < 1:
+                raise ValueError("--sessoes deve ser pelo menos 1")
+            params, names = random_recipes(args.sessoes, args.semente), [""] * args.sessoes
+        for row, name in zip(params, names):
+            engine.add(row, name)
+    except (OSError, ValueError) as e:
+        sys.exit(f"Erro: {e}")
+    engine.set_speed(args.velocidade)
+    if args.iniciar:
+        engine.start()
+
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Simulador de Fermentação - Modo Turma")
+    dashboard = TeacherDashboard(engine, screen)
+    clock = pygame.time.Clock()
+    seconds = 0.0
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.WINDOWEXPOSED:
+                dashboard.full_redraw = True
+            else:
+                dashboard.handle_event(event)
+        dashboard.update(seconds)
+        dirty = dashboard.draw(clock.get_fps())
+        if dirty is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(dirty)
+        seconds = clock.tick(FPS) / 1000.0
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""
+Varredura de parâmetros (planejamento de experimentos) em paralelo.
+
+Gera receitas sobre as faixas dos sliders (RECIPE_PARAMS) por grade regular,
+amostragem aleatória ou hipercubo latino, avalia cada bloco de receitas com o
+modelo vetorizado em um pool de processos e grava os resultados em streaming
+(CSV, NPZ ou Parquet), bloco a bloco, sem guardar tudo na memória.
+
+Exemplos:
+    python varredura.py --metodo grade --niveis 8 --saida varredura.csv
+    python varredura.py --metodo lhs --amostras 1000000 --formato parquet --saida varredura.parquet
+    python varredura.py --metodo aleatorio --amostras 20000 --fixo farina_g=500 \\
+        --trajetorias 48 --formato npz --saida varredura_npz
+"""
+import argparse
+import csv
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from modelo import (RECIPE_PARAMS, PARAM_NAMES, SIMULATION_OUTPUTS, FEEDBACK_LEVELS,
+                    predict_batch, update_simulation_batch)
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+
+def param_bounds(fixed=None):
+    """
+    Limites (mínimo, máximo) de cada parâmetro, na ordem dos sliders.
+    fixed é um dict {nome: valor} de parâmetros mantidos constantes.
+    """
+    fixed = fixed or {}
+    unknown = set(fixed) - set(PARAM_NAMES)
+    if unknown:
+        raise ValueError(f"Parâmetros desconhecidos: {', '.join(sorted(unknown))}")
+    lo = np.array([float(fixed.get(name, p_min)) for name, p_min, _, _, _ in RECIPE_PARAMS])
+    hi = np.array([float(fixed.get(name, p_max)) for name, _, p_max, _, _ in RECIPE_PARAMS])
+    return lo, hi
+
+
+# --------- Amostradores ----------
+# Todos têm len() e chunk(start, stop) -> array (stop - start, 6) na ordem dos sliders,
+# de forma que os blocos possam ser gerados sob demanda.
+
+class GridSampler:
+    """Grade regular com `levels` valores por parâmetro (um int ou um por parâmetro)."""
+
+    def __init__(self, levels, fixed=None):
+        lo, hi = param_bounds(fixed)
+        levels = np.broadcast_to(np.asarray(levels, dtype=int), lo.shape).copy()
+        levels[lo == hi] = 1  # Parâmetros fixos têm um único valor
+        self.axes = [np.linspace(a, b, n) for a, b, n in zip(lo, hi, levels)]
+        self.shape = tuple(len(ax) for ax in self.axes)
+
+    def __len__(self):
+        return int(np.prod(self.shape))
+
+    def chunk(self, start, stop):
+        idx = np.unravel_index(np.arange(start, stop), self.shape)
+        return np.column_stack([ax[i] for ax, i in zip(self.axes, idx)])
+
+
+class RandomSampler:
+    """Amostras uniformes independentes (reprodutíveis por semente e posição)."""
+
+    def __init__(self, n, seed=0, fixed=None):
+        self.n = int(n)
+        self.seed = seed
+        self.lo, self.hi = param_bounds(fixed)
+
+    def __len__(self):
+        return self.n
+
+    def chunk(self, start, stop):
+        rng = np.random.default_rng([self.seed, start])
+        return self.lo + rng.random((stop - start, len(self.lo))) * (self.hi - self.lo)
+
+
+class LatinHypercubeSampler:
+    """
+    Hipercubo latino: cada parâmetro tem exatamente uma amostra em cada um dos
+    n estratos. As permutações (int32, 4 bytes por amostra e parâmetro) são
+    sorteadas uma vez; os pontos de cada bloco são gerados sob demanda.
+    """
+
+    def __init__(self, n, seed=0, fixed=None):
+        self.n = int(n)
+        self.seed = seed
+        self.lo, self.hi = param_bounds(fixed)
+        rng = np.random.default_rng(seed)
+        self.strata = np.stack([rng.permutation(self.n).astype(np.int32) for _ in self.lo])
+
+    def __len__(self):
+        return self.n
+
+    def chunk(self, start, stop):
+        rng = np.random.default_rng([self.seed, start])
+        u = (self.strata[:, start:stop].T + rng.random((stop - start, len(self.lo)))) / self.n
+        return self.lo + u * (self.hi - self.lo)
+
+
+# --------- Avaliação ----------
+
+def evaluate_chunk(params, trajectory_points=0):
+    """
+    Avalia um bloco de receitas (array (k, 6)). Retorna um dict de colunas:
+    os parâmetros, as 8 saídas no tempo final, "level" e, se pedido, as
+    trajetórias "traj_<saída>" com trajectory_points amostras (k, pontos)
+    igualmente espaçadas até o tempo final de cada receita.
+    """
+    params = np.asarray(params, dtype=float)
+    result = {name: params[:, i] for i, name in enumerate(PARAM_NAMES)}
+    result.update(predict_batch(params))
+
+    if trajectory_points:
+        farina_g, water, temp, sugar_added, salt_g, time_limit = (params[:, i:i + 1] for i in range(6))
+        times = time_limit * np.linspace(1.0 / trajectory_points, 1.0, trajectory_points)
+        traj = update_simulation_batch(times, temp, sugar_added, water, farina_g, salt_g)
+        result.update({f"traj_{name}": traj[name] for name in SIMULATION_OUTPUTS})
+    return result
+
+
+def _evaluate_task(task):
+    params, trajectory_points = task
+    return evaluate_chunk(params, trajectory_points)
+
+
+def run_sweep(sampler, writer, processes=None, chunk_size=DEFAULT_CHUNK_SIZE, trajectory_points=0, progress=None):
+    """
+    Avalia todas as receitas de sampler em blocos de chunk_size e entrega cada
+    resultado a writer.write(colunas), na ordem. Com processes > 1 os blocos
+    são avaliados em paralelo, com no máximo 2 blocos por processo em espera
+    (memória limitada). Retorna o número de receitas avaliadas.
+    """
+    total = len(sampler)
+    bounds = [(s, min(s + chunk_size, total)) for s in range(0, total, chunk_size)]
+    processes = processes or os.cpu_count() or 1
+    done = 0
+
+    def finish(result):
+        nonlocal done
+        writer.write(result)
+        done += len(result["level"])
+        if progress:
+            progress(done, total)
+
+    if processes == 1:
+        for start, stop in bounds:
+            finish(evaluate_chunk(sampler.chunk(start, stop), trajectory_points))
+        return done
+
+    with ProcessPoolExecutor(processes) as pool:
+        pending = deque()
+        for start, stop in bounds:
+            pending.append(pool.submit(_evaluate_task, (sampler.chunk(start, stop), trajectory_points)))
+            if len(pending) >= 2 * processes:
+                finish(pending.popleft().result())
+        while pending:
+            finish(pending.popleft().result())
+    return done
+
+
+# --------- Gravação ----------
+
+def _scalar_columns(result):
+    return [name for name in result if not name.startswith("traj_")]
+
+
+class CsvWriter:
+    """Uma linha por receita (apenas valores finais; o nível vai como texto)."""
+
+    def __init__(self, path):
+        self.file = open(path, "w", encoding="utf-8", newline="")
+        self.writer = csv.writer(self.file)
+        self.header = None
+
+    def write(self, result):
+        if self.header is None:
+            self.header = _scalar_columns(result)
+            self.writer.writerow(self.header)
+        columns = [result[name].tolist() for name in self.header]
+        level_col = self.header.index("level")
+        columns[level_col] = [FEEDBACK_LEVELS[i] for i in columns[level_col]]
+        self.writer.writerows(zip(*columns))
+
+    def close(self):
+        self.file.close()
+
+
+class NpzWriter:
+    """Um arquivo .npz por bloco (parte_00000.npz, ...) dentro de um diretório."""
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.part = 0
+
+    def write(self, result):
+        path = os.path.join(self.directory, f"parte_{self.part:05d}.npz")
+        np.savez(path, levels=np.array(FEEDBACK_LEVELS), **result)
+        self.part += 1
+
+    def close(self):
+        pass
+
+
+class ParquetWriter:
+    """Arquivo Parquet gravado por grupos de linhas (requer pyarrow)."""
+
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("O formato parquet requer o pacote pyarrow (pip install pyarrow).")
+        self.pa, self.pq = pa, pq
+        self.path = path
+        self.writer = None
+
+    def write(self, result):
+        pa = self.pa
+        columns = {name: result[name] for name in _scalar_columns(result)}
+        columns["level"] = pa.DictionaryArray.from_arrays(result["level"].astype(np.int8), list(FEEDBACK_LEVELS))
+        for name, values in result.items():
+            if name.startswith("traj_"):
+                columns[name] = pa.FixedSizeListArray.from_arrays(pa.array(values.ravel()), values.shape[1])
+        table = pa.table(columns)
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+WRITERS = {"csv": CsvWriter, "npz": NpzWriter, "parquet": ParquetWriter}
+
+
+# --------- Linha de comando ----------
+
+def parse_fixed(items):
+    """Converte ["farina_g=500", ...] em {"farina_g": 500.0, ...}."""
+    fixed = {}
+    for item in items or []:
+        name, _, value = item.partition("=")
+        fixed[name.strip()] = float(value)
+    return fixed
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Varredura de receitas do simulador de fermentação")
+    parser.add_argument("--metodo", choices=("grade", "aleatorio", "lhs"), default="lhs")
+    parser.add_argument("--niveis", type=int, default=10, help="Valores por parâmetro (grade)")
+    parser.add_argument("--amostras", type=int, default=10000, help="Número de receitas (aleatorio/lhs)")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--fixo", action="append", metavar="NOME=VALOR",
+                        help=f"Mantém um parâmetro constante ({', '.join(PARAM_NAMES)})")
+    parser.add_argument("--trajetorias", type=int, default=0, metavar="PONTOS",
+                        help="Também grava as trajetórias com PONTOS amostras (npz/parquet)")
+    parser.add_argument("--formato", choices=tuple(WRITERS), default="csv")
+    parser.add_argument("--saida", required=True, help="Arquivo (csv/parquet) ou diretório (npz)")
+    parser.add_argument("--processos", type=int, default=None, help="Padrão: todos os núcleos")
+    parser.add_argument("--bloco", type=int, default=DEFAULT_CHUNK_SIZE, help="Receitas por bloco")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.trajetorias and args.formato == "csv":
+        sys.exit("Erro: trajetórias só podem ser gravadas nos formatos npz ou parquet.")
+    if args.bloco < 1:
+        sys.exit("Erro: --bloco deve ser pelo menos 1.")
+    if args.niveis < 1:
+        sys.exit("Erro: --niveis deve ser pelo menos 1.")
+    try:
+        fixed = parse_fixed(args.fixo)
+        if args.metodo == "grade":
+            sampler = GridSampler(args.niveis, fixed)
+        elif args.metodo == "aleatorio":
+            sampler = RandomSampler(args.amostras, args.semente, fixed)
+        else:
+            sampler = LatinHypercubeSampler(args.amostras, args.semente, fixed)
+        writer = WRITERS[args.formato](args.saida)
+    except (ValueError, RuntimeError) as e:
+        sys.exit(f"Erro: {e}")
+
+    def progress(done, total):
+        sys.stderr.write(f"\r{done}/{total} receitas")
+        sys.stderr.flush()
+
+    try:
+        run_sweep(sampler, writer, args.processos, args.bloco, args.trajetorias, progress)
+    finally:
+        writer.close()
+    sys.stderr.write("\n")
+
+
+if __name__ == "__main__":
+    main()